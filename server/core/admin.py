@@ -24,7 +24,7 @@ from .models import (
     InvoiceItem,
     DeliveryChallanItem,
 )
-from .models import Bill, BillItem
+from .models import Bill, BillItem, NumberSeries
 
 admin.site.register(DeliveryChallanItem)
 admin.site.register(Invoice)
@@ -39,3 +39,8 @@ admin.site.register(ProformaInvoice)
 admin.site.register(ProformaInvoiceItem)
 admin.site.register(Bill)
 admin.site.register(BillItem)
+
+
+@admin.register(NumberSeries)
+class NumberSeriesAdmin(admin.ModelAdmin):
+    list_display = ("document", "prefix", "padding", "reset_yearly", "fiscal_year_start_month", "block_size")
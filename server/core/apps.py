@@ -4,13 +4,19 @@ from django.dispatch import receiver
 
 
 def schedule_task(sender, **kwargs):
-    from core.background_tasks import preaggregate_daily_summaries
+    from core.background_tasks import (
+        preaggregate_daily_summaries, rebuild_all_daily_summaries,
+    )
     from background_task.models import Task
     try:
         if not Task.objects.filter(
             task_name="core.background_tasks.preaggregate_daily_summaries"
         ).exists():
             preaggregate_daily_summaries(repeat=86400)  # every 24 hours
+        if not Task.objects.filter(
+            task_name="core.background_tasks.rebuild_all_daily_summaries"
+        ).exists():
+            rebuild_all_daily_summaries(repeat=7 * 86400)  # every week
     except Exception:
         pass
 
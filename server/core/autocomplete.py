@@ -0,0 +1,115 @@
+"""
+Typeahead suggestions for the customer, vendor and item pickers.
+
+A suggestion is a handful of columns read with one range scan over an index
+on the lowercased name, so a prefix never touches the rest of the table. The
+name is compared byte by byte, in the "C" collation on PostgreSQL, as a
+locale collation would let the range take in names that don't start with
+the prefix.
+Results are kept in a small per-process cache. Each kind's entries are keyed
+by a version token in the shared cache (see CACHES in settings), which the
+signal handlers in ``core.signals`` replace whenever a row of that kind is
+saved or deleted, so a write handled by one worker reaches every worker's
+entries.
+"""
+import time
+from collections import OrderedDict
+from decimal import Decimal
+
+from django.conf import settings
+from django.core.cache import cache
+from django.db import connection, transaction
+from django.db.models.functions import Collate, Lower
+
+from .models import Customer, Item, Vendor
+
+AUTOCOMPLETE_TIMEOUT = getattr(settings, "AUTOCOMPLETE_TIMEOUT", 60)
+AUTOCOMPLETE_CACHE_SIZE = 1000
+
+# kind -> (model, label field, other fields returned with each suggestion)
+AUTOCOMPLETE_SOURCES = {
+    "customer": (Customer, "display_name", ("company_name", "email")),
+    "vendor": (Vendor, "name", ("company_name", "email")),
+    "item": (Item, "name", ("sku", "price")),
+}
+AUTOCOMPLETE_KINDS = {model: kind for kind, (model, _, _) in AUTOCOMPLETE_SOURCES.items()}
+
+# (kind, version, prefix, limit) -> (expiry time, suggestions)
+_local_cache = OrderedDict()
+
+
+def _version_key(kind):
+    return f"autocomplete:version:{kind}"
+
+
+def _version(kind):
+    version = cache.get(_version_key(kind))
+    if version is None:
+        version = time.time_ns()
+        cache.set(_version_key(kind), version, None)
+    return version
+
+
+def _replace_version(kind):
+    cache.set(_version_key(kind), time.time_ns(), None)
+
+
+def invalidate(model):
+    """
+    Drop the cached suggestions for a model's kind, now and again once the
+    write commits: another worker may read the rows before then and cache
+    them under the new token.
+    """
+    kind = AUTOCOMPLETE_KINDS.get(model)
+    if kind:
+        _replace_version(kind)
+        transaction.on_commit(lambda: _replace_version(kind))
+
+
+def _label_key(label_field):
+    """The expression the label indexes are built on (see migration 0031)."""
+    key = Lower(label_field)
+    if connection.vendor == "postgresql":
+        key = Collate(key, "C")
+    return key
+
+
+def _query(kind, prefix, limit):
+    model, label_field, fields = AUTOCOMPLETE_SOURCES[kind]
+    rows = model.objects.annotate(key=_label_key(label_field))
+    if prefix:
+        # Byte order keeps every key starting with the prefix between it and
+        # the prefix with its last character bumped, so a btree range scan
+        # serves both the filter and the ordering
+        upper = prefix[:-1] + chr(ord(prefix[-1]) + 1)
+        rows = rows.filter(key__gte=prefix, key__lt=upper)
+    rows = rows.order_by("key", "id").values("id", label_field, *fields)[:limit]
+    return [
+        {
+            "id": row["id"],
+            "label": row[label_field],
+            # Decimals as strings, like the serializers render them
+            **{field: str(row[field]) if isinstance(row[field], Decimal) else row[field] for field in fields},
+        }
+        for row in rows
+    ]
+
+
+def suggest(kind, prefix, limit=10):
+    """
+    Return up to ``limit`` suggestions of ``kind`` whose label starts with
+    ``prefix``, case-insensitively, in label order.
+    """
+    prefix = prefix.strip().lower()
+    key = (kind, _version(kind), prefix, limit)
+    now = time.monotonic()
+    hit = _local_cache.get(key)
+    if hit is not None and hit[0] > now:
+        _local_cache.move_to_end(key)
+        return hit[1]
+    suggestions = _query(kind, prefix, limit)
+    _local_cache[key] = (now + AUTOCOMPLETE_TIMEOUT, suggestions)
+    _local_cache.move_to_end(key)
+    while len(_local_cache) > AUTOCOMPLETE_CACHE_SIZE:
+        _local_cache.popitem(last=False)
+    return suggestions
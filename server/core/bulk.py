@@ -0,0 +1,360 @@
+"""
+Batch writes behind the ``<resource>/bulk/`` endpoints.
+
+A batch is validated row by row with the resource's serializer, but the
+related rows it points at are loaded up front with one in_bulk per model,
+and unique fields are checked with one query per field rather than per row.
+The valid rows are then written together with bulk_create / bulk_update in
+one transaction; invalid rows are left out and reported with their errors.
+
+bulk_create and bulk_update send no model signals, so what the handlers in
+``core.signals`` do for each saved row (rollups, amount_paid, search
+entries, change events, picker suggestions and report cache invalidation)
+is done here once for the whole batch. Deletes go through the ORM so that
+cascades behave as usual, with the batch model's own handlers muted.
+"""
+import copy
+from collections import Counter, defaultdict
+from decimal import Decimal
+
+from django.conf import settings
+from django.db import transaction
+from django.db.models import Sum
+from django.utils import timezone
+from rest_framework import serializers
+from rest_framework.relations import ManyRelatedField
+from rest_framework.validators import UniqueValidator
+
+from . import autocomplete
+from .changes import SYNCED_MODELS, record_changes
+from .models import Invoice, Item, Payment
+from .rollups import (
+    SOURCE_PARTIES, as_amount, party_of, party_rollup_deltas, rollup_deltas,
+    schedule_daily_deltas, schedule_party_deltas,
+)
+from .search import index_objects, unindex_objects
+from .numbering import number_documents
+from .serializers import (
+    LineItemListSerializer, LineItemsMixin, NumberedDocumentMixin,
+    PreloadedPrimaryKeyRelatedField,
+)
+from .signals import (
+    ROLLUP_SOURCES, add_to_amounts_paid, invalidate_report_cache_on_commit,
+    muted,
+)
+
+BULK_MAX_ROWS = getattr(settings, "BULK_MAX_ROWS", 5000)
+BATCH_SIZE = 500
+
+
+def _as_pk(value):
+    try:
+        return int(value)
+    except (TypeError, ValueError):
+        return None
+
+
+def _deltas():
+    return defaultdict(lambda: defaultdict(Decimal))
+
+
+def _merge(total, deltas):
+    for key, columns in deltas.items():
+        for column, amount in columns.items():
+            total[key][column] += amount
+
+
+def preload(serializer, rows, instances=()):
+    """
+    Load the rows that ``rows`` refer to through the serializer's related
+    fields, and through its line items, with one in_bulk per model. The
+    items of the stored lines of ``instances`` are loaded too, for lines
+    updated without an ``item_id``. Returns ``{model: {pk: obj}}`` for
+    ``context["preloaded"]``.
+    """
+    wanted = defaultdict(set)
+    querysets = {}
+    for name, field in serializer.fields.items():
+        if field.read_only:
+            continue
+        if isinstance(field, PreloadedPrimaryKeyRelatedField):
+            queryset = field.get_queryset()
+            values = [row.get(name) for row in rows]
+        elif isinstance(field, ManyRelatedField) and isinstance(field.child_relation, PreloadedPrimaryKeyRelatedField):
+            queryset = field.child_relation.get_queryset()
+            values = [pk for row in rows if isinstance(row.get(name), list) for pk in row[name]]
+        elif isinstance(field, LineItemListSerializer):
+            queryset = Item.objects.all()
+            values = [
+                line.get("item_id")
+                for row in rows if isinstance(row.get(name), list)
+                for line in row[name] if isinstance(line, dict)
+            ] + [line.item_id for obj in instances for line in getattr(obj, name).all()]
+        else:
+            continue
+        querysets[queryset.model] = queryset
+        wanted[queryset.model].update(pk for pk in map(_as_pk, values) if pk is not None)
+    return {model: querysets[model].in_bulk(pks) for model, pks in wanted.items()}
+
+
+def validate_rows(serializer, rows, instances=None):
+    """
+    Validate each row with the unbound ``serializer``. With ``instances``
+    (``{index: instance}``), rows are partial updates of those instances.
+    Returns ``{index: validated_data}`` and ``{index: errors}``.
+    """
+    valid, errors = {}, {}
+    records = {index: row for index, row in enumerate(rows) if isinstance(row, dict)}
+    for index in set(range(len(rows))) - set(records):
+        errors[index] = {"non_field_errors": ["Expected an object."]}
+    serializer.context["preloaded"] = preload(
+        serializer, list(records.values()), (instances or {}).values()
+    )
+    # Unique fields are checked for the whole batch below
+    for field in serializer.fields.values():
+        field.validators = [v for v in field.validators if not isinstance(v, UniqueValidator)]
+    serializer.partial = instances is not None
+    for index, row in records.items():
+        if instances is not None and index not in instances:
+            errors[index] = {"id": ["Not found."]}
+            continue
+        serializer.instance = instances[index] if instances is not None else None
+        try:
+            valid[index] = serializer.run_validation(row)
+        except serializers.ValidationError as exc:
+            errors[index] = exc.detail
+    if isinstance(serializer, NumberedDocumentMixin):
+        # As in NumberedDocumentMixin: a blank number keeps the stored one on
+        # update, and gets the next from the series on create
+        for data in valid.values():
+            if not data.get(serializer.number_field, True):
+                del data[serializer.number_field]
+    check_unique(serializer.Meta.model, valid, errors, instances or {})
+    return valid, errors
+
+
+def check_unique(model, valid, errors, instances):
+    """
+    Move rows that repeat a unique value, within the batch or of another
+    stored record, from ``valid`` to ``errors``.
+    """
+    for field in model._meta.concrete_fields:
+        if not field.unique or field.primary_key:
+            continue
+        values = {index: data[field.name] for index, data in valid.items() if field.name in data}
+        if not values:
+            continue
+        repeated = Counter(values.values())
+        taken = dict(
+            model.objects.filter(**{f"{field.name}__in": set(values.values())})
+            .values_list(field.name, "pk")
+        )
+        for index, value in values.items():
+            own = instances[index].pk if index in instances else None
+            if repeated[value] > 1:
+                message = "Repeated in this batch."
+            elif taken.get(value, own) != own:
+                message = f"{model._meta.verbose_name} with this {field.verbose_name} already exists."
+            else:
+                continue
+            errors.setdefault(index, {})[field.name] = [message]
+    for index in errors:
+        valid.pop(index, None)
+
+
+def _split_many_to_many(model, data):
+    return {
+        name: data.pop(name)
+        for name in list(data)
+        if model._meta.get_field(name).many_to_many
+    }
+
+
+def _set_many_to_many(model, objs, related, replace=False):
+    """Link each object to its ``related`` rows with one bulk_create per table."""
+    links = defaultdict(list)
+    for obj, values in zip(objs, related):
+        for name, targets in values.items():
+            field = model._meta.get_field(name)
+            through = field.remote_field.through
+            if replace:
+                through.objects.filter(**{field.m2m_field_name(): obj}).delete()
+            links[through].extend(
+                through(**{field.m2m_field_name(): obj, field.m2m_reverse_field_name(): target})
+                for target in targets
+            )
+    for through, rows in links.items():
+        through.objects.bulk_create(rows, batch_size=BATCH_SIZE)
+
+
+def _results(rows, errors, done, status):
+    """One result per row, in request order."""
+    return [
+        {"index": index, "status": "invalid", "errors": errors[index]}
+        if index in errors else
+        {"index": index, "status": status, "id": done[index].pk}
+        for index in range(len(rows))
+    ]
+
+
+def create_rows(serializer, rows):
+    """Create the valid rows of a batch. Returns one result per row."""
+    valid, errors = validate_rows(serializer, rows)
+    objs = create_objects(serializer, valid)
+    return _results(rows, errors, objs, "created")
+
+
+def create_objects(serializer, valid):
+    """
+    Create a record from each of the ``{index: validated_data}`` of the
+    serializer, with their lines, numbers and side effects, in one
+    transaction. Returns ``{index: obj}``.
+    """
+    model = serializer.Meta.model
+    objs, lines, related = {}, {}, []
+    with transaction.atomic():
+        if isinstance(serializer, NumberedDocumentMixin):
+            number_documents(model, list(valid.values()), serializer.number_field, serializer.number_date_field)
+        for index, data in valid.items():
+            if isinstance(serializer, LineItemsMixin):
+                lines[index] = serializer.price(data) or []
+            related.append(_split_many_to_many(model, data))
+            objs[index] = model(**data)
+        model.objects.bulk_create(objs.values(), batch_size=BATCH_SIZE)
+        if lines:
+            line_model, parent = serializer.line_relation()
+            line_model.objects.bulk_create([
+                line_model(**{parent: objs[index]}, **line)
+                for index, row_lines in lines.items() for line in row_lines
+            ], batch_size=BATCH_SIZE)
+        _set_many_to_many(model, objs.values(), related)
+        apply_side_effects(model, [(None, obj) for obj in objs.values()])
+    return objs
+
+
+def update_rows(serializer, queryset, rows):
+    """
+    Apply the valid partial updates of a batch, each naming its record by
+    ``id``. Returns one result per row.
+    """
+    model = serializer.Meta.model
+    ids = {index: _as_pk(row.get("id")) for index, row in enumerate(rows) if isinstance(row, dict)}
+    stored = queryset.in_bulk({pk for pk in ids.values() if pk is not None})
+    instances = {index: stored[pk] for index, pk in ids.items() if pk in stored}
+    valid, errors = validate_rows(serializer, rows, instances)
+    changes, fields, related = [], {"updated_at"}, []
+    new_lines, changed_lines, removed_lines = [], [], []
+    now = timezone.now()
+    for index, data in valid.items():
+        obj = serializer.instance = instances[index]
+        before = copy.copy(obj)
+        row_lines = serializer.price(data) if isinstance(serializer, LineItemsMixin) else None
+        related.append(_split_many_to_many(model, data))
+        for name, value in data.items():
+            setattr(obj, name, value)
+        fields.update(data)
+        obj.updated_at = now
+        if row_lines is not None:
+            new, changed, removed = serializer.diff_lines(obj, row_lines)
+            new_lines += new
+            changed_lines += changed
+            removed_lines += removed
+        changes.append((before, obj))
+    objs = [obj for _, obj in changes]
+    with transaction.atomic():
+        model.objects.bulk_update(objs, sorted(fields), batch_size=BATCH_SIZE)
+        if isinstance(serializer, LineItemsMixin):
+            serializer.save_lines(new_lines, changed_lines, removed_lines)
+        _set_many_to_many(model, objs, related, replace=True)
+        apply_side_effects(model, changes)
+    return _results(rows, errors, instances, "updated")
+
+
+def delete_rows(queryset, ids):
+    """Delete the records with these ids. Returns one result per id."""
+    model = queryset.model
+    pks = {index: _as_pk(pk) for index, pk in enumerate(ids)}
+    objs = queryset.in_bulk({pk for pk in pks.values() if pk is not None})
+    with transaction.atomic():
+        with muted(model):
+            model.objects.filter(pk__in=objs).delete()
+        apply_side_effects(model, [(obj, None) for obj in objs.values()])
+    return [
+        {"index": index, "status": "deleted", "id": pk} if pk in objs else
+        {"index": index, "status": "invalid", "errors": {"id": ["Not found."]}}
+        for index, pk in pks.items()
+    ]
+
+
+def apply_side_effects(model, changes):
+    """
+    Do for a batch of ``(before, after)`` pairs, None for a record that did
+    not exist before or no longer exists after, what the core.signals
+    handlers do for each saved or deleted record.
+    """
+    saved = [after for _, after in changes if after is not None]
+    deleted = [before.pk for before, after in changes if after is None]
+    if model in ROLLUP_SOURCES:
+        _schedule_rollups(model, changes)
+    if model is Invoice:
+        _move_payments(changes)
+    if model is Payment:
+        paid = defaultdict(Decimal)
+        for before, after in changes:
+            if before is not None:
+                paid[before.invoice_id] -= as_amount(before.amount)
+            if after is not None:
+                paid[after.invoice_id] += as_amount(after.amount)
+        add_to_amounts_paid(paid)
+    index_objects(model, saved)
+    unindex_objects(model, deleted)
+    if model in SYNCED_MODELS:
+        record_changes(model, [obj.pk for obj in saved])
+        record_changes(model, deleted, deleted=True)
+    autocomplete.invalidate(model)
+
+
+def _schedule_rollups(model, changes):
+    date_field, amount_field, column = ROLLUP_SOURCES[model]
+    party_model, party_path = SOURCE_PARTIES[model]
+    daily, party, dates = _deltas(), _deltas(), set()
+    for pair in changes:
+        before, after = (
+            None if obj is None else
+            (getattr(obj, date_field), getattr(obj, amount_field), party_of(obj, party_path))
+            for obj in pair
+        )
+        _merge(daily, rollup_deltas(column, before and before[:2], after and after[:2]))
+        _merge(party, party_rollup_deltas(column, before, after))
+        dates.update(state[0] for state in (before, after) if state and state[0])
+    schedule_daily_deltas(daily)
+    schedule_party_deltas(party_model, party)
+    invalidate_report_cache_on_commit(dates)
+
+
+def _move_payments(changes):
+    """Move payments between customers' rollups with their reassigned invoices."""
+    moved = {
+        after.pk: (before.customer_id, after.customer_id)
+        for before, after in changes
+        if before is not None and after is not None and before.customer_id != after.customer_id
+    }
+    if not moved:
+        return
+    payments = (
+        Payment.objects.filter(invoice_id__in=moved)
+        .values("invoice_id", "date")
+        .annotate(total=Sum("amount"))
+        .order_by()
+    )
+    party_model, _ = SOURCE_PARTIES[Payment]
+    deltas = _deltas()
+    for row in payments:
+        old, new = moved[row["invoice_id"]]
+        _merge(deltas, party_rollup_deltas(
+            "payments_total",
+            (row["date"], row["total"], old),
+            (row["date"], row["total"], new),
+        ))
+    schedule_party_deltas(party_model, deltas)
+    invalidate_report_cache_on_commit([row["date"] for row in payments])
@@ -0,0 +1,91 @@
+"""
+Change feeds for clients that keep local copies of the API resources.
+
+Every save or delete of a synced model replaces that record's ChangeEvent
+with a new one, written in the same transaction as the record. A client
+that has seen everything up to cursor N asks for the events after N and
+gets each changed record once, plus tombstones for deleted ones.
+
+The cursor is not the event ``id``: ids are assigned when the writing
+transaction inserts its events, so a transaction can take a lower id and
+commit after a client has already read past it, and that client would
+never see the write. Instead, feed readers give the events that have
+committed since the last read the next positions in ``sequence``, under
+the lock on the single ChangeSequence row. Only committed events are
+visible to them, and positions are handed out one reader at a time, so a
+position is never taken after a higher one has been read.
+"""
+from django.db import connection, transaction
+
+from .models import (
+    Bill, ChangeEvent, ChangeSequence, Customer, DeliveryChallan, InventoryAdjustment, Invoice,
+    Item, Payment, ProformaInvoice, Quote, Vendor,
+)
+
+SYNCED_MODELS = (
+    Customer, Vendor, Item, Invoice, Bill, Payment, Quote, ProformaInvoice,
+    DeliveryChallan, InventoryAdjustment,
+)
+
+
+def resource_name(model):
+    return model._meta.model_name
+
+
+def record_changes(model, pks, deleted=False):
+    """Log a change to each of the records of ``model`` with these pks."""
+    pks = list(pks)
+    if not pks:
+        return
+    resource = resource_name(model)
+    ChangeEvent.objects.filter(resource=resource, object_id__in=pks).delete()
+    ChangeEvent.objects.bulk_create([
+        ChangeEvent(resource=resource, object_id=pk, deleted=deleted) for pk in pks
+    ])
+
+
+def record_change(model, pk, deleted=False):
+    """Log a change to one record."""
+    record_changes(model, [pk], deleted=deleted)
+
+
+def sequence_events():
+    """Place the events committed since the last call in the feed."""
+    if not ChangeEvent.objects.filter(sequence__isnull=True).exists():
+        return
+    with transaction.atomic():
+        counter, _ = ChangeSequence.objects.select_for_update().get_or_create(pk=1)
+        # Read again under the lock: another reader may have placed them
+        pending = list(ChangeEvent.objects.filter(sequence__isnull=True).order_by("id"))
+        for position, event in enumerate(pending, start=counter.last + 1):
+            event.sequence = position
+        ChangeEvent.objects.bulk_update(pending, ["sequence"], batch_size=500)
+        counter.last += len(pending)
+        counter.save(update_fields=["last"])
+
+
+def changes_since(model, cursor, limit):
+    """
+    Return up to ``limit`` + 1 events of ``model`` after ``cursor``, oldest
+    first; the extra event tells the caller there is more to read.
+    """
+    sequence_events()
+    return list(
+        ChangeEvent.objects.filter(resource=resource_name(model), sequence__gt=cursor)
+        .order_by("sequence")[:limit + 1]
+    )
+
+
+def latest_change_ids(models):
+    """
+    Return the id of the newest event of each model, or None where a model
+    has none. Any write to a model moves its value, so together they version
+    everything rendered from those models. Each MAX is a seek on the
+    (resource, id) index, all in one query.
+    """
+    sql = "SELECT " + ", ".join(
+        [f"(SELECT MAX(id) FROM {ChangeEvent._meta.db_table} WHERE resource = %s)"] * len(models)
+    )
+    with connection.cursor() as cursor:
+        cursor.execute(sql, [resource_name(model) for model in models])
+        return list(cursor.fetchone())
@@ -0,0 +1,174 @@
+"""
+Converting documents along the sales pipeline: a quote into a proforma
+invoice, an invoice or a delivery challan, a proforma invoice into an
+invoice or a delivery challan, and an invoice into a delivery challan.
+
+A new document copies the header fields it shares with its source, and the
+source's lines, and links back to the source. Invoices carry the discount,
+TDS/TCS and adjustment of the quote or proforma they come from, so they
+total the same. It is numbered and priced by
+its own serializer, as if it had been posted, and written with
+core.bulk.create_objects, so converting a batch of sources takes the same
+few queries as converting one. Sources move to their new status in the
+same transaction: a quote or proforma turned into an invoice becomes
+invoiced, and a draft or sent one turned into anything else, accepted.
+Invoicing a proforma invoices the quote it came from too, so the quote
+can't be invoiced a second time.
+"""
+from datetime import date
+
+from django.db import transaction
+from django.utils import timezone
+from rest_framework import serializers
+
+from .bulk import _as_pk, apply_side_effects, create_objects
+from .models import DeliveryChallan, Invoice, ProformaInvoice, Quote
+from .serializers import (
+    DeliveryChallanSerializer, InvoiceSerializer, ProformaInvoiceSerializer,
+    QuoteSerializer,
+)
+
+SERIALIZERS = {
+    Quote: QuoteSerializer,
+    ProformaInvoice: ProformaInvoiceSerializer,
+    Invoice: InvoiceSerializer,
+    DeliveryChallan: DeliveryChallanSerializer,
+}
+
+# source -> target -> {target field: source field} for fields copied under another name
+CONVERSIONS = {
+    Quote: {
+        ProformaInvoice: {},
+        Invoice: {"order_number": "reference_number"},
+        DeliveryChallan: {},
+    },
+    ProformaInvoice: {
+        Invoice: {"order_number": "reference_number"},
+        DeliveryChallan: {},
+    },
+    Invoice: {
+        DeliveryChallan: {"reference_number": "invoice_number"},
+    },
+}
+
+# Statuses a source can't be converted from
+CLOSED_STATUSES = {
+    Quote: {"rejected", "expired"},
+    ProformaInvoice: {"cancelled"},
+}
+
+NOT_COPIED = {"id", "status", "created_at", "updated_at"}
+
+
+def target_model(source, name):
+    """The model ``source`` documents can be converted to called ``name``."""
+    for target in CONVERSIONS.get(source, ()):
+        if target._meta.model_name == name:
+            return target
+    choices = ", ".join(target._meta.model_name for target in CONVERSIONS.get(source, ()))
+    raise serializers.ValidationError({"to": [f"Choose one of: {choices}."]})
+
+
+def _status_after(source, target):
+    """The status ``source`` moves to once converted, or None to keep it."""
+    status = getattr(source, "status", None)
+    if status is None:
+        return None
+    if target is Invoice:
+        return "invoiced"
+    if status in ("draft", "sent"):
+        return "accepted"
+    return None
+
+
+def _check(source, target):
+    """Return the errors that keep ``source`` from being converted, if any."""
+    status = getattr(source, "status", None)
+    if status in CLOSED_STATUSES.get(type(source), ()):
+        return {"status": [f"A {source.get_status_display().lower()} document can't be converted."]}
+    if target is Invoice and status == "invoiced":
+        return {"status": ["Already invoiced."]}
+    return None
+
+
+def _invoice_quotes(proformas, now):
+    """Move the quotes the invoiced ``proformas`` came from to invoiced."""
+    quotes = list(
+        Quote.objects.select_for_update()
+        .filter(pk__in={proforma.quote_id for proforma in proformas if proforma.quote_id})
+        .exclude(status="invoiced")
+    )
+    for quote in quotes:
+        quote.status, quote.updated_at = "invoiced", now
+    if quotes:
+        Quote.objects.bulk_update(quotes, ["status", "updated_at"])
+        apply_side_effects(Quote, [(quote, quote) for quote in quotes])
+
+
+def _header(source, target, serializer, day):
+    """The validated data of a new ``target`` made from ``source``."""
+    skip = NOT_COPIED | {serializer.number_field, serializer.number_date_field}
+    shared = {field.name for field in type(source)._meta.concrete_fields}
+    data = {
+        field.attname: getattr(source, field.attname)
+        for field in target._meta.concrete_fields
+        if field.name in shared and field.name not in skip and not field.generated
+    }
+    for name, source_name in CONVERSIONS[type(source)][target].items():
+        data[name] = getattr(source, source_name)
+    data[serializer.number_date_field] = day
+    if "expiry_date" in data:
+        # Keep the source's period of validity
+        source_date = getattr(source, SERIALIZERS[type(source)].number_date_field)
+        data["expiry_date"] = day + (source.expiry_date - source_date)
+    link = next(
+        field for field in target._meta.concrete_fields
+        if field.many_to_one and field.related_model is type(source)
+    )
+    data[link.attname] = source.pk
+    data["item_details"] = [
+        {name: getattr(line, name) for name in serializer.line_fields}
+        for line in source.item_details.all()
+    ]
+    return data
+
+
+def convert(model, ids, target, day=None, context=None):
+    """
+    Convert the ``model`` documents with these ids into new ``target``
+    documents dated ``day`` (today if not given), in one transaction.
+    Returns ``{index: new document}`` and ``{index: errors}``, indexed like
+    ``ids``.
+    """
+    day = day or date.today()
+    serializer = SERIALIZERS[target](context=context or {})
+    valid, errors, moved = {}, {}, []
+    now = timezone.now()
+    with transaction.atomic():
+        sources = (
+            model.objects.select_for_update()
+            .prefetch_related("item_details__item")
+            .in_bulk({pk for pk in map(_as_pk, ids) if pk is not None})
+        )
+        for index, pk in enumerate(ids):
+            source = sources.get(_as_pk(pk))
+            if source is None:
+                errors[index] = {"id": ["Not found."]}
+                continue
+            problems = _check(source, target)
+            if problems:
+                errors[index] = problems
+                continue
+            valid[index] = _header(source, target, serializer, day)
+            # Moved here already, so a source named twice isn't invoiced twice
+            status = _status_after(source, target)
+            if status is not None and status != source.status:
+                source.status, source.updated_at = status, now
+                moved.append(source)
+        objs = create_objects(serializer, valid)
+        if moved:
+            model.objects.bulk_update(moved, ["status", "updated_at"])
+            apply_side_effects(model, [(source, source) for source in moved])
+        if model is ProformaInvoice and target is Invoice:
+            _invoice_quotes(moved, now)
+    return objs, errors
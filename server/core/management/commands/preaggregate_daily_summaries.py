@@ -1,30 +1,34 @@
-from django.core.management.base import BaseCommand
-from core.models import Invoice, Bill, Payment, DailySummary
-from django.db.models import Sum
-from datetime import date, timedelta
+from datetime import date
+
+from django.core.management.base import BaseCommand, CommandError
+from core.rollups import rebuild_daily_summaries, since_last_run_start
+
 
 class Command(BaseCommand):
     help = "Pre-aggregate daily totals for invoices, bills, and payments."
 
+    def add_arguments(self, parser):
+        parser.add_argument(
+            "--start",
+            type=date.fromisoformat,
+            help="First day to rebuild (YYYY-MM-DD). Defaults to the oldest document.",
+        )
+        parser.add_argument(
+            "--end",
+            type=date.fromisoformat,
+            help="Last day to rebuild (YYYY-MM-DD). Defaults to today or the newest document, whichever is later.",
+        )
+        parser.add_argument(
+            "--since-last-run",
+            action="store_true",
+            help="Only rebuild the days that may have changed since the last run.",
+        )
+
     def handle(self, *args, **options):
-        min_date = min([
-            Invoice.objects.order_by('invoice_date').first().invoice_date if Invoice.objects.exists() else date.today(),
-            Bill.objects.order_by('bill_date').first().bill_date if Bill.objects.exists() else date.today(),
-            Payment.objects.order_by('date').first().date if Payment.objects.exists() else date.today(),
-        ])
-        max_date = date.today()
-        current = min_date
-        while current <= max_date:
-            invoices_total = Invoice.objects.filter(invoice_date=current).aggregate(total=Sum('total_amount'))['total'] or 0
-            bills_total = Bill.objects.filter(bill_date=current).aggregate(total=Sum('total_amount'))['total'] or 0
-            payments_total = Payment.objects.filter(date=current).aggregate(total=Sum('amount'))['total'] or 0
-            obj, created = DailySummary.objects.update_or_create(
-                date=current,
-                defaults={
-                    'invoices_total': invoices_total,
-                    'bills_total': bills_total,
-                    'payments_total': payments_total,
-                }
-            )
-            self.stdout.write(f"Aggregated {current}: invoices={invoices_total}, bills={bills_total}, payments={payments_total}")
-            current += timedelta(days=1)
+        start = options["start"]
+        if options["since_last_run"]:
+            if start is not None:
+                raise CommandError("--start cannot be combined with --since-last-run.")
+            start = since_last_run_start()
+        start, end, written = rebuild_daily_summaries(start=start, end=options["end"])
+        self.stdout.write(f"Aggregated {start} to {end}: {written} days with activity")
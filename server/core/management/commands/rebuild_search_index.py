@@ -0,0 +1,13 @@
+from django.core.management.base import BaseCommand
+from django.db import transaction
+
+from core.search import rebuild_search_index
+
+
+class Command(BaseCommand):
+    help = "Rebuild the search index over customers, vendors, items and documents."
+
+    def handle(self, *args, **options):
+        with transaction.atomic():
+            written = rebuild_search_index()
+        self.stdout.write(f"Indexed {written} records")
@@ -0,0 +1,57 @@
+"""
+Per-request SQL instrumentation.
+
+QueryBudgetMiddleware counts the queries a request runs and the time spent
+in them. Requests over ``settings.QUERY_BUDGET`` queries are logged, and
+with ``settings.QUERY_BUDGET_HEADERS`` the figures are returned in
+X-Query-Count, X-Query-Time-Ms and X-Response-Time-Ms headers.
+"""
+import logging
+import time
+
+from django.conf import settings
+from django.db import connection
+
+logger = logging.getLogger(__name__)
+
+
+class QueryCounter:
+    """Database execute wrapper that counts queries and their SQL time."""
+
+    def __init__(self):
+        self.count = 0
+        self.duration = 0.0
+
+    def __call__(self, execute, sql, params, many, context):
+        start = time.perf_counter()
+        try:
+            return execute(sql, params, many, context)
+        finally:
+            self.count += 1
+            self.duration += time.perf_counter() - start
+
+
+class QueryBudgetMiddleware:
+    """Records the SQL count and time of every request."""
+
+    def __init__(self, get_response):
+        self.get_response = get_response
+
+    def __call__(self, request):
+        counter = QueryCounter()
+        start = time.perf_counter()
+        with connection.execute_wrapper(counter):
+            response = self.get_response(request)
+        elapsed = time.perf_counter() - start
+
+        budget = getattr(settings, "QUERY_BUDGET", None)
+        if budget is not None and counter.count > budget:
+            logger.warning(
+                "%s %s ran %d queries, over the budget of %d",
+                request.method, request.path, counter.count, budget,
+            )
+        if getattr(settings, "QUERY_BUDGET_HEADERS", False):
+            response["X-Query-Count"] = str(counter.count)
+            response["X-Query-Time-Ms"] = f"{counter.duration * 1000:.1f}"
+            response["X-Response-Time-Ms"] = f"{elapsed * 1000:.1f}"
+        return response
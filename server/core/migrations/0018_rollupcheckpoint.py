@@ -0,0 +1,30 @@
+# Generated by Django 5.2.18 on 2026-10-18 12:05
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ("core", "0017_deliverychallan_delivery_challan_files"),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name="RollupCheckpoint",
+            fields=[
+                (
+                    "id",
+                    models.BigAutoField(
+                        auto_created=True,
+                        primary_key=True,
+                        serialize=False,
+                        verbose_name="ID",
+                    ),
+                ),
+                ("name", models.CharField(max_length=50, unique=True)),
+                ("covered_through", models.DateField(blank=True, null=True)),
+                ("last_run_at", models.DateTimeField(blank=True, null=True)),
+            ],
+        ),
+    ]
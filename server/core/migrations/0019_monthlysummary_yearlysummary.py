@@ -0,0 +1,107 @@
+# Generated by Django 5.2.18 on 2026-10-18 12:09
+
+from django.db import migrations, models
+from django.db.models import Sum
+from django.db.models.functions import ExtractYear, TruncMonth
+
+TOTALS = ("invoices_total", "bills_total", "payments_total")
+
+
+def populate_period_rollups(apps, schema_editor):
+    DailySummary = apps.get_model("core", "DailySummary")
+    MonthlySummary = apps.get_model("core", "MonthlySummary")
+    YearlySummary = apps.get_model("core", "YearlySummary")
+    sums = {field: Sum(field) for field in TOTALS}
+    months = (
+        DailySummary.objects.annotate(period=TruncMonth("date"))
+        .values("period")
+        .annotate(**sums)
+        .order_by()
+    )
+    MonthlySummary.objects.bulk_create(
+        [
+            MonthlySummary(month=row["period"], **{f: row[f] for f in TOTALS})
+            for row in months
+        ],
+        batch_size=500,
+    )
+    years = (
+        MonthlySummary.objects.annotate(period=ExtractYear("month"))
+        .values("period")
+        .annotate(**sums)
+        .order_by()
+    )
+    YearlySummary.objects.bulk_create(
+        [
+            YearlySummary(year=row["period"], **{f: row[f] for f in TOTALS})
+            for row in years
+        ],
+        batch_size=500,
+    )
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ("core", "0018_rollupcheckpoint"),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name="MonthlySummary",
+            fields=[
+                (
+                    "id",
+                    models.BigAutoField(
+                        auto_created=True,
+                        primary_key=True,
+                        serialize=False,
+                        verbose_name="ID",
+                    ),
+                ),
+                ("month", models.DateField(unique=True)),
+                (
+                    "invoices_total",
+                    models.DecimalField(decimal_places=2, default=0, max_digits=14),
+                ),
+                (
+                    "bills_total",
+                    models.DecimalField(decimal_places=2, default=0, max_digits=14),
+                ),
+                (
+                    "payments_total",
+                    models.DecimalField(decimal_places=2, default=0, max_digits=14),
+                ),
+                ("updated_at", models.DateTimeField(auto_now=True)),
+            ],
+        ),
+        migrations.CreateModel(
+            name="YearlySummary",
+            fields=[
+                (
+                    "id",
+                    models.BigAutoField(
+                        auto_created=True,
+                        primary_key=True,
+                        serialize=False,
+                        verbose_name="ID",
+                    ),
+                ),
+                ("year", models.PositiveIntegerField(unique=True)),
+                (
+                    "invoices_total",
+                    models.DecimalField(decimal_places=2, default=0, max_digits=16),
+                ),
+                (
+                    "bills_total",
+                    models.DecimalField(decimal_places=2, default=0, max_digits=16),
+                ),
+                (
+                    "payments_total",
+                    models.DecimalField(decimal_places=2, default=0, max_digits=16),
+                ),
+                ("updated_at", models.DateTimeField(auto_now=True)),
+            ],
+        ),
+        migrations.RunPython(populate_period_rollups, migrations.RunPython.noop),
+    ]
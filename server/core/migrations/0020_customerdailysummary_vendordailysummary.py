@@ -0,0 +1,136 @@
+# Generated by Django 5.2.18 on 2026-10-18 12:19
+
+import django.db.models.deletion
+from collections import defaultdict
+
+from django.db import migrations, models
+from django.db.models import Sum
+
+# Party rollup -> (party field, ((source, date field, amount field, column, path), ...))
+PARTY_SOURCES = {
+    "CustomerDailySummary": (
+        "customer",
+        (
+            (
+                "Invoice",
+                "invoice_date",
+                "total_amount",
+                "invoices_total",
+                "customer_id",
+            ),
+            ("Payment", "date", "amount", "payments_total", "invoice__customer_id"),
+        ),
+    ),
+    "VendorDailySummary": (
+        "vendor",
+        (("Bill", "bill_date", "total_amount", "bills_total", "vendor_id"),),
+    ),
+}
+
+
+def populate_party_rollups(apps, schema_editor):
+    for model_name, (party_field, sources) in PARTY_SOURCES.items():
+        model = apps.get_model("core", model_name)
+        totals = defaultdict(dict)
+        for source, date_field, amount_field, column, path in sources:
+            rows = (
+                apps.get_model("core", source)
+                .objects.values(path, date_field)
+                .annotate(total=Sum(amount_field))
+                .order_by()
+            )
+            for row in rows:
+                totals[row[path], row[date_field]][column] = row["total"] or 0
+        model.objects.bulk_create(
+            [
+                model(**{f"{party_field}_id": party_id, "date": day}, **columns)
+                for (party_id, day), columns in totals.items()
+            ],
+            batch_size=500,
+        )
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ("core", "0019_monthlysummary_yearlysummary"),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name="CustomerDailySummary",
+            fields=[
+                (
+                    "id",
+                    models.BigAutoField(
+                        auto_created=True,
+                        primary_key=True,
+                        serialize=False,
+                        verbose_name="ID",
+                    ),
+                ),
+                ("date", models.DateField()),
+                (
+                    "invoices_total",
+                    models.DecimalField(decimal_places=2, default=0, max_digits=12),
+                ),
+                (
+                    "payments_total",
+                    models.DecimalField(decimal_places=2, default=0, max_digits=12),
+                ),
+                ("updated_at", models.DateTimeField(auto_now=True)),
+                (
+                    "customer",
+                    models.ForeignKey(
+                        on_delete=django.db.models.deletion.CASCADE,
+                        related_name="daily_summaries",
+                        to="core.customer",
+                    ),
+                ),
+            ],
+            options={
+                "constraints": [
+                    models.UniqueConstraint(
+                        fields=("customer", "date"),
+                        name="unique_customer_daily_summary",
+                    )
+                ],
+            },
+        ),
+        migrations.CreateModel(
+            name="VendorDailySummary",
+            fields=[
+                (
+                    "id",
+                    models.BigAutoField(
+                        auto_created=True,
+                        primary_key=True,
+                        serialize=False,
+                        verbose_name="ID",
+                    ),
+                ),
+                ("date", models.DateField()),
+                (
+                    "bills_total",
+                    models.DecimalField(decimal_places=2, default=0, max_digits=12),
+                ),
+                ("updated_at", models.DateTimeField(auto_now=True)),
+                (
+                    "vendor",
+                    models.ForeignKey(
+                        on_delete=django.db.models.deletion.CASCADE,
+                        related_name="daily_summaries",
+                        to="core.vendor",
+                    ),
+                ),
+            ],
+            options={
+                "constraints": [
+                    models.UniqueConstraint(
+                        fields=("vendor", "date"), name="unique_vendor_daily_summary"
+                    )
+                ],
+            },
+        ),
+        migrations.RunPython(populate_party_rollups, migrations.RunPython.noop),
+    ]
@@ -0,0 +1,61 @@
+# Generated by Django 5.2.18 on 2026-10-18 12:22
+
+from decimal import Decimal
+
+import django.db.models.expressions
+from django.db import migrations, models
+from django.db.models import OuterRef, Subquery, Sum, Value
+from django.db.models.functions import Coalesce
+
+
+def populate_amount_paid(apps, schema_editor):
+    Invoice = apps.get_model("core", "Invoice")
+    Payment = apps.get_model("core", "Payment")
+    paid = (
+        Payment.objects.filter(invoice=OuterRef("pk"))
+        .values("invoice")
+        .annotate(total=Sum("amount"))
+        .values("total")
+    )
+    Invoice.objects.update(
+        amount_paid=Coalesce(
+            Subquery(paid),
+            Value(Decimal(0)),
+            output_field=models.DecimalField(max_digits=12, decimal_places=2),
+        )
+    )
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ("core", "0020_customerdailysummary_vendordailysummary"),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name="invoice",
+            name="amount_paid",
+            field=models.DecimalField(decimal_places=2, default=0, max_digits=12),
+        ),
+        migrations.AddField(
+            model_name="invoice",
+            name="balance_due",
+            field=models.GeneratedField(
+                db_persist=True,
+                expression=django.db.models.expressions.CombinedExpression(
+                    models.F("total_amount"), "-", models.F("amount_paid")
+                ),
+                output_field=models.DecimalField(decimal_places=2, max_digits=12),
+            ),
+        ),
+        migrations.RunPython(populate_amount_paid, migrations.RunPython.noop),
+        migrations.AddIndex(
+            model_name="invoice",
+            index=models.Index(
+                condition=models.Q(("balance_due__gt", 0)),
+                fields=["invoice_date", "balance_due"],
+                name="invoice_unpaid_idx",
+            ),
+        ),
+    ]
@@ -0,0 +1,59 @@
+# Generated by Django 5.2.18 on 2026-10-18 12:31
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ("core", "0021_invoice_amount_paid_balance_due"),
+    ]
+
+    operations = [
+        migrations.AddIndex(
+            model_name="bill",
+            index=models.Index(fields=["created_at", "id"], name="bill_created_idx"),
+        ),
+        migrations.AddIndex(
+            model_name="customer",
+            index=models.Index(
+                fields=["created_at", "id"], name="customer_created_idx"
+            ),
+        ),
+        migrations.AddIndex(
+            model_name="deliverychallan",
+            index=models.Index(fields=["created_at", "id"], name="challan_created_idx"),
+        ),
+        migrations.AddIndex(
+            model_name="inventoryadjustment",
+            index=models.Index(
+                fields=["created_at", "id"], name="adjustment_created_idx"
+            ),
+        ),
+        migrations.AddIndex(
+            model_name="invoice",
+            index=models.Index(fields=["created_at", "id"], name="invoice_created_idx"),
+        ),
+        migrations.AddIndex(
+            model_name="item",
+            index=models.Index(fields=["created_at", "id"], name="item_created_idx"),
+        ),
+        migrations.AddIndex(
+            model_name="payment",
+            index=models.Index(fields=["created_at", "id"], name="payment_created_idx"),
+        ),
+        migrations.AddIndex(
+            model_name="proformainvoice",
+            index=models.Index(
+                fields=["created_at", "id"], name="proforma_created_idx"
+            ),
+        ),
+        migrations.AddIndex(
+            model_name="quote",
+            index=models.Index(fields=["created_at", "id"], name="quote_created_idx"),
+        ),
+        migrations.AddIndex(
+            model_name="vendor",
+            index=models.Index(fields=["created_at", "id"], name="vendor_created_idx"),
+        ),
+    ]
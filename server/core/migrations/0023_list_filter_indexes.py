@@ -0,0 +1,73 @@
+# Generated by Django 5.2.18 on 2026-10-18 12:36
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ("core", "0022_created_at_indexes"),
+    ]
+
+    operations = [
+        migrations.AddIndex(
+            model_name="bill",
+            index=models.Index(
+                fields=["vendor", "bill_date"], name="bill_vendor_date_idx"
+            ),
+        ),
+        migrations.AddIndex(
+            model_name="bill",
+            index=models.Index(
+                fields=["status", "due_date"], name="bill_status_due_idx"
+            ),
+        ),
+        migrations.AddIndex(
+            model_name="deliverychallan",
+            index=models.Index(
+                fields=["customer", "date"], name="challan_customer_date_idx"
+            ),
+        ),
+        migrations.AddIndex(
+            model_name="inventoryadjustment",
+            index=models.Index(
+                fields=["item", "date"], name="adjustment_item_date_idx"
+            ),
+        ),
+        migrations.AddIndex(
+            model_name="invoice",
+            index=models.Index(
+                fields=["customer", "invoice_date"], name="invoice_customer_date_idx"
+            ),
+        ),
+        migrations.AddIndex(
+            model_name="payment",
+            index=models.Index(
+                fields=["invoice", "date"], name="payment_invoice_date_idx"
+            ),
+        ),
+        migrations.AddIndex(
+            model_name="proformainvoice",
+            index=models.Index(
+                fields=["customer", "invoice_date"], name="proforma_customer_date_idx"
+            ),
+        ),
+        migrations.AddIndex(
+            model_name="proformainvoice",
+            index=models.Index(
+                fields=["status", "expiry_date"], name="proforma_status_expiry_idx"
+            ),
+        ),
+        migrations.AddIndex(
+            model_name="quote",
+            index=models.Index(
+                fields=["customer", "quote_date"], name="quote_customer_date_idx"
+            ),
+        ),
+        migrations.AddIndex(
+            model_name="quote",
+            index=models.Index(
+                fields=["status", "expiry_date"], name="quote_status_expiry_idx"
+            ),
+        ),
+    ]
@@ -0,0 +1,94 @@
+# Generated by Django 5.2.18 on 2026-10-18 12:38
+
+from django.db import OperationalError, migrations, models
+
+FTS_STATEMENTS = [
+    "CREATE VIRTUAL TABLE core_searchentry_fts USING fts5("
+    "text, content='core_searchentry', content_rowid='id', tokenize='trigram')",
+    "CREATE TRIGGER core_searchentry_fts_insert AFTER INSERT ON core_searchentry BEGIN "
+    "INSERT INTO core_searchentry_fts(rowid, text) VALUES (new.id, new.text); END",
+    "CREATE TRIGGER core_searchentry_fts_delete AFTER DELETE ON core_searchentry BEGIN "
+    "INSERT INTO core_searchentry_fts(core_searchentry_fts, rowid, text) "
+    "VALUES ('delete', old.id, old.text); END",
+    "CREATE TRIGGER core_searchentry_fts_update AFTER UPDATE ON core_searchentry BEGIN "
+    "INSERT INTO core_searchentry_fts(core_searchentry_fts, rowid, text) "
+    "VALUES ('delete', old.id, old.text); "
+    "INSERT INTO core_searchentry_fts(rowid, text) VALUES (new.id, new.text); END",
+]
+
+
+def create_text_index(apps, schema_editor):
+    """
+    Index SearchEntry.text for substring and fuzzy matching: a pg_trgm GIN
+    index on PostgreSQL, or an FTS5 trigram table kept in sync by triggers
+    on SQLite. Without either, core.search falls back to LIKE.
+    """
+    vendor = schema_editor.connection.vendor
+    if vendor == "postgresql":
+        schema_editor.execute("CREATE EXTENSION IF NOT EXISTS pg_trgm")
+        schema_editor.execute(
+            "CREATE INDEX search_entry_text_trgm ON core_searchentry "
+            "USING gin (text gin_trgm_ops)"
+        )
+    elif vendor == "sqlite":
+        try:
+            schema_editor.execute(FTS_STATEMENTS[0])
+        except OperationalError:
+            # SQLite without FTS5 or its trigram tokenizer (3.34+)
+            return
+        for statement in FTS_STATEMENTS[1:]:
+            schema_editor.execute(statement)
+
+
+def drop_text_index(apps, schema_editor):
+    vendor = schema_editor.connection.vendor
+    if vendor == "postgresql":
+        schema_editor.execute("DROP INDEX IF EXISTS search_entry_text_trgm")
+    elif vendor == "sqlite":
+        for name in ("insert", "delete", "update"):
+            schema_editor.execute(f"DROP TRIGGER IF EXISTS core_searchentry_fts_{name}")
+        schema_editor.execute("DROP TABLE IF EXISTS core_searchentry_fts")
+
+
+def populate_search_entries(apps, schema_editor):
+    from core.search import rebuild_search_index
+
+    rebuild_search_index(apps)
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ("core", "0023_list_filter_indexes"),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name="SearchEntry",
+            fields=[
+                (
+                    "id",
+                    models.BigAutoField(
+                        auto_created=True,
+                        primary_key=True,
+                        serialize=False,
+                        verbose_name="ID",
+                    ),
+                ),
+                ("kind", models.CharField(max_length=20)),
+                ("object_id", models.BigIntegerField()),
+                ("title", models.CharField(max_length=255)),
+                ("subtitle", models.CharField(blank=True, max_length=255)),
+                ("text", models.TextField()),
+            ],
+            options={
+                "constraints": [
+                    models.UniqueConstraint(
+                        fields=("kind", "object_id"), name="unique_search_entry"
+                    )
+                ],
+            },
+        ),
+        migrations.RunPython(create_text_index, drop_text_index),
+        migrations.RunPython(populate_search_entries, migrations.RunPython.noop),
+    ]
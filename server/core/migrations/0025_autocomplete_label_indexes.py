@@ -0,0 +1,38 @@
+# Generated by Django 5.2.18 on 2026-10-18 12:41
+
+import django.db.models.functions.text
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ("core", "0024_searchentry"),
+    ]
+
+    operations = [
+        migrations.AddIndex(
+            model_name="customer",
+            index=models.Index(
+                django.db.models.functions.text.Lower("display_name"),
+                models.F("id"),
+                name="customer_label_idx",
+            ),
+        ),
+        migrations.AddIndex(
+            model_name="item",
+            index=models.Index(
+                django.db.models.functions.text.Lower("name"),
+                models.F("id"),
+                name="item_label_idx",
+            ),
+        ),
+        migrations.AddIndex(
+            model_name="vendor",
+            index=models.Index(
+                django.db.models.functions.text.Lower("name"),
+                models.F("id"),
+                name="vendor_label_idx",
+            ),
+        ),
+    ]
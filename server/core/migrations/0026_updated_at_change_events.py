@@ -0,0 +1,119 @@
+# Generated by Django 5.2.18 on 2026-10-18 12:43
+
+from django.db import migrations, models
+
+SYNCED_MODELS = (
+    "Customer",
+    "Vendor",
+    "Item",
+    "Invoice",
+    "Bill",
+    "Payment",
+    "Quote",
+    "ProformaInvoice",
+    "DeliveryChallan",
+    "InventoryAdjustment",
+)
+
+
+def populate_change_events(apps, schema_editor):
+    """Give every existing record an event, so a first sync sees it."""
+    ChangeEvent = apps.get_model("core", "ChangeEvent")
+    for name in SYNCED_MODELS:
+        model = apps.get_model("core", name)
+        pks = model.objects.order_by("created_at", "id").values_list("id", flat=True)
+        ChangeEvent.objects.bulk_create(
+            (ChangeEvent(resource=name.lower(), object_id=pk) for pk in pks.iterator()),
+            batch_size=500,
+        )
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ("core", "0025_autocomplete_label_indexes"),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name="bill",
+            name="updated_at",
+            field=models.DateTimeField(auto_now=True),
+        ),
+        migrations.AddField(
+            model_name="customer",
+            name="updated_at",
+            field=models.DateTimeField(auto_now=True),
+        ),
+        migrations.AddField(
+            model_name="deliverychallan",
+            name="updated_at",
+            field=models.DateTimeField(auto_now=True),
+        ),
+        migrations.AddField(
+            model_name="inventoryadjustment",
+            name="updated_at",
+            field=models.DateTimeField(auto_now=True),
+        ),
+        migrations.AddField(
+            model_name="invoice",
+            name="updated_at",
+            field=models.DateTimeField(auto_now=True),
+        ),
+        migrations.AddField(
+            model_name="item",
+            name="updated_at",
+            field=models.DateTimeField(auto_now=True),
+        ),
+        migrations.AddField(
+            model_name="payment",
+            name="updated_at",
+            field=models.DateTimeField(auto_now=True),
+        ),
+        migrations.AddField(
+            model_name="proformainvoice",
+            name="updated_at",
+            field=models.DateTimeField(auto_now=True),
+        ),
+        migrations.AddField(
+            model_name="quote",
+            name="updated_at",
+            field=models.DateTimeField(auto_now=True),
+        ),
+        migrations.AddField(
+            model_name="vendor",
+            name="updated_at",
+            field=models.DateTimeField(auto_now=True),
+        ),
+        migrations.CreateModel(
+            name="ChangeEvent",
+            fields=[
+                (
+                    "id",
+                    models.BigAutoField(
+                        auto_created=True,
+                        primary_key=True,
+                        serialize=False,
+                        verbose_name="ID",
+                    ),
+                ),
+                ("resource", models.CharField(max_length=50)),
+                ("object_id", models.BigIntegerField()),
+                ("deleted", models.BooleanField(default=False)),
+                ("created_at", models.DateTimeField(auto_now_add=True)),
+            ],
+            options={
+                "indexes": [
+                    models.Index(
+                        fields=["resource", "id"], name="change_event_feed_idx"
+                    )
+                ],
+                "constraints": [
+                    models.UniqueConstraint(
+                        fields=("resource", "object_id"), name="unique_change_event"
+                    )
+                ],
+            },
+        ),
+        migrations.RunPython(populate_change_events, migrations.RunPython.noop),
+    ]
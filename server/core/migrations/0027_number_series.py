@@ -0,0 +1,114 @@
+# Generated by Django 5.2.18 on 2026-10-18 13:06
+
+import django.core.validators
+import django.db.models.deletion
+from django.db import migrations, models
+
+# The prefixes the client has been using for hand-made numbers
+DEFAULT_PREFIXES = {
+    "invoice": "INV-",
+    "bill": "BILL-",
+    "quote": "Q-",
+    "proformainvoice": "PI-",
+    "deliverychallan": "DC-",
+    "inventoryadjustment": "ADJ-",
+}
+
+
+def create_series(apps, schema_editor):
+    NumberSeries = apps.get_model("core", "NumberSeries")
+    NumberSeries.objects.bulk_create(
+        [
+            NumberSeries(document=document, prefix=prefix)
+            for document, prefix in DEFAULT_PREFIXES.items()
+        ],
+        ignore_conflicts=True,
+    )
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ("core", "0026_updated_at_change_events"),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name="NumberSeries",
+            fields=[
+                (
+                    "id",
+                    models.BigAutoField(
+                        auto_created=True,
+                        primary_key=True,
+                        serialize=False,
+                        verbose_name="ID",
+                    ),
+                ),
+                (
+                    "document",
+                    models.CharField(
+                        choices=[
+                            ("invoice", "Invoice"),
+                            ("bill", "Bill"),
+                            ("quote", "Quote"),
+                            ("proformainvoice", "Proforma Invoice"),
+                            ("deliverychallan", "Delivery Challan"),
+                            ("inventoryadjustment", "Inventory Adjustment"),
+                        ],
+                        max_length=30,
+                        unique=True,
+                    ),
+                ),
+                ("prefix", models.CharField(blank=True, max_length=20)),
+                ("padding", models.PositiveSmallIntegerField(default=6)),
+                ("reset_yearly", models.BooleanField(default=False)),
+                (
+                    "fiscal_year_start_month",
+                    models.PositiveSmallIntegerField(
+                        default=4,
+                        validators=[
+                            django.core.validators.MinValueValidator(1),
+                            django.core.validators.MaxValueValidator(12),
+                        ],
+                    ),
+                ),
+                ("block_size", models.PositiveIntegerField(default=1)),
+            ],
+            options={
+                "verbose_name_plural": "number series",
+            },
+        ),
+        migrations.CreateModel(
+            name="NumberCounter",
+            fields=[
+                (
+                    "id",
+                    models.BigAutoField(
+                        auto_created=True,
+                        primary_key=True,
+                        serialize=False,
+                        verbose_name="ID",
+                    ),
+                ),
+                ("fiscal_year", models.PositiveIntegerField(default=0)),
+                ("next_value", models.PositiveBigIntegerField(default=1)),
+                (
+                    "series",
+                    models.ForeignKey(
+                        on_delete=django.db.models.deletion.CASCADE,
+                        related_name="counters",
+                        to="core.numberseries",
+                    ),
+                ),
+            ],
+            options={
+                "constraints": [
+                    models.UniqueConstraint(
+                        fields=("series", "fiscal_year"), name="unique_number_counter"
+                    )
+                ],
+            },
+        ),
+        migrations.RunPython(create_series, migrations.RunPython.noop),
+    ]
@@ -0,0 +1,111 @@
+# Generated by Django 5.2.18 on 2026-10-18 13:11
+
+import django.db.models.deletion
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ("core", "0027_number_series"),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name="deliverychallan",
+            name="invoice",
+            field=models.ForeignKey(
+                blank=True,
+                null=True,
+                on_delete=django.db.models.deletion.SET_NULL,
+                related_name="delivery_challans",
+                to="core.invoice",
+            ),
+        ),
+        migrations.AddField(
+            model_name="deliverychallan",
+            name="proforma_invoice",
+            field=models.ForeignKey(
+                blank=True,
+                null=True,
+                on_delete=django.db.models.deletion.SET_NULL,
+                related_name="delivery_challans",
+                to="core.proformainvoice",
+            ),
+        ),
+        migrations.AddField(
+            model_name="deliverychallan",
+            name="quote",
+            field=models.ForeignKey(
+                blank=True,
+                null=True,
+                on_delete=django.db.models.deletion.SET_NULL,
+                related_name="delivery_challans",
+                to="core.quote",
+            ),
+        ),
+        migrations.AddField(
+            model_name="invoice",
+            name="proforma_invoice",
+            field=models.ForeignKey(
+                blank=True,
+                null=True,
+                on_delete=django.db.models.deletion.SET_NULL,
+                related_name="invoices",
+                to="core.proformainvoice",
+            ),
+        ),
+        migrations.AddField(
+            model_name="invoice",
+            name="quote",
+            field=models.ForeignKey(
+                blank=True,
+                null=True,
+                on_delete=django.db.models.deletion.SET_NULL,
+                related_name="invoices",
+                to="core.quote",
+            ),
+        ),
+        migrations.AddField(
+            model_name="proformainvoice",
+            name="quote",
+            field=models.ForeignKey(
+                blank=True,
+                null=True,
+                on_delete=django.db.models.deletion.SET_NULL,
+                related_name="proforma_invoices",
+                to="core.quote",
+            ),
+        ),
+        migrations.AlterField(
+            model_name="proformainvoice",
+            name="status",
+            field=models.CharField(
+                choices=[
+                    ("draft", "Draft"),
+                    ("sent", "Sent"),
+                    ("accepted", "Accepted"),
+                    ("cancelled", "Cancelled"),
+                    ("invoiced", "Invoiced"),
+                ],
+                default="draft",
+                max_length=20,
+            ),
+        ),
+        migrations.AlterField(
+            model_name="quote",
+            name="status",
+            field=models.CharField(
+                choices=[
+                    ("draft", "Draft"),
+                    ("sent", "Sent"),
+                    ("accepted", "Accepted"),
+                    ("rejected", "Rejected"),
+                    ("expired", "Expired"),
+                    ("invoiced", "Invoiced"),
+                ],
+                default="draft",
+                max_length=20,
+            ),
+        ),
+    ]
@@ -0,0 +1,58 @@
+# Generated by Django 5.2.18 on 2026-10-18 13:23
+
+from django.db import migrations, models
+from django.db.models import F
+
+
+def fill_subtotals(apps, schema_editor):
+    # Invoices so far had no discount, tax or adjustment
+    Invoice = apps.get_model("core", "Invoice")
+    Invoice.objects.update(subtotal=F("total_amount"))
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ("core", "0028_document_conversions"),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name="invoice",
+            name="adjustment",
+            field=models.DecimalField(decimal_places=2, default=0, max_digits=12),
+        ),
+        migrations.AddField(
+            model_name="invoice",
+            name="discount",
+            field=models.DecimalField(decimal_places=2, default=0, max_digits=5),
+        ),
+        migrations.AddField(
+            model_name="invoice",
+            name="subtotal",
+            field=models.DecimalField(decimal_places=2, default=0, max_digits=12),
+        ),
+        migrations.AddField(
+            model_name="invoice",
+            name="tax_percentage",
+            field=models.CharField(
+                choices=[
+                    ("0", "0%"),
+                    ("5", "5%"),
+                    ("12", "12%"),
+                    ("18", "18%"),
+                    ("28", "28%"),
+                ],
+                default="0",
+                max_length=3,
+            ),
+        ),
+        migrations.AddField(
+            model_name="invoice",
+            name="tax_type",
+            field=models.CharField(
+                choices=[("TDS", "TDS"), ("TCS", "TCS")], default="TDS", max_length=3
+            ),
+        ),
+        migrations.RunPython(fill_subtotals, migrations.RunPython.noop),
+    ]
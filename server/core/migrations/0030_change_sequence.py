@@ -0,0 +1,50 @@
+# Generated by Django 5.2.18 on 2026-10-18 13:25
+
+from django.db import migrations, models
+from django.db.models import F, Max
+
+
+def sequence_existing_events(apps, schema_editor):
+    # Their ids were the cursors so far, so clients' cursors stay valid
+    ChangeEvent = apps.get_model("core", "ChangeEvent")
+    ChangeSequence = apps.get_model("core", "ChangeSequence")
+    ChangeEvent.objects.update(sequence=F("id"))
+    last = ChangeEvent.objects.aggregate(last=Max("id"))["last"] or 0
+    ChangeSequence.objects.create(pk=1, last=last)
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ("core", "0029_invoice_pricing"),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name="ChangeSequence",
+            fields=[
+                (
+                    "id",
+                    models.BigAutoField(
+                        auto_created=True,
+                        primary_key=True,
+                        serialize=False,
+                        verbose_name="ID",
+                    ),
+                ),
+                ("last", models.BigIntegerField(default=0)),
+            ],
+        ),
+        migrations.AddField(
+            model_name="changeevent",
+            name="sequence",
+            field=models.BigIntegerField(blank=True, null=True, unique=True),
+        ),
+        migrations.AddIndex(
+            model_name="changeevent",
+            index=models.Index(
+                fields=["resource", "sequence"], name="change_event_sequence_idx"
+            ),
+        ),
+        migrations.RunPython(sequence_existing_events, migrations.RunPython.noop),
+    ]
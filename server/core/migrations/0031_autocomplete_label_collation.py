@@ -0,0 +1,52 @@
+# Generated by Django 5.2.18 on 2026-10-18 13:57
+
+from django.db import migrations
+
+# index name -> (table, label column)
+LABEL_INDEXES = {
+    "customer_label_idx": ("core_customer", "display_name"),
+    "item_label_idx": ("core_item", "name"),
+    "vendor_label_idx": ("core_vendor", "name"),
+}
+
+
+def create_label_indexes(apps, schema_editor):
+    """
+    Index the lowercased labels for autocomplete prefix scans. On PostgreSQL
+    the key is compared in the "C" collation (see core.autocomplete), so a
+    range on it is a prefix match, whatever the database's default collation.
+    SQLite's default collation already compares bytes.
+    """
+    collate = ' COLLATE "C"' if schema_editor.connection.vendor == "postgresql" else ""
+    for name, (table, column) in LABEL_INDEXES.items():
+        schema_editor.execute(
+            f"CREATE INDEX {name} ON {table} ((LOWER({column}){collate}), id)"
+        )
+
+
+def drop_label_indexes(apps, schema_editor):
+    for name in LABEL_INDEXES:
+        schema_editor.execute(f"DROP INDEX IF EXISTS {name}")
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ("core", "0030_change_sequence"),
+    ]
+
+    operations = [
+        migrations.RemoveIndex(
+            model_name="customer",
+            name="customer_label_idx",
+        ),
+        migrations.RemoveIndex(
+            model_name="item",
+            name="item_label_idx",
+        ),
+        migrations.RemoveIndex(
+            model_name="vendor",
+            name="vendor_label_idx",
+        ),
+        migrations.RunPython(create_label_indexes, drop_label_indexes),
+    ]
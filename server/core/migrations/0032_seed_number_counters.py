@@ -0,0 +1,56 @@
+# Generated by Django 5.2.18 on 2026-10-18 14:10
+
+from django.db import migrations
+
+# NumberSeries.document -> (model, number field)
+NUMBERED_DOCUMENTS = {
+    "invoice": ("Invoice", "invoice_number"),
+    "bill": ("Bill", "bill_number"),
+    "quote": ("Quote", "quote_number"),
+    "proformainvoice": ("ProformaInvoice", "invoice_number"),
+    "deliverychallan": ("DeliveryChallan", "challan_number"),
+    "inventoryadjustment": ("InventoryAdjustment", "adjustment_number"),
+}
+
+
+def seed_counters(apps, schema_editor):
+    """
+    Start each series' counter after the highest number already in use with
+    its prefix, so the first allocation on an existing database doesn't
+    skip past every hand-made number one at a time. Series that reset
+    yearly start afresh each year and are left alone.
+    """
+    NumberSeries = apps.get_model("core", "NumberSeries")
+    NumberCounter = apps.get_model("core", "NumberCounter")
+    for series in NumberSeries.objects.filter(reset_yearly=False):
+        model_name, field = NUMBERED_DOCUMENTS[series.document]
+        numbers = (
+            apps.get_model("core", model_name)
+            .objects.filter(**{f"{field}__startswith": series.prefix})
+            .values_list(field, flat=True)
+        )
+        highest = max(
+            (
+                int(number[len(series.prefix):])
+                for number in numbers.iterator()
+                if number[len(series.prefix):].isdecimal()
+            ),
+            default=0,
+        )
+        if not highest:
+            continue
+        counter, _ = NumberCounter.objects.get_or_create(series=series, fiscal_year=0)
+        if counter.next_value <= highest:
+            counter.next_value = highest + 1
+            counter.save(update_fields=["next_value"])
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ("core", "0031_autocomplete_label_collation"),
+    ]
+
+    operations = [
+        migrations.RunPython(seed_counters, migrations.RunPython.noop),
+    ]
@@ -1,7 +1,7 @@
 
 from django.db import models
 from django.core.exceptions import ValidationError
-from django.core.validators import FileExtensionValidator
+from django.core.validators import FileExtensionValidator, MaxValueValidator, MinValueValidator
 
 
 # DailySummary model for pre-aggregated daily totals
@@ -17,6 +17,211 @@ class DailySummary(models.Model):
         return f"Summary for {self.date}"
 
 
+class MonthlySummary(models.Model):
+    """Monthly totals rolled up from DailySummary; ``month`` is the 1st."""
+
+    month = models.DateField(unique=True)
+    invoices_total = models.DecimalField(max_digits=14, decimal_places=2, default=0)
+    bills_total = models.DecimalField(max_digits=14, decimal_places=2, default=0)
+    payments_total = models.DecimalField(max_digits=14, decimal_places=2, default=0)
+    updated_at = models.DateTimeField(auto_now=True)
+
+    def __str__(self):
+        return f"Summary for {self.month:%Y-%m}"
+
+
+class YearlySummary(models.Model):
+    """Yearly totals rolled up from MonthlySummary."""
+
+    year = models.PositiveIntegerField(unique=True)
+    invoices_total = models.DecimalField(max_digits=16, decimal_places=2, default=0)
+    bills_total = models.DecimalField(max_digits=16, decimal_places=2, default=0)
+    payments_total = models.DecimalField(max_digits=16, decimal_places=2, default=0)
+    updated_at = models.DateTimeField(auto_now=True)
+
+    def __str__(self):
+        return f"Summary for {self.year}"
+
+
+class RollupCheckpoint(models.Model):
+    """Records how far a rollup backfill has been run."""
+
+    name = models.CharField(max_length=50, unique=True)
+    covered_through = models.DateField(null=True, blank=True)
+    last_run_at = models.DateTimeField(null=True, blank=True)
+
+    def __str__(self):
+        return f"{self.name} through {self.covered_through}"
+
+
+class CustomerDailySummary(models.Model):
+    """Per-customer daily invoice and payment totals."""
+
+    customer = models.ForeignKey(
+        "Customer", related_name="daily_summaries", on_delete=models.CASCADE
+    )
+    date = models.DateField()
+    invoices_total = models.DecimalField(max_digits=12, decimal_places=2, default=0)
+    payments_total = models.DecimalField(max_digits=12, decimal_places=2, default=0)
+    updated_at = models.DateTimeField(auto_now=True)
+
+    class Meta:
+        constraints = [
+            models.UniqueConstraint(
+                fields=["customer", "date"], name="unique_customer_daily_summary"
+            )
+        ]
+
+    def __str__(self):
+        return f"Summary for customer {self.customer_id} on {self.date}"
+
+
+class VendorDailySummary(models.Model):
+    """Per-vendor daily bill totals."""
+
+    vendor = models.ForeignKey(
+        "Vendor", related_name="daily_summaries", on_delete=models.CASCADE
+    )
+    date = models.DateField()
+    bills_total = models.DecimalField(max_digits=12, decimal_places=2, default=0)
+    updated_at = models.DateTimeField(auto_now=True)
+
+    class Meta:
+        constraints = [
+            models.UniqueConstraint(
+                fields=["vendor", "date"], name="unique_vendor_daily_summary"
+            )
+        ]
+
+    def __str__(self):
+        return f"Summary for vendor {self.vendor_id} on {self.date}"
+
+
+class ChangeEvent(models.Model):
+    """
+    The latest change to a record of a synced resource, placed in the feed
+    by ``sequence`` once it has committed (see ``core.changes``).
+
+    Each write replaces the record's previous event, so the table holds one
+    row per record and the rows after a client's cursor are exactly the
+    records it has not seen yet. Deletions stay behind as tombstones.
+    """
+
+    resource = models.CharField(max_length=50)
+    object_id = models.BigIntegerField()
+    deleted = models.BooleanField(default=False)
+    # Null until the event is sequenced, after its transaction committed
+    sequence = models.BigIntegerField(null=True, blank=True, unique=True)
+    created_at = models.DateTimeField(auto_now_add=True)
+
+    class Meta:
+        constraints = [
+            models.UniqueConstraint(
+                fields=["resource", "object_id"], name="unique_change_event"
+            )
+        ]
+        indexes = [
+            models.Index(fields=["resource", "id"], name="change_event_feed_idx"),
+            models.Index(fields=["resource", "sequence"], name="change_event_sequence_idx"),
+        ]
+
+    def __str__(self):
+        action = "deleted" if self.deleted else "changed"
+        return f"{self.resource} {self.object_id} {action} (#{self.id})"
+
+
+class ChangeSequence(models.Model):
+    """
+    The last feed position given to a ChangeEvent: a single row, locked
+    while the next positions are handed out.
+    """
+
+    last = models.BigIntegerField(default=0)
+
+    def __str__(self):
+        return f"Change sequence at {self.last}"
+
+
+class NumberSeries(models.Model):
+    """
+    How one kind of document is numbered (see ``core.numbering``): the
+    prefix, then with ``reset_yearly`` the fiscal year, then the count
+    zero-padded to ``padding`` digits, e.g. INV-000042 or INV-2025-26/000001.
+    """
+
+    DOCUMENT_CHOICES = [
+        ("invoice", "Invoice"),
+        ("bill", "Bill"),
+        ("quote", "Quote"),
+        ("proformainvoice", "Proforma Invoice"),
+        ("deliverychallan", "Delivery Challan"),
+        ("inventoryadjustment", "Inventory Adjustment"),
+    ]
+    document = models.CharField(max_length=30, choices=DOCUMENT_CHOICES, unique=True)
+    prefix = models.CharField(max_length=20, blank=True)
+    padding = models.PositiveSmallIntegerField(default=6)
+    reset_yearly = models.BooleanField(default=False)
+    fiscal_year_start_month = models.PositiveSmallIntegerField(
+        default=4, validators=[MinValueValidator(1), MaxValueValidator(12)]
+    )
+    # Numbers each process reserves at a time; above 1, numbers are only
+    # increasing within a process and unused ones are skipped on restart
+    block_size = models.PositiveIntegerField(default=1)
+
+    class Meta:
+        verbose_name_plural = "number series"
+
+    def __str__(self):
+        return f"{self.get_document_display()} ({self.prefix})"
+
+
+class NumberCounter(models.Model):
+    """
+    The next number of a series, one row per fiscal year when the series
+    resets yearly and a single row (year 0) otherwise.
+    """
+
+    series = models.ForeignKey(
+        NumberSeries, related_name="counters", on_delete=models.CASCADE
+    )
+    fiscal_year = models.PositiveIntegerField(default=0)
+    next_value = models.PositiveBigIntegerField(default=1)
+
+    class Meta:
+        constraints = [
+            models.UniqueConstraint(
+                fields=["series", "fiscal_year"], name="unique_number_counter"
+            )
+        ]
+
+    def __str__(self):
+        return f"{self.series} {self.fiscal_year}: {self.next_value}"
+
+
+class SearchEntry(models.Model):
+    """
+    One searchable row per customer, vendor, item or document, kept current
+    by the signal handlers in ``core.signals`` (see ``core.search``).
+    """
+
+    kind = models.CharField(max_length=20)
+    object_id = models.BigIntegerField()
+    title = models.CharField(max_length=255)
+    subtitle = models.CharField(max_length=255, blank=True)
+    # Lowercased searchable values, indexed with pg_trgm or SQLite FTS5
+    text = models.TextField()
+
+    class Meta:
+        constraints = [
+            models.UniqueConstraint(
+                fields=["kind", "object_id"], name="unique_search_entry"
+            )
+        ]
+
+    def __str__(self):
+        return f"{self.kind} {self.object_id}: {self.title}"
+
+
 class BillItem(models.Model):
     """
     Represents an item entry in a Bill, including quantity, rate, and tax.
@@ -108,6 +313,17 @@ class Bill(models.Model):
     created_at = models.DateTimeField(
         auto_now_add=True,
     )
+    updated_at = models.DateTimeField(
+        auto_now=True,
+    )
+
+    class Meta:
+        indexes = [
+            models.Index(fields=["created_at", "id"], name="bill_created_idx"),
+            # List filters (see core.views.ListFilterMixin)
+            models.Index(fields=["vendor", "bill_date"], name="bill_vendor_date_idx"),
+            models.Index(fields=["status", "due_date"], name="bill_status_due_idx"),
+        ]
 
     def __str__(self) -> str:
         """String representation of Bill."""
@@ -281,6 +497,16 @@ class Customer(models.Model):
     created_at = models.DateTimeField(
         auto_now_add=True,
     )
+    updated_at = models.DateTimeField(
+        auto_now=True,
+    )
+
+    class Meta:
+        indexes = [
+            models.Index(fields=["created_at", "id"], name="customer_created_idx"),
+            # customer_label_idx, for autocomplete prefix scans, depends on
+            # the database and is created by migration 0031
+        ]
 
     def __str__(self) -> str:
         """String representation of Customer."""
@@ -350,6 +576,12 @@ class Vendor(models.Model):
     address = models.TextField(blank=True)
     phone = models.CharField(max_length=50, blank=True)
     created_at = models.DateTimeField(auto_now_add=True)
+    updated_at = models.DateTimeField(auto_now=True)
+
+    class Meta:
+        indexes = [
+            models.Index(fields=["created_at", "id"], name="vendor_created_idx"),
+        ]
 
     def __str__(self) -> str:
         """String representation of Vendor."""
@@ -364,6 +596,12 @@ class Item(models.Model):
     price = models.DecimalField(max_digits=10, decimal_places=2)
     sku = models.CharField(max_length=100, unique=True)
     created_at = models.DateTimeField(auto_now_add=True)
+    updated_at = models.DateTimeField(auto_now=True)
+
+    class Meta:
+        indexes = [
+            models.Index(fields=["created_at", "id"], name="item_created_idx"),
+        ]
 
     def __str__(self) -> str:
         """String representation of Item."""
@@ -381,6 +619,13 @@ class Payment(models.Model):
     method = models.CharField(max_length=50, blank=True)
     notes = models.TextField(blank=True)
     created_at = models.DateTimeField(auto_now_add=True)
+    updated_at = models.DateTimeField(auto_now=True)
+
+    class Meta:
+        indexes = [
+            models.Index(fields=["created_at", "id"], name="payment_created_idx"),
+            models.Index(fields=["invoice", "date"], name="payment_invoice_date_idx"),
+        ]
 
     def __str__(self) -> str:
         """String representation of Payment."""
@@ -444,6 +689,7 @@ class Quote(models.Model):
             ("accepted", "Accepted"),
             ("rejected", "Rejected"),
             ("expired", "Expired"),
+            ("invoiced", "Invoiced"),
         ],
         default="draft",
     )
@@ -452,6 +698,14 @@ class Quote(models.Model):
         blank=True,
     )
     created_at = models.DateTimeField(auto_now_add=True)
+    updated_at = models.DateTimeField(auto_now=True)
+
+    class Meta:
+        indexes = [
+            models.Index(fields=["created_at", "id"], name="quote_created_idx"),
+            models.Index(fields=["customer", "quote_date"], name="quote_customer_date_idx"),
+            models.Index(fields=["status", "expiry_date"], name="quote_status_expiry_idx"),
+        ]
 
     def __str__(self):
         return f"Quote {self.quote_number} - {self.customer.display_name}"
@@ -536,10 +790,27 @@ class ProformaInvoice(models.Model):
             ("sent", "Sent"),
             ("accepted", "Accepted"),
             ("cancelled", "Cancelled"),
+            ("invoiced", "Invoiced"),
         ],
         default="draft",
     )
+    # Source document, set when converted (see core.conversions)
+    quote = models.ForeignKey(
+        Quote,
+        related_name="proforma_invoices",
+        on_delete=models.SET_NULL,
+        null=True,
+        blank=True,
+    )
     created_at = models.DateTimeField(auto_now_add=True)
+    updated_at = models.DateTimeField(auto_now=True)
+
+    class Meta:
+        indexes = [
+            models.Index(fields=["created_at", "id"], name="proforma_created_idx"),
+            models.Index(fields=["customer", "invoice_date"], name="proforma_customer_date_idx"),
+            models.Index(fields=["status", "expiry_date"], name="proforma_status_expiry_idx"),
+        ]
 
     def __str__(self):
         return f"Proforma {self.invoice_number} - {self.customer.display_name}"
@@ -598,7 +869,36 @@ class DeliveryChallan(models.Model):
     )
     total_amount = models.DecimalField(max_digits=12, decimal_places=2,
                                        default=0)
+    # Source documents, set when converted (see core.conversions)
+    quote = models.ForeignKey(
+        Quote,
+        related_name="delivery_challans",
+        on_delete=models.SET_NULL,
+        null=True,
+        blank=True,
+    )
+    proforma_invoice = models.ForeignKey(
+        ProformaInvoice,
+        related_name="delivery_challans",
+        on_delete=models.SET_NULL,
+        null=True,
+        blank=True,
+    )
+    invoice = models.ForeignKey(
+        "Invoice",
+        related_name="delivery_challans",
+        on_delete=models.SET_NULL,
+        null=True,
+        blank=True,
+    )
     created_at = models.DateTimeField(auto_now_add=True)
+    updated_at = models.DateTimeField(auto_now=True)
+
+    class Meta:
+        indexes = [
+            models.Index(fields=["created_at", "id"], name="challan_created_idx"),
+            models.Index(fields=["customer", "date"], name="challan_customer_date_idx"),
+        ]
 
     def __str__(self):
         return (
@@ -617,6 +917,13 @@ class InventoryAdjustment(models.Model):
     reason = models.CharField(max_length=255, blank=True)
     notes = models.TextField(blank=True)
     created_at = models.DateTimeField(auto_now_add=True)
+    updated_at = models.DateTimeField(auto_now=True)
+
+    class Meta:
+        indexes = [
+            models.Index(fields=["created_at", "id"], name="adjustment_created_idx"),
+            models.Index(fields=["item", "date"], name="adjustment_item_date_idx"),
+        ]
 
     def __str__(self):
         return (
@@ -655,6 +962,22 @@ class Invoice(models.Model):
     invoice_date = models.DateField(db_index=True)
     customer_notes = models.TextField(blank=True)
     terms_and_conditions = models.TextField(blank=True)
+    # Priced like quotes and proformas, so converting one keeps its total
+    subtotal = models.DecimalField(max_digits=12, decimal_places=2, default=0)
+    discount = models.DecimalField(max_digits=5, decimal_places=2, default=0)
+    tax_type = models.CharField(
+        max_length=3,
+        choices=Quote.TAX_TYPE_CHOICES,
+        default="TDS",
+    )
+    tax_percentage = models.CharField(
+        max_length=3, choices=Quote.TAX_PERCENTAGE_CHOICES, default="0"
+    )
+    adjustment = models.DecimalField(
+        max_digits=12,
+        decimal_places=2,
+        default=0,
+    )
     total_amount = models.DecimalField(max_digits=12, decimal_places=2,
                                        default=0)
     files = models.ManyToManyField(
@@ -667,7 +990,60 @@ class Invoice(models.Model):
         related_name="invoices_programmatic",
         blank=True,
     )
+    # Maintained by Payment writes with F() updates (see core.signals)
+    amount_paid = models.DecimalField(max_digits=12, decimal_places=2,
+                                      default=0)
+    balance_due = models.GeneratedField(
+        expression=models.F("total_amount") - models.F("amount_paid"),
+        output_field=models.DecimalField(max_digits=12, decimal_places=2),
+        db_persist=True,
+    )
+    # Source documents, set when converted (see core.conversions)
+    quote = models.ForeignKey(
+        Quote,
+        related_name="invoices",
+        on_delete=models.SET_NULL,
+        null=True,
+        blank=True,
+    )
+    proforma_invoice = models.ForeignKey(
+        ProformaInvoice,
+        related_name="invoices",
+        on_delete=models.SET_NULL,
+        null=True,
+        blank=True,
+    )
     created_at = models.DateTimeField(auto_now_add=True)
+    updated_at = models.DateTimeField(auto_now=True)
+
+    class Meta:
+        indexes = [
+            # Keyset pagination order (see core.pagination.ListPagination)
+            models.Index(fields=["created_at", "id"], name="invoice_created_idx"),
+            # List filters (see core.views.ListFilterMixin)
+            models.Index(fields=["customer", "invoice_date"], name="invoice_customer_date_idx"),
+            # Covers the AR aging query, which only reads unpaid invoices
+            models.Index(
+                fields=["invoice_date", "balance_due"],
+                condition=models.Q(balance_due__gt=0),
+                name="invoice_unpaid_idx",
+            ),
+        ]
+
+    def save(self, *args, **kwargs):
+        """
+        Save the invoice without writing back ``amount_paid``, which may
+        have been moved by a payment since this instance was loaded.
+        """
+        if not self._state.adding and kwargs.get("update_fields") is None:
+            kwargs["update_fields"] = [
+                field.name
+                for field in self._meta.concrete_fields
+                if not field.primary_key
+                and not field.generated
+                and field.name != "amount_paid"
+            ]
+        super().save(*args, **kwargs)
 
     def __str__(self):
         return (
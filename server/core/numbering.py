@@ -0,0 +1,134 @@
+"""
+Server-side document numbers.
+
+Each kind of document has a NumberSeries, and a NumberCounter holding the
+next number (one per fiscal year when the series resets yearly). Numbers
+are taken by incrementing the counter with one F() UPDATE, which locks its
+row until the transaction commits. Concurrent creators queue on that row
+instead of racing each other to the same number, and nothing ever scans
+the documents for the highest one.
+
+A series with ``block_size`` above 1 trades order for throughput: each
+process reserves that many numbers at once and hands them out from memory.
+Numbers stay unique, but only increase within a process, and a block left
+unused when a process exits leaves a gap.
+"""
+import threading
+from collections import defaultdict
+from datetime import date
+
+from django.db import transaction
+from django.db.models import F
+
+from .models import NumberCounter, NumberSeries
+
+# (series id, fiscal year) -> [next number, end of the reserved block]
+_blocks = {}
+_blocks_lock = threading.Lock()
+
+
+def series_for(model):
+    """Return the NumberSeries of a document model."""
+    series, _ = NumberSeries.objects.get_or_create(document=model._meta.model_name)
+    return series
+
+
+def fiscal_year(series, day):
+    """The fiscal year ``day`` falls in, or 0 for a series that never resets."""
+    if not series.reset_yearly:
+        return 0
+    return day.year if day.month >= series.fiscal_year_start_month else day.year - 1
+
+
+def format_number(series, year, value):
+    year_label = ""
+    if series.reset_yearly:
+        if series.fiscal_year_start_month == 1:
+            year_label = f"{year}/"
+        else:
+            year_label = f"{year}-{(year + 1) % 100:02d}/"
+    return f"{series.prefix}{year_label}{value:0{series.padding}d}"
+
+
+def _reserve(series, year, count):
+    """Take ``count`` numbers from the counter and return the first."""
+    counter = NumberCounter.objects.filter(series=series, fiscal_year=year)
+    with transaction.atomic():
+        if not counter.update(next_value=F("next_value") + count):
+            NumberCounter.objects.bulk_create(
+                [NumberCounter(series=series, fiscal_year=year)], ignore_conflicts=True
+            )
+            counter.update(next_value=F("next_value") + count)
+        return counter.values_list("next_value", flat=True).get() - count
+
+
+def _keep_block(key, block):
+    if block[0] < block[1]:
+        with _blocks_lock:
+            _blocks.setdefault(key, block)
+
+
+def _take(series, year, count):
+    if series.block_size <= 1:
+        start = _reserve(series, year, count)
+        return list(range(start, start + count))
+    key = (series.pk, year)
+    with _blocks_lock:
+        block = _blocks.pop(key, None)
+    values = []
+    if block is not None:
+        taken = min(count, block[1] - block[0])
+        values = list(range(block[0], block[0] + taken))
+        block[0] += taken
+        _keep_block(key, block)
+    if len(values) < count:
+        missing = count - len(values)
+        size = max(series.block_size, missing)
+        start = _reserve(series, year, size)
+        values += range(start, start + missing)
+        # Keep the rest of the block only once the reservation commits: if
+        # it rolls back, the counter does too and will hand them out again
+        rest = [start + missing, start + size]
+        transaction.on_commit(lambda: _keep_block(key, rest))
+    return values
+
+
+def allocate(model, day=None, count=1):
+    """
+    Return ``count`` new numbers for documents of ``model`` dated ``day``
+    (today if not given).
+    """
+    series = series_for(model)
+    year = fiscal_year(series, day or date.today())
+    return [format_number(series, year, value) for value in _take(series, year, count)]
+
+
+def number_documents(model, rows, number_field, date_field):
+    """
+    Number the rows (dicts of field values) that have no ``number_field``
+    from their model's series, by the fiscal year of their ``date_field``.
+    Numbers already used, by hand-numbered documents or by other rows, are
+    skipped.
+    """
+    if all(row.get(number_field) for row in rows):
+        return
+    series = series_for(model)
+    used = {row[number_field] for row in rows if row.get(number_field)}
+    unnumbered = defaultdict(list)
+    for row in rows:
+        if not row.get(number_field):
+            unnumbered[fiscal_year(series, row.get(date_field) or date.today())].append(row)
+    for year, group in unnumbered.items():
+        numbers = []
+        while len(numbers) < len(group):
+            batch = [
+                format_number(series, year, value)
+                for value in _take(series, year, len(group) - len(numbers))
+            ]
+            used |= set(
+                model.objects.filter(**{f"{number_field}__in": batch})
+                .values_list(number_field, flat=True)
+            )
+            numbers += [number for number in batch if number not in used]
+        for row, number in zip(group, numbers):
+            row[number_field] = number
@@ -0,0 +1,248 @@
+import base64
+import hashlib
+import json
+from collections import OrderedDict
+
+from django.conf import settings
+from django.core.cache import cache
+from django.db import connection
+from django.db.models import Q
+from rest_framework.exceptions import NotFound, ValidationError
+from rest_framework.pagination import BasePagination, PageNumberPagination
+from rest_framework.response import Response
+from rest_framework.utils.urls import remove_query_param, replace_query_param
+
+COUNT_MODES = ("exact", "estimated", "none")
+COUNT_CACHE_TIMEOUT = getattr(settings, "PAGINATION_COUNT_CACHE_TIMEOUT", 60)
+
+
+def estimated_count(queryset):
+    """
+    Return a cheap row count for ``queryset``.
+
+    On PostgreSQL this is the planner's row estimate, which comes from the
+    table statistics and needs no scan. Other databases get an exact count
+    that is cached for COUNT_CACHE_TIMEOUT seconds.
+    """
+    queryset = queryset.order_by()
+    if connection.vendor == "postgresql":
+        plan = json.loads(queryset.explain(format="json"))
+        return int(plan[0]["Plan"]["Plan Rows"])
+    sql, params = queryset.query.sql_with_params()
+    raw = json.dumps([sql, params], default=str)
+    key = "pagination:count:" + hashlib.md5(raw.encode()).hexdigest()
+    count = cache.get(key)
+    if count is None:
+        count = queryset.count()
+        cache.set(key, count, COUNT_CACHE_TIMEOUT)
+    return count
+
+
+class KeysetPagination(BasePagination):
+    """
+    Cursor pagination over an ordering of ``(field, "id")``.
+
+    The cursor carries the ordering values of the last row served, so every
+    page is a single index range scan: no COUNT(*) and no OFFSET, however
+    deep the client pages. Views may override the ordering with an
+    ``ordering`` attribute; a leading "-" on the field orders descending.
+    """
+
+    ordering = ("-created_at", "-id")
+    page_size = 10
+    page_size_query_param = "page_size"
+    max_page_size = 100
+    cursor_query_param = "cursor"
+    invalid_cursor_message = "Invalid cursor"
+
+    def get_ordering(self, view):
+        return tuple(getattr(view, "ordering", None) or self.ordering)
+
+    def get_page_size(self, request):
+        try:
+            size = int(request.query_params[self.page_size_query_param])
+        except (KeyError, ValueError):
+            return self.page_size
+        return max(1, min(size, self.max_page_size))
+
+    def encode_cursor(self, row):
+        values = [self._value(row, name.lstrip("-")) for name in self.ordering]
+        raw = json.dumps(values, default=str).encode()
+        return base64.urlsafe_b64encode(raw).decode()
+
+    def decode_cursor(self, request, queryset):
+        encoded = request.query_params.get(self.cursor_query_param)
+        if not encoded:
+            return None
+        try:
+            values = json.loads(base64.urlsafe_b64decode(encoded.encode()))
+            fields = [
+                queryset.model._meta.get_field(name.lstrip("-"))
+                for name in self.ordering
+            ]
+            if len(values) != len(fields):
+                raise ValueError
+            return [
+                field.to_python(value) for field, value in zip(fields, values)
+            ]
+        except Exception:
+            raise NotFound(self.invalid_cursor_message)
+
+    @staticmethod
+    def _value(row, name):
+        return row[name] if isinstance(row, dict) else getattr(row, name)
+
+    def _after(self, values):
+        """Return the filter selecting rows strictly after the cursor."""
+        condition = Q()
+        equal = {}
+        for name, value in zip(self.ordering, values):
+            field = name.lstrip("-")
+            lookup = "lt" if name.startswith("-") else "gt"
+            condition |= Q(**equal, **{f"{field}__{lookup}": value})
+            equal[field] = value
+        return condition
+
+    def paginate_queryset(self, queryset, request, view=None):
+        self.request = request
+        self.ordering = self.get_ordering(view)
+        self.page_size = self.get_page_size(request)
+        cursor = self.decode_cursor(request, queryset)
+        queryset = queryset.order_by(*self.ordering)
+        if cursor is not None:
+            queryset = queryset.filter(self._after(cursor))
+        rows = list(queryset[:self.page_size + 1])
+        self.has_next = len(rows) > self.page_size
+        self.page = rows[:self.page_size]
+        return self.page
+
+    def get_next_link(self):
+        if not self.has_next:
+            return None
+        url = self.request.build_absolute_uri()
+        return replace_query_param(
+            url, self.cursor_query_param, self.encode_cursor(self.page[-1])
+        )
+
+    def get_paginated_response(self, data):
+        return Response(OrderedDict([
+            ("next", self.get_next_link()),
+            ("results", data),
+        ]))
+
+    def get_paginated_response_schema(self, schema):
+        return {
+            "type": "object",
+            "required": ["results"],
+            "properties": {
+                "next": {"type": "string", "nullable": True, "format": "uri"},
+                "results": schema,
+            },
+        }
+
+
+def get_count_mode(request, default):
+    mode = request.query_params.get("count", default)
+    if mode not in COUNT_MODES:
+        raise ValidationError({"count": f"Must be one of: {', '.join(COUNT_MODES)}."})
+    return mode
+
+
+class PageNumberListPagination(PageNumberPagination):
+    """
+    Page-number mode of ListPagination, with a bounded ``page_size`` and a
+    ``count`` of "exact" (the default), "estimated" or "none". The last two
+    skip the COUNT(*) and fetch one extra row to tell if there is a next page.
+    """
+
+    page_size_query_param = "page_size"
+    max_page_size = 100
+
+    def paginate_queryset(self, queryset, request, view=None):
+        self.count_mode = get_count_mode(request, "exact")
+        if self.count_mode == "exact":
+            return super().paginate_queryset(queryset, request, view)
+        self.request = request
+        page_size = self.get_page_size(request)
+        try:
+            self.number = int(request.query_params.get(self.page_query_param, 1))
+        except ValueError:
+            self.number = 0
+        if self.number < 1:
+            raise NotFound(self.invalid_page_message.format(
+                page_number=self.number, message="That page number is less than 1"
+            ))
+        offset = (self.number - 1) * page_size
+        rows = list(queryset[offset:offset + page_size + 1])
+        if not rows and self.number > 1:
+            raise NotFound(self.invalid_page_message.format(
+                page_number=self.number, message="That page contains no results"
+            ))
+        self.has_next = len(rows) > page_size
+        self.count = estimated_count(queryset) if self.count_mode == "estimated" else None
+        return rows[:page_size]
+
+    def get_next_link(self):
+        if self.count_mode == "exact":
+            return super().get_next_link()
+        if not self.has_next:
+            return None
+        url = self.request.build_absolute_uri()
+        return replace_query_param(url, self.page_query_param, self.number + 1)
+
+    def get_previous_link(self):
+        if self.count_mode == "exact":
+            return super().get_previous_link()
+        if self.number == 1:
+            return None
+        url = self.request.build_absolute_uri()
+        if self.number == 2:
+            return remove_query_param(url, self.page_query_param)
+        return replace_query_param(url, self.page_query_param, self.number - 1)
+
+    def get_paginated_response(self, data):
+        if self.count_mode == "exact":
+            return super().get_paginated_response(data)
+        response = OrderedDict()
+        if self.count is not None:
+            response["count"] = self.count
+        response["next"] = self.get_next_link()
+        response["previous"] = self.get_previous_link()
+        response["results"] = data
+        return Response(response)
+
+
+class ListPagination(KeysetPagination):
+    """
+    Default pagination for the ModelViewSets.
+
+    Pages are keyset pages over ``(-created_at, -id)``, so deep pages cost
+    the same as the first, and carry no count unless ``?count=exact`` or
+    ``?count=estimated`` asks for one. A request with ``?page=`` gets the
+    legacy page-number mode instead (see PageNumberListPagination).
+    Both modes take a ``page_size`` of up to 100.
+    """
+
+    page_query_param = "page"
+
+    def paginate_queryset(self, queryset, request, view=None):
+        self.legacy = None
+        if self.page_query_param in request.query_params:
+            self.legacy = PageNumberListPagination()
+            queryset = queryset.order_by(*self.get_ordering(view))
+            return self.legacy.paginate_queryset(queryset, request, view)
+        self.count = None
+        count_mode = get_count_mode(request, "none")
+        if count_mode == "exact":
+            self.count = queryset.count()
+        elif count_mode == "estimated":
+            self.count = estimated_count(queryset)
+        return super().paginate_queryset(queryset, request, view)
+
+    def get_paginated_response(self, data):
+        if self.legacy is not None:
+            return self.legacy.get_paginated_response(data)
+        response = super().get_paginated_response(data)
+        if self.count is not None:
+            response.data = OrderedDict([("count", self.count), *response.data.items()])
+        return response
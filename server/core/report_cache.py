@@ -0,0 +1,71 @@
+"""
+Response cache for the report views.
+
+Every report period ("This Month", "Last Year", ...) has a version token in
+the cache, and a cached response's key embeds the tokens of the periods it
+covers. Replacing a period's token therefore drops every response that
+includes that period, without scanning or clearing unrelated keys. The
+tokens only reach every server process through a shared cache backend,
+which settings.CACHES configures.
+"""
+import hashlib
+import json
+import time
+from datetime import date
+
+from django.conf import settings
+from django.core.cache import cache
+
+REPORT_CACHE_TIMEOUT = getattr(settings, "REPORT_CACHE_TIMEOUT", 300)
+
+
+def _version_key(period):
+    return "report:version:" + period.lower().replace(" ", "-")
+
+
+def _new_version():
+    # A fresh token rather than a counter, so an evicted version key can
+    # never be recreated with a value an old response was stored under.
+    return time.time_ns()
+
+
+def period_versions(periods):
+    """Return the current version token for each period."""
+    keys = {_version_key(period): period for period in periods}
+    found = cache.get_many(list(keys))
+    missing = {key: _new_version() for key in keys if key not in found}
+    if missing:
+        cache.set_many(missing, None)
+        found.update(missing)
+    return [found[key] for key in keys]
+
+
+def invalidate_periods(periods):
+    """Drop every cached response that covers one of the periods."""
+    if periods:
+        cache.set_many(
+            {_version_key(period): _new_version() for period in periods}, None
+        )
+
+
+def build_key(report, params, periods):
+    """
+    Build the cache key for a report response.
+
+    ``params`` holds the query parameters that shape the response and
+    ``periods`` the named periods whose data it contains.
+    """
+    raw = json.dumps(
+        [report, date.today(), params, period_versions(periods)],
+        sort_keys=True,
+        default=str,
+    )
+    return f"report:{report}:{hashlib.md5(raw.encode()).hexdigest()}"
+
+
+def get_cached(key):
+    return cache.get(key)
+
+
+def store(key, data):
+    cache.set(key, data, REPORT_CACHE_TIMEOUT)
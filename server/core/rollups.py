@@ -0,0 +1,620 @@
+"""
+Set-based maintenance of the DailySummary rollup tables.
+
+A backfill runs one GROUP BY per source table over the whole requested range
+and writes the result with bulk upserts, instead of aggregating day by day.
+MonthlySummary and YearlySummary are regrouped from the finer level, so any
+date range can be answered from a handful of year, month and day rows.
+CustomerDailySummary and VendorDailySummary hold the same daily totals per
+party, so customer- and vendor-filtered reports never scan the documents.
+Between backfills the signal handlers in ``core.signals`` keep all of these
+tables current by applying per-document deltas. A backfill aggregates and
+replaces one calendar year at a time, each in its own transaction holding
+an advisory lock on that year, which the delta writes to the year also
+take, so no delta lands in between to be overwritten, while writes to
+other years carry on.
+"""
+import calendar
+from collections import defaultdict
+from datetime import date, timedelta
+from decimal import Decimal
+
+from django.core.exceptions import ObjectDoesNotExist
+from django.db import connection, transaction
+from django.db.models import F, Max, Min, Q, Sum
+from django.db.models.functions import ExtractYear, Trunc, TruncMonth
+from django.utils import timezone
+
+from .models import (
+    Bill, CustomerDailySummary, DailySummary, Invoice, MonthlySummary, Payment,
+    RollupCheckpoint, VendorDailySummary, YearlySummary,
+)
+
+DAILY_CHECKPOINT = "daily_summary"
+BATCH_SIZE = 500
+# First key of the PostgreSQL advisory locks on a year's rollups
+ROLLUP_LOCK = 0x726F6C6C
+
+# (source model, date field, amount field, DailySummary column)
+DAILY_SOURCES = (
+    (Invoice, "invoice_date", "total_amount", "invoices_total"),
+    (Bill, "bill_date", "total_amount", "bills_total"),
+    (Payment, "date", "amount", "payments_total"),
+)
+SUMMARY_FIELDS = tuple(column for _, _, _, column in DAILY_SOURCES)
+
+# Party rollup model -> (party field, ((source model, date field,
+# amount field, column, lookup path from the source to the party id), ...))
+PARTY_SOURCES = {
+    CustomerDailySummary: ("customer", (
+        (Invoice, "invoice_date", "total_amount", "invoices_total", "customer_id"),
+        (Payment, "date", "amount", "payments_total", "invoice__customer_id"),
+    )),
+    VendorDailySummary: ("vendor", (
+        (Bill, "bill_date", "total_amount", "bills_total", "vendor_id"),
+    )),
+}
+
+# Source model -> (party rollup model, lookup path to the party id)
+SOURCE_PARTIES = {
+    source: (model, path)
+    for model, (_, sources) in PARTY_SOURCES.items()
+    for source, _, _, _, path in sources
+}
+
+
+def source_date_bounds():
+    """Return the (oldest, newest) document date, or (None, None) if empty."""
+    lows, highs = [], []
+    for model, date_field, _, _ in DAILY_SOURCES:
+        bounds = model.objects.aggregate(
+            low=Min(date_field), high=Max(date_field)
+        )
+        if bounds["low"] is not None:
+            lows.append(bounds["low"])
+            highs.append(bounds["high"])
+    if not lows:
+        return None, None
+    return min(lows), max(highs)
+
+
+def get_checkpoint():
+    """Return the DailySummary checkpoint, or None if no backfill has run."""
+    return RollupCheckpoint.objects.filter(name=DAILY_CHECKPOINT).first()
+
+
+def since_last_run_start():
+    """
+    Return the first day that may have changed since the last backfill.
+
+    That is the day after the covered range, or the earliest date of any
+    document created since the last run if that is older. Returns None when
+    no backfill has run yet, meaning a full rebuild is needed.
+    """
+    checkpoint = get_checkpoint()
+    if checkpoint is None or checkpoint.covered_through is None:
+        return None
+    start = checkpoint.covered_through + timedelta(days=1)
+    if checkpoint.last_run_at is not None:
+        for model, date_field, _, _ in DAILY_SOURCES:
+            oldest = model.objects.filter(
+                created_at__gte=checkpoint.last_run_at
+            ).aggregate(oldest=Min(date_field))["oldest"]
+            if oldest is not None and oldest < start:
+                start = oldest
+    return start
+
+
+def _aggregate_by_day(start, end):
+    """Group every source table by day over the range, one query per table."""
+    totals = defaultdict(dict)
+    for model, date_field, amount_field, column in DAILY_SOURCES:
+        rows = (
+            model.objects.filter(**{f"{date_field}__range": (start, end)})
+            .values(date_field)
+            .annotate(total=Sum(amount_field))
+            .order_by()
+        )
+        for row in rows:
+            totals[row[date_field]][column] = row["total"] or 0
+    return totals
+
+
+def _lock_years(years):
+    """
+    Lock the rollups of these years until the surrounding transaction ends.
+    A backfill takes the lock of the year it is replacing, and delta writes
+    those of the years they touch, so a delta waits for that year's
+    backfill rather than being overwritten by it. Other databases rely on
+    their own write locking: SQLite allows one writer at a time.
+    """
+    if connection.vendor != "postgresql":
+        return
+    with connection.cursor() as cursor:
+        for year in sorted(set(years)):
+            cursor.execute("SELECT pg_advisory_xact_lock(%s, %s)", [ROLLUP_LOCK, year])
+
+
+def _year_ranges(start, end):
+    """Split ``start``..``end`` at the turn of each year."""
+    for year in range(start.year, end.year + 1):
+        yield max(start, date(year, 1, 1)), min(end, date(year, 12, 31))
+
+
+def _advance_checkpoint(checkpoint, start, end, oldest, started_at):
+    """Extend the covered range if this run joined up with it."""
+    covered = checkpoint.covered_through
+    if covered is None:
+        contiguous = oldest is None or start <= oldest
+    else:
+        contiguous = start <= covered + timedelta(days=1)
+    if not contiguous:
+        return
+    checkpoint.covered_through = max(end, covered) if covered else end
+    checkpoint.last_run_at = started_at
+    checkpoint.save(update_fields=["covered_through", "last_run_at"])
+
+
+def rebuild_daily_summaries(start=None, end=None):
+    """
+    Recompute DailySummary rows for ``start``..``end`` inclusive.
+
+    Omitted bounds default to the oldest document date and to the later of
+    today and the newest document date. Days without activity have their
+    rows removed. Returns ``(start, end, days_written)``.
+    """
+    started_at = timezone.now()
+    oldest, newest = source_date_bounds()
+    if start is None:
+        start = oldest or date.today()
+    if end is None:
+        end = max(newest or date.today(), date.today())
+    if start > end:
+        return start, end, 0
+
+    written = 0
+    for low, high in _year_ranges(start, end):
+        with transaction.atomic():
+            _lock_years([low.year])
+            written += _rebuild_range(low, high)
+    with transaction.atomic():
+        RollupCheckpoint.objects.get_or_create(name=DAILY_CHECKPOINT)
+        checkpoint = RollupCheckpoint.objects.select_for_update().get(name=DAILY_CHECKPOINT)
+        _advance_checkpoint(checkpoint, start, end, oldest, started_at)
+    return start, end, written
+
+
+def _rebuild_range(start, end):
+    """Replace every rollup row for ``start``..``end``, all in one year."""
+    totals = _aggregate_by_day(start, end)
+    summaries = [
+        DailySummary(
+            date=day,
+            **{field: columns.get(field, 0) for field in SUMMARY_FIELDS},
+        )
+        for day, columns in totals.items()
+    ]
+    existing = DailySummary.objects.filter(
+        date__range=(start, end)
+    ).values_list("date", flat=True)
+    stale = sorted(set(existing) - totals.keys())
+    for i in range(0, len(stale), BATCH_SIZE):
+        DailySummary.objects.filter(
+            date__in=stale[i:i + BATCH_SIZE]
+        ).delete()
+    DailySummary.objects.bulk_create(
+        summaries,
+        batch_size=BATCH_SIZE,
+        update_conflicts=True,
+        unique_fields=["date"],
+        update_fields=[*SUMMARY_FIELDS, "updated_at"],
+    )
+    _rebuild_period_rollups(start, end)
+    _rebuild_party_rollups(start, end)
+    return len(summaries)
+
+
+def _month_start(day):
+    return day.replace(day=1)
+
+
+def _month_end(day):
+    return day.replace(day=calendar.monthrange(day.year, day.month)[1])
+
+
+def _replace_rows(model, key_field, key_range, rows):
+    """Upsert grouped ``rows`` and delete rows in ``key_range`` left empty."""
+    objs = [
+        model(
+            **{key_field: row["period"]},
+            **{field: row[field] or 0 for field in SUMMARY_FIELDS},
+        )
+        for row in rows
+    ]
+    model.objects.filter(**{f"{key_field}__range": key_range}).exclude(
+        **{f"{key_field}__in": [getattr(obj, key_field) for obj in objs]}
+    ).delete()
+    model.objects.bulk_create(
+        objs,
+        batch_size=BATCH_SIZE,
+        update_conflicts=True,
+        unique_fields=[key_field],
+        update_fields=[*SUMMARY_FIELDS, "updated_at"],
+    )
+
+
+def _rebuild_period_rollups(start, end):
+    """Regroup the months and years touching ``start``..``end``."""
+    sums = {field: Sum(field) for field in SUMMARY_FIELDS}
+    monthly = (
+        DailySummary.objects.filter(
+            date__range=(_month_start(start), _month_end(end))
+        )
+        .annotate(period=TruncMonth("date"))
+        .values("period")
+        .annotate(**sums)
+        .order_by()
+    )
+    _replace_rows(
+        MonthlySummary, "month", (_month_start(start), _month_start(end)),
+        monthly,
+    )
+    yearly = (
+        MonthlySummary.objects.filter(
+            month__range=(date(start.year, 1, 1), date(end.year, 12, 1))
+        )
+        .annotate(period=ExtractYear("month"))
+        .values("period")
+        .annotate(**sums)
+        .order_by()
+    )
+    _replace_rows(YearlySummary, "year", (start.year, end.year), yearly)
+
+
+def _rebuild_party_rollups(start, end):
+    """Regroup the per-customer and per-vendor rows for ``start``..``end``."""
+    for model, (party_field, sources) in PARTY_SOURCES.items():
+        totals = defaultdict(dict)
+        for source, date_field, amount_field, column, path in sources:
+            rows = (
+                source.objects.filter(**{f"{date_field}__range": (start, end)})
+                .values(path, date_field)
+                .annotate(total=Sum(amount_field))
+                .order_by()
+            )
+            for row in rows:
+                totals[row[path], row[date_field]][column] = row["total"] or 0
+        model.objects.filter(date__range=(start, end)).delete()
+        model.objects.bulk_create(
+            [
+                model(**{f"{party_field}_id": party_id, "date": day}, **columns)
+                for (party_id, day), columns in totals.items()
+            ],
+            batch_size=BATCH_SIZE,
+        )
+
+
+def as_date(value):
+    """Coerce a date or ISO date string to a date."""
+    if isinstance(value, date):
+        return value
+    return date.fromisoformat(str(value))
+
+
+def as_amount(value):
+    """Coerce an amount, possibly None or a string, to a Decimal."""
+    return Decimal(str(value or 0))
+
+
+def rollup_deltas(column, before, after):
+    """
+    Return ``{day: {column: delta}}`` for a document moving between states.
+
+    ``before`` and ``after`` are ``(day, amount)`` pairs, or None when the
+    document did not exist before or no longer exists after the write.
+    """
+    deltas = defaultdict(lambda: defaultdict(Decimal))
+    if before is not None and before[0] is not None:
+        deltas[as_date(before[0])][column] -= as_amount(before[1])
+    if after is not None and after[0] is not None:
+        deltas[as_date(after[0])][column] += as_amount(after[1])
+    return deltas
+
+
+def party_rollup_deltas(column, before, after):
+    """
+    Return ``{(party_id, day): {column: delta}}`` like ``rollup_deltas``,
+    for ``(day, amount, party_id)`` states.
+    """
+    deltas = defaultdict(lambda: defaultdict(Decimal))
+    if before is not None and None not in (before[0], before[2]):
+        deltas[before[2], as_date(before[0])][column] -= as_amount(before[1])
+    if after is not None and None not in (after[0], after[2]):
+        deltas[after[2], as_date(after[0])][column] += as_amount(after[1])
+    return deltas
+
+
+def party_of(instance, path):
+    """Follow a ``__`` lookup path from a document to its party id."""
+    value = instance
+    for name in path.split("__"):
+        if value is None:
+            return None
+        try:
+            value = getattr(value, name)
+        except ObjectDoesNotExist:
+            return None
+    return value
+
+
+def _apply_deltas(model, key_fields, deltas):
+    """Add ``{key: {column: delta}}`` to the rows matching each key."""
+    if isinstance(key_fields, str):
+        key_fields = (key_fields,)
+        deltas = {(key,): columns for key, columns in deltas.items()}
+    for key, columns in deltas.items():
+        changes = {
+            column: F(column) + amount
+            for column, amount in columns.items()
+            if amount
+        }
+        if not changes:
+            continue
+        changes["updated_at"] = timezone.now()
+        lookup = dict(zip(key_fields, key))
+        rows = model.objects.filter(**lookup)
+        if not rows.update(**changes):
+            model.objects.bulk_create([model(**lookup)], ignore_conflicts=True)
+            rows.update(**changes)
+
+
+def _regroup(deltas, key):
+    grouped = defaultdict(lambda: defaultdict(Decimal))
+    for day, columns in deltas.items():
+        for column, amount in columns.items():
+            grouped[key(day)][column] += amount
+    return grouped
+
+
+def apply_daily_deltas(deltas):
+    """
+    Add ``{day: {column: delta}}`` to the daily, monthly and yearly
+    rollups with F() updates.
+    """
+    with transaction.atomic():
+        _lock_years(day.year for day in deltas)
+        _apply_deltas(DailySummary, "date", deltas)
+        _apply_deltas(MonthlySummary, "month", _regroup(deltas, _month_start))
+        _apply_deltas(YearlySummary, "year", _regroup(deltas, lambda day: day.year))
+
+
+def schedule_daily_deltas(deltas):
+    """Apply the deltas once the surrounding transaction commits."""
+    if deltas:
+        transaction.on_commit(lambda: apply_daily_deltas(deltas))
+
+
+def apply_party_deltas(model, deltas):
+    """
+    Add ``{(party_id, day): {column: delta}}`` to a party rollup. Deltas
+    for parties deleted since the write are dropped with their rows.
+    """
+    party_field = PARTY_SOURCES[model][0]
+    party_model = model._meta.get_field(party_field).related_model
+    existing = set(
+        party_model.objects.filter(
+            pk__in={party_id for party_id, _ in deltas}
+        ).values_list("pk", flat=True)
+    )
+    with transaction.atomic():
+        _lock_years(day.year for _, day in deltas)
+        _apply_deltas(
+            model,
+            (f"{party_field}_id", "date"),
+            {key: columns for key, columns in deltas.items() if key[0] in existing},
+        )
+
+
+def schedule_party_deltas(model, deltas):
+    """Apply party rollup deltas once the surrounding transaction commits."""
+    if deltas:
+        transaction.on_commit(lambda: apply_party_deltas(model, deltas))
+
+
+def _split_months(start, end):
+    """Split a range into loose day ranges and one range of whole months."""
+    first = start if start.day == 1 else _month_end(start) + timedelta(days=1)
+    last = end if end == _month_end(end) else _month_start(end) - timedelta(days=1)
+    if first > last:
+        return [(start, end)], []
+    days = []
+    if start < first:
+        days.append((start, first - timedelta(days=1)))
+    if last < end:
+        days.append((last + timedelta(days=1), end))
+    return days, [(first, _month_start(last))]
+
+
+def split_range(start, end):
+    """
+    Cover ``start``..``end`` with the fewest rollup rows.
+
+    Returns ``(day_ranges, month_ranges, year_range)``: whole years in the
+    middle, whole months around them and loose days at either end. Month
+    ranges are given by their first days; ``year_range`` may be None.
+    """
+    first_year = start.year if (start.month, start.day) == (1, 1) else start.year + 1
+    last_year = end.year if (end.month, end.day) == (12, 31) else end.year - 1
+    if first_year > last_year:
+        days, months = _split_months(start, end)
+        return days, months, None
+    day_ranges, month_ranges = [], []
+    if start < date(first_year, 1, 1):
+        days, months = _split_months(start, date(first_year - 1, 12, 31))
+        day_ranges += days
+        month_ranges += months
+    if end > date(last_year, 12, 31):
+        days, months = _split_months(date(last_year + 1, 1, 1), end)
+        day_ranges += days
+        month_ranges += months
+    return day_ranges, month_ranges, (first_year, last_year)
+
+
+def _sum_ranges(model, key_field, ranges):
+    condition = Q()
+    for low, high in ranges:
+        condition |= Q(**{f"{key_field}__range": (low, high)})
+    return model.objects.filter(condition).aggregate(
+        **{field: Sum(field) for field in SUMMARY_FIELDS}
+    )
+
+
+def _scopes(customer_id=None, vendor_id=None):
+    """
+    Return ``[(rollup model, rollup filter, sources)]`` answering every
+    summary column once: columns of a filtered party come from its party
+    rollup, the rest from the company-wide one. ``sources`` hold
+    ``(source model, date field, amount field, column, source filter)``.
+    """
+    parties = {CustomerDailySummary: customer_id, VendorDailySummary: vendor_id}
+    scopes, claimed = [], set()
+    for model, (party_field, sources) in PARTY_SOURCES.items():
+        party_id = parties[model]
+        if party_id is None:
+            continue
+        scopes.append((model, {f"{party_field}_id": party_id}, [
+            (source, date_field, amount_field, column, {path: party_id})
+            for source, date_field, amount_field, column, path in sources
+        ]))
+        claimed.update(source[3] for source in sources)
+    company = [
+        (source, date_field, amount_field, column, {})
+        for source, date_field, amount_field, column in DAILY_SOURCES
+        if column not in claimed
+    ]
+    if company:
+        scopes.insert(0, (DailySummary, {}, company))
+    return scopes
+
+
+def summarize_range(start, end, customer_id=None, vendor_id=None):
+    """
+    Return ``{column: total}`` for ``start``..``end`` inclusive.
+
+    Days inside the backfilled range are answered from at most one query
+    each on the yearly, monthly and daily rollups, so the cost does not
+    grow with the length of the range or with document volume. Days after
+    it, which have not been rolled up yet, are aggregated from the source
+    tables. ``customer_id`` and ``vendor_id`` narrow the invoice and
+    payment, or bill, totals to one party using its daily rollup.
+    """
+    totals = dict.fromkeys(SUMMARY_FIELDS, Decimal(0))
+    checkpoint = get_checkpoint()
+    covered = checkpoint.covered_through if checkpoint else None
+    raw_start = start
+    if covered is not None and start <= covered:
+        raw_start = covered + timedelta(days=1)
+    for model, rollup_filter, sources in _scopes(customer_id, vendor_id):
+        columns = [source[3] for source in sources]
+        if raw_start > start:
+            if model is DailySummary:
+                day_ranges, month_ranges, year_range = split_range(
+                    start, min(end, covered)
+                )
+                parts = []
+                if year_range:
+                    parts.append(_sum_ranges(YearlySummary, "year", [year_range]))
+                if month_ranges:
+                    parts.append(_sum_ranges(MonthlySummary, "month", month_ranges))
+                if day_ranges:
+                    parts.append(_sum_ranges(DailySummary, "date", day_ranges))
+            else:
+                parts = [model.objects.filter(
+                    **rollup_filter, date__range=(start, min(end, covered))
+                ).aggregate(**{column: Sum(column) for column in columns})]
+            for part in parts:
+                for column in columns:
+                    totals[column] += part[column] or 0
+        if raw_start <= end:
+            for source, date_field, amount_field, column, source_filter in sources:
+                totals[column] += source.objects.filter(
+                    **source_filter, **{f"{date_field}__range": (raw_start, end)}
+                ).aggregate(total=Sum(amount_field))["total"] or 0
+    return totals
+
+
+BUCKET_INTERVALS = ("day", "week", "month", "quarter")
+
+
+def _add_months(day, months):
+    index = day.year * 12 + day.month - 1 + months
+    return date(index // 12, index % 12 + 1, 1)
+
+
+def bucket_start(interval, day):
+    """Return the first day of the ``interval`` bucket containing ``day``."""
+    if interval == "week":
+        return day - timedelta(days=day.weekday())
+    if interval == "month":
+        return day.replace(day=1)
+    if interval == "quarter":
+        return date(day.year, (day.month - 1) // 3 * 3 + 1, 1)
+    return day
+
+
+def shift_bucket(interval, start, count):
+    """Move a bucket start ``count`` buckets forward (or back if negative)."""
+    if interval == "week":
+        return start + timedelta(weeks=count)
+    if interval == "month":
+        return _add_months(start, count)
+    if interval == "quarter":
+        return _add_months(start, 3 * count)
+    return start + timedelta(days=count)
+
+
+def summarize_buckets(interval, start, end, customer_id=None, vendor_id=None):
+    """
+    Return ``{bucket_start: {column: total}}`` for ``start``..``end``.
+
+    Covered days come from a single grouped query over DailySummary, or
+    over the party rollup when filtered by ``customer_id``/``vendor_id``;
+    days after the backfilled range are grouped from the source tables.
+    Buckets without activity are left out.
+    """
+    buckets = defaultdict(lambda: dict.fromkeys(SUMMARY_FIELDS, Decimal(0)))
+    checkpoint = get_checkpoint()
+    covered = checkpoint.covered_through if checkpoint else None
+    raw_start = start
+    if covered is not None and start <= covered:
+        raw_start = covered + timedelta(days=1)
+    for model, rollup_filter, sources in _scopes(customer_id, vendor_id):
+        columns = [source[3] for source in sources]
+        if raw_start > start:
+            rows = (
+                model.objects.filter(
+                    **rollup_filter, date__range=(start, min(end, covered))
+                )
+                .annotate(bucket=Trunc("date", interval))
+                .values("bucket")
+                .annotate(**{column: Sum(column) for column in columns})
+                .order_by()
+            )
+            for row in rows:
+                for column in columns:
+                    buckets[row["bucket"]][column] += row[column] or 0
+        if raw_start <= end:
+            for source, date_field, amount_field, column, source_filter in sources:
+                rows = (
+                    source.objects.filter(
+                        **source_filter,
+                        **{f"{date_field}__range": (raw_start, end)},
+                    )
+                    .annotate(bucket=Trunc(date_field, interval))
+                    .values("bucket")
+                    .annotate(total=Sum(amount_field))
+                    .order_by()
+                )
+                for row in rows:
+                    buckets[row["bucket"]][column] += row["total"] or 0
+    return buckets
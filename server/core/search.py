@@ -0,0 +1,205 @@
+"""
+Search over customers, vendors, items and document numbers.
+
+Every searchable record has one SearchEntry row holding its title, subtitle
+and a lowercased ``text`` column of the values worth matching (names,
+emails, PAN, phone numbers, SKUs, document numbers). The signal handlers in
+``core.signals`` keep the rows current, and ``rebuild_search_index``
+repopulates them from scratch.
+
+``text`` is indexed with a pg_trgm GIN index on PostgreSQL and an FTS5
+trigram table on SQLite (see migration 0024), so substring and fuzzy
+matches never scan the source tables. Other databases fall back to LIKE
+over the entries.
+"""
+from functools import lru_cache
+
+from django.apps import apps as global_apps
+from django.db import connection
+from django.db.models import BooleanField, Case, IntegerField, Q, Value, When
+from django.db.models.expressions import RawSQL
+
+from .models import SearchEntry
+
+BATCH_SIZE = 500
+FTS_TABLE = "core_searchentry_fts"
+# The FTS5 trigram tokenizer cannot match terms shorter than this
+FTS_MIN_TERM = 3
+
+
+def _customer(obj):
+    return obj.display_name, obj.company_name or obj.email, (
+        obj.display_name, obj.company_name, obj.first_name, obj.last_name,
+        obj.email, obj.pan, obj.work_phone, obj.mobile,
+    )
+
+
+def _vendor(obj):
+    return obj.name, obj.company_name or obj.email, (
+        obj.name, obj.company_name, obj.email, obj.phone,
+    )
+
+
+def _item(obj):
+    return obj.name, obj.sku, (obj.name, obj.sku, obj.description)
+
+
+def _document(number_field, date_field, *fields):
+    def describe(obj):
+        number = getattr(obj, number_field)
+        return number, str(getattr(obj, date_field)), (
+            number, *(getattr(obj, field) for field in fields),
+        )
+    return describe
+
+
+# kind -> (model name, function returning (title, subtitle, searchable values))
+SEARCH_SOURCES = {
+    "customer": ("Customer", _customer),
+    "vendor": ("Vendor", _vendor),
+    "item": ("Item", _item),
+    "invoice": ("Invoice", _document("invoice_number", "invoice_date", "order_number")),
+    "bill": ("Bill", _document("bill_number", "bill_date", "reference_number")),
+    "quote": ("Quote", _document("quote_number", "quote_date", "reference_number")),
+    "proforma": ("ProformaInvoice", _document("invoice_number", "invoice_date", "reference_number")),
+    "challan": ("DeliveryChallan", _document("challan_number", "date", "reference_number")),
+}
+SEARCH_KINDS = {model_name: kind for kind, (model_name, _) in SEARCH_SOURCES.items()}
+
+
+def search_kind(model):
+    """Return the SearchEntry kind of a model, or None if it is not searched."""
+    return SEARCH_KINDS.get(model.__name__)
+
+
+def build_entry(kind, obj):
+    """Return an unsaved SearchEntry describing ``obj``."""
+    title, subtitle, values = SEARCH_SOURCES[kind][1](obj)
+    text = " ".join(str(value).lower() for value in values if value)
+    return SearchEntry(
+        kind=kind, object_id=obj.pk,
+        title=str(title)[:255], subtitle=str(subtitle or "")[:255], text=text,
+    )
+
+
+def _upsert(entries):
+    SearchEntry.objects.bulk_create(
+        entries,
+        update_conflicts=True,
+        unique_fields=["kind", "object_id"],
+        update_fields=["title", "subtitle", "text"],
+    )
+
+
+def index_object(obj):
+    """Create or refresh the search entry of a saved object."""
+    kind = search_kind(type(obj))
+    if kind:
+        _upsert([build_entry(kind, obj)])
+
+
+def unindex_object(obj):
+    """Drop the search entry of a deleted object."""
+    kind = search_kind(type(obj))
+    if kind:
+        SearchEntry.objects.filter(kind=kind, object_id=obj.pk).delete()
+
+
+def index_objects(model, objs):
+    """Create or refresh the search entries of saved objects of ``model``."""
+    kind = search_kind(model)
+    if not kind:
+        return
+    for start in range(0, len(objs), BATCH_SIZE):
+        _upsert([build_entry(kind, obj) for obj in objs[start:start + BATCH_SIZE]])
+
+
+def unindex_objects(model, pks):
+    """Drop the search entries of deleted objects of ``model``."""
+    kind = search_kind(model)
+    if kind:
+        SearchEntry.objects.filter(kind=kind, object_id__in=pks).delete()
+
+
+def rebuild_search_index(apps=global_apps):
+    """
+    Replace every search entry with one built from the current rows.
+    ``apps`` lets migrations pass their historical app registry.
+    Returns the number of entries written.
+    """
+    entry_model = apps.get_model("core", "SearchEntry")
+    entry_model.objects.all().delete()
+    written = 0
+    for kind, (model_name, _) in SEARCH_SOURCES.items():
+        batch = []
+        for obj in apps.get_model("core", model_name).objects.iterator(chunk_size=BATCH_SIZE):
+            entry = build_entry(kind, obj)
+            batch.append(entry_model(**{
+                field: getattr(entry, field)
+                for field in ("kind", "object_id", "title", "subtitle", "text")
+            }))
+            if len(batch) == BATCH_SIZE:
+                entry_model.objects.bulk_create(batch)
+                written += len(batch)
+                batch = []
+        entry_model.objects.bulk_create(batch)
+        written += len(batch)
+    return written
+
+
+@lru_cache
+def _has_fts_table(database_name):
+    return FTS_TABLE in connection.introspection.table_names()
+
+
+def fts_available():
+    """Whether the SQLite FTS5 table from migration 0024 exists."""
+    return connection.vendor == "sqlite" and _has_fts_table(connection.settings_dict["NAME"])
+
+
+def _fts_search(terms, kinds, limit):
+    # Quoted terms are ANDed phrases; bm25 rank puts the best matches first
+    match = " ".join('"{}"'.format(term.replace('"', '""')) for term in terms)
+    sql = (
+        f"SELECT e.* FROM {FTS_TABLE} f JOIN core_searchentry e ON e.id = f.rowid"
+        f" WHERE {FTS_TABLE} MATCH %s"
+    )
+    params = [match]
+    if kinds:
+        sql += " AND e.kind IN ({})".format(", ".join(["%s"] * len(kinds)))
+        params += kinds
+    sql += " ORDER BY f.rank LIMIT %s"
+    return list(SearchEntry.objects.raw(sql, params + [limit]))
+
+
+def search(query, kinds=None, limit=20):
+    """
+    Return up to ``limit`` SearchEntry rows matching every word of
+    ``query``, best matches first. ``kinds`` narrows the result to some
+    entry kinds. On PostgreSQL, entries similar to the whole query also
+    match, so small typos still find their record.
+    """
+    terms = query.lower().split()
+    if not terms:
+        return []
+    if connection.vendor == "sqlite" and min(map(len, terms)) >= FTS_MIN_TERM and fts_available():
+        return _fts_search(terms, kinds, limit)
+
+    entries = SearchEntry.objects.all()
+    if kinds:
+        entries = entries.filter(kind__in=kinds)
+    matches = Q()
+    for term in terms:
+        matches &= Q(text__contains=term)
+    phrase = " ".join(terms)
+    if connection.vendor == "postgresql":
+        from django.contrib.postgres.search import TrigramWordSimilarity
+
+        fuzzy = RawSQL("%s <%% core_searchentry.text", (phrase,), output_field=BooleanField())
+        entries = entries.filter(matches | Q(fuzzy))
+        entries = entries.annotate(rank=TrigramWordSimilarity(phrase, "text")).order_by("-rank", "title")
+    else:
+        entries = entries.filter(matches).annotate(
+            rank=Case(When(text__startswith=phrase, then=Value(0)), default=Value(1), output_field=IntegerField())
+        ).order_by("rank", "title")
+    return list(entries[:limit])
@@ -1,3 +1,6 @@
+from decimal import ROUND_HALF_UP, Decimal
+
+from django.db import transaction
 from rest_framework import serializers
 from .models import (
     Customer,
@@ -16,7 +19,67 @@ from .models import (
     DeliveryChallanItem,
     Bill,
     BillItem,
+    InventoryAdjustment,
+    SearchEntry,
 )
+from .numbering import number_documents
+
+
+CENT = Decimal("0.01")
+
+
+def split_param(value):
+    """Split a comma-separated query param into a list of names."""
+    return [name.strip() for name in (value or "").split(",") if name.strip()]
+
+
+class DynamicFieldsMixin:
+    """
+    Serializer mixin adding ``?fields=`` and ``?expand=`` support to GET
+    responses.
+
+    ``fields`` lists the fields to keep. In list responses, the fields in
+    ``compact_fields`` are rendered with their compact serializer unless
+    named in ``expand``. Dotted names such as ``customer.email`` or
+    ``item_details.item`` reach into nested serializers.
+    """
+
+    compact_fields = {}
+
+    def _nesting_path(self):
+        names = []
+        node = self
+        while node.parent is not None:
+            if node.field_name:
+                names.append(node.field_name)
+            node = node.parent
+        return ".".join(reversed(names))
+
+    def get_fields(self):
+        fields = super().get_fields()
+        request = self.context.get("request")
+        if request is None or request.method != "GET":
+            return fields
+        path = self._nesting_path()
+        prefix = f"{path}." if path else ""
+
+        def scoped(param):
+            return [
+                name[len(prefix):]
+                for name in split_param(request.query_params.get(param))
+                if name.startswith(prefix)
+            ]
+
+        view = self.context.get("view")
+        if getattr(view, "action", None) == "list":
+            expand = {name.split(".")[0] for name in scoped("expand")}
+            for name, compact in self.compact_fields.items():
+                if name in fields and name not in expand:
+                    fields[name] = compact(read_only=True)
+        wanted = {name.split(".")[0] for name in scoped("fields")}
+        if wanted:
+            fields = {name: field for name, field in fields.items() if name in wanted}
+        return fields
 
 
 class CustomerDocumentSerializer(serializers.ModelSerializer):
@@ -37,7 +100,12 @@ class CustomerDocumentSerializer(serializers.ModelSerializer):
 
 
 class ContactPersonSerializer(serializers.ModelSerializer):
-    """Serializer for ContactPerson model."""
+    """
+    Serializer for ContactPerson model. ``id`` is accepted on writes so a
+    customer update can tell kept contacts from new ones.
+    """
+
+    id = serializers.IntegerField(required=False)
 
     class Meta:
         model = ContactPerson
@@ -53,15 +121,281 @@ class ContactPersonSerializer(serializers.ModelSerializer):
         read_only_fields = ["id"]
 
 
-class ItemSerializer(serializers.ModelSerializer):
+class ItemSerializer(DynamicFieldsMixin, serializers.ModelSerializer):
     """Serializer for Item model."""
 
     class Meta:
         model = Item
-        fields = ["id", "name", "description", "price", "sku", "created_at"]
+        fields = ["id", "name", "description", "price", "sku", "created_at", "updated_at"]
         read_only_fields = ["id", "created_at"]
 
 
+class ItemSummarySerializer(DynamicFieldsMixin, serializers.ModelSerializer):
+    """Compact Item representation for line items in list responses."""
+
+    class Meta:
+        model = Item
+        fields = ["id", "name"]
+
+
+class PreloadedPrimaryKeyRelatedField(serializers.PrimaryKeyRelatedField):
+    """
+    PrimaryKeyRelatedField that looks the pk up in the rows a bulk write
+    loaded beforehand, ``context["preloaded"][model]``, when there are any,
+    so validating a batch costs one query per related model, not per row.
+    """
+
+    def to_internal_value(self, data):
+        preloaded = self.context.get("preloaded", {}).get(self.get_queryset().model)
+        if preloaded is None:
+            return super().to_internal_value(data)
+        try:
+            return preloaded[int(data)]
+        except KeyError:
+            self.fail("does_not_exist", pk_value=data)
+        except (TypeError, ValueError):
+            self.fail("incorrect_type", data_type=type(data).__name__)
+
+
+class LineItemListSerializer(serializers.ListSerializer):
+    """
+    Validates a document's lines together: every ``item_id`` is resolved
+    with one query rather than one per line (or none, when
+    ``context["preloaded"]`` already holds them, as in a bulk write).
+
+    In a partial update, a line sent with the ``id`` of a stored line only
+    needs the fields that change; the rest are taken from the stored line.
+    New lines must be sent in full.
+    """
+
+    def to_internal_value(self, data):
+        lines = super().to_internal_value(data)
+        instance = getattr(self.parent, "instance", None)
+        self.stored = {line.id: line for line in instance.item_details.all()} if instance is not None else {}
+        writable = [
+            name for name, field in self.child.fields.items()
+            if not field.read_only and name != "id"
+        ]
+        errors = []
+        for line in lines:
+            if line.get("id") in self.stored:
+                for name in writable:
+                    line.setdefault(name, getattr(self.stored[line["id"]], name))
+            # Lines with an unknown id are reported by validate()
+            errors.append({
+                name: [self.child.fields[name].error_messages["required"]]
+                for name in writable
+                if name not in line and self.child.fields[name].required
+                and line.get("id") is None
+            })
+        if any(errors):
+            raise serializers.ValidationError(errors)
+        return lines
+
+    def validate(self, lines):
+        line_ids = [line["id"] for line in lines if line.get("id") is not None]
+        if len(line_ids) != len(set(line_ids)):
+            raise serializers.ValidationError("Each line id may appear only once.")
+        unknown = sorted(set(line_ids) - set(self.stored))
+        if unknown:
+            raise serializers.ValidationError(
+                f"Unknown line id: {', '.join(str(pk) for pk in unknown)}."
+            )
+        wanted = {line["item_id"] for line in lines}
+        items = self.context.get("preloaded", {}).get(Item, {})
+        if not wanted <= items.keys():
+            items = {**items, **Item.objects.in_bulk(wanted - items.keys())}
+        missing = sorted(wanted - items.keys())
+        if missing:
+            raise serializers.ValidationError(
+                f"Unknown item_id: {', '.join(str(pk) for pk in missing)}."
+            )
+        for line in lines:
+            line["item"] = items[line.pop("item_id")]
+        return lines
+
+
+class LineItemSerializer(DynamicFieldsMixin, serializers.ModelSerializer):
+    """
+    Base serializer for document line items. ``id`` is accepted on writes
+    so a document update can tell kept lines from new ones.
+    """
+
+    compact_fields = {"item": ItemSummarySerializer}
+
+    id = serializers.IntegerField(required=False)
+    item = ItemSerializer(read_only=True)
+    item_id = serializers.IntegerField(write_only=True)
+
+    class Meta:
+        fields = ["id", "item", "item_id", "quantity", "rate", "amount"]
+        read_only_fields = ["item", "amount"]
+        list_serializer_class = LineItemListSerializer
+
+
+def money(value):
+    return Decimal(value).quantize(CENT, rounding=ROUND_HALF_UP)
+
+
+class NumberedDocumentMixin:
+    """
+    Document serializer mixin giving new documents sent without a number
+    the next one from their series (see core.numbering). Clients may still
+    send their own.
+    """
+
+    number_field = None
+    number_date_field = None
+
+    def get_fields(self):
+        fields = super().get_fields()
+        if self.number_field in fields:
+            fields[self.number_field].required = False
+            fields[self.number_field].allow_blank = True
+        return fields
+
+    def create(self, validated_data):
+        with transaction.atomic():
+            number_documents(self.Meta.model, [validated_data], self.number_field, self.number_date_field)
+            return super().create(validated_data)
+
+    def update(self, instance, validated_data):
+        if not validated_data.get(self.number_field, True):
+            del validated_data[self.number_field]
+        return super().update(instance, validated_data)
+
+
+class LineItemsMixin:
+    """
+    Document serializer mixin making ``item_details`` writable.
+
+    The lines are written in the same transaction as the document: with one
+    bulk_create on create, and on update by diffing them against the stored
+    lines by ``id``, so unchanged lines are left alone, changed ones go
+    through one bulk_update and lines left out are deleted. Line amounts and
+    the document totals from ``get_totals`` are computed here; clients no
+    longer send them. A document saved without lines keeps the totals it
+    was given.
+    """
+
+    line_fields = ("item", "quantity", "rate")
+
+    def line_relation(self):
+        """Return the line model and the name of its foreign key to the document."""
+        relation = self.Meta.model._meta.get_field("item_details")
+        return relation.related_model, relation.field.name
+
+    def header_value(self, attrs, name):
+        """A header field from ``attrs``, else the instance, else its default."""
+        if name in attrs:
+            return attrs[name]
+        if self.instance is not None:
+            return getattr(self.instance, name)
+        return self.Meta.model._meta.get_field(name).get_default()
+
+    def get_totals(self, lines, attrs):
+        """Return the document's total fields for these priced lines."""
+        return {"total_amount": sum((line["amount"] for line in lines), Decimal("0"))}
+
+    def price(self, validated_data):
+        """
+        Price the lines in ``validated_data`` and set the document totals
+        from them, or from the stored lines when none were sent. Returns
+        the lines sent, or None.
+        """
+        lines = validated_data.pop("item_details", None)
+        if lines is not None:
+            model, _ = self.line_relation()
+            for line in lines:
+                for name in self.line_fields:
+                    if name not in line:
+                        line[name] = model._meta.get_field(name).get_default()
+                line["amount"] = money(line["quantity"] * line["rate"])
+            validated_data.update(self.get_totals(lines, validated_data))
+        elif self.instance is not None:
+            # Header-only edits still reprice, e.g. a new discount
+            stored = [
+                {**{name: getattr(line, name) for name in self.line_fields}, "amount": line.amount}
+                for line in self.instance.item_details.all()
+            ]
+            if stored:
+                validated_data.update(self.get_totals(stored, validated_data))
+        return lines
+
+    def diff_lines(self, instance, lines):
+        """
+        Match ``lines`` against the stored lines of ``instance`` by id.
+        Returns the lines to create, the stored lines to update and the ids
+        of those to delete.
+        """
+        model, parent = self.line_relation()
+        stored = {line.id: line for line in instance.item_details.all()}
+        new, changed = [], []
+        for line in lines:
+            line_id = line.pop("id", None)
+            if line_id is None:
+                new.append(model(**{parent: instance}, **line))
+                continue
+            obj = stored.pop(line_id)
+            # item is compared by id so the stored line's item isn't fetched
+            if obj.item_id != line["item"].pk or any(
+                getattr(obj, name) != value for name, value in line.items() if name != "item"
+            ):
+                for name, value in line.items():
+                    setattr(obj, name, value)
+                changed.append(obj)
+        return new, changed, list(stored)
+
+    def save_lines(self, new, changed, removed):
+        model, _ = self.line_relation()
+        if removed:
+            model.objects.filter(pk__in=removed).delete()
+        if changed:
+            model.objects.bulk_update(changed, [*self.line_fields, "amount"])
+        if new:
+            model.objects.bulk_create(new)
+
+    def create(self, validated_data):
+        lines = self.price(validated_data)
+        with transaction.atomic():
+            instance = super().create(validated_data)
+            if lines:
+                model, parent = self.line_relation()
+                self.save_lines([model(**{parent: instance}, **line) for line in lines], [], [])
+        return instance
+
+    def update(self, instance, validated_data):
+        lines = self.price(validated_data)
+        with transaction.atomic():
+            instance = super().update(instance, validated_data)
+            if lines is not None:
+                self.save_lines(*self.diff_lines(instance, lines))
+        return instance
+
+
+class DiscountedTotalsMixin(LineItemsMixin):
+    """Totals for quotes, proformas and invoices: discount, then TDS/TCS, then adjustment."""
+
+    def get_totals(self, lines, attrs):
+        subtotal = sum((line["amount"] for line in lines), Decimal("0"))
+        discount = money(subtotal * Decimal(self.header_value(attrs, "discount")) / 100)
+        tax = money((subtotal - discount) * Decimal(self.header_value(attrs, "tax_percentage")) / 100)
+        if self.header_value(attrs, "tax_type") == "TDS":
+            tax = -tax
+        total = subtotal - discount + tax + Decimal(self.header_value(attrs, "adjustment"))
+        return {"subtotal": subtotal, "total_amount": total}
+
+
+class BillTotalsMixin(LineItemsMixin):
+    """Totals for bills, taxed per line."""
+
+    line_fields = ("item", "quantity", "rate", "tax_percentage")
+
+    def get_totals(self, lines, attrs):
+        subtotal = sum((line["amount"] for line in lines), Decimal("0"))
+        tax = sum((money(line["amount"] * line["tax_percentage"] / 100) for line in lines), Decimal("0"))
+        return {"subtotal": subtotal, "tax": tax, "total_amount": subtotal + tax}
+
 class VendorSerializer(serializers.ModelSerializer):
     """Serializer for Vendor model."""
 
@@ -75,49 +409,42 @@ class VendorSerializer(serializers.ModelSerializer):
             "address",
             "phone",
             "created_at",
+            "updated_at",
         ]
         read_only_fields = ["id", "created_at"]
 
 
-class BillItemSerializer(serializers.ModelSerializer):
+class BillItemSerializer(LineItemSerializer):
     """Serializer for BillItem model, includes item details."""
 
-    item = ItemSerializer(read_only=True)
-    item_id = serializers.PrimaryKeyRelatedField(
-        queryset=Item.objects.all(),
-        source="item",
-        write_only=True,
-    )
-
-    class Meta:
+    class Meta(LineItemSerializer.Meta):
         model = BillItem
         fields = [
             "id",
             "bill",
             "item",
             "item_id",
-            "description",
             "quantity",
             "rate",
+            "tax_percentage",
             "amount",
         ]
-        read_only_fields = ["id", "bill", "item", "amount"]
+        read_only_fields = ["bill", "item", "amount"]
 
 
-class BillSerializer(serializers.ModelSerializer):
+class BillSerializer(NumberedDocumentMixin, BillTotalsMixin, DynamicFieldsMixin, serializers.ModelSerializer):
     """Serializer for Bill model, includes vendor and item details."""
 
+    number_field = "bill_number"
+    number_date_field = "bill_date"
+
     vendor = VendorSerializer(read_only=True)
-    vendor_id = serializers.PrimaryKeyRelatedField(
+    vendor_id = PreloadedPrimaryKeyRelatedField(
         queryset=Vendor.objects.all(),
         source="vendor",
         write_only=True,
     )
-    item_details = BillItemSerializer(
-        many=True,
-        read_only=True,
-        source="billitem_set",
-    )
+    item_details = BillItemSerializer(many=True, required=False)
 
     class Meta:
         model = Bill
@@ -129,47 +456,40 @@ class BillSerializer(serializers.ModelSerializer):
             "bill_date",
             "due_date",
             "item_details",
+            "subtotal",
+            "tax",
             "total_amount",
             "status",
             "notes",
             "created_at",
+            "updated_at",
         ]
-        read_only_fields = ["id", "created_at", "vendor", "item_details"]
+        read_only_fields = ["id", "created_at", "vendor"]
 
 
-class DeliveryChallanItemSerializer(serializers.ModelSerializer):
+class DeliveryChallanItemSerializer(LineItemSerializer):
     """Serializer for DeliveryChallanItem model."""
 
-    item = ItemSerializer(read_only=True)
-    item_id = serializers.PrimaryKeyRelatedField(
-        queryset=Item.objects.all(),
-        source="item",
-        write_only=True,
-    )
-
-    class Meta:
+    class Meta(LineItemSerializer.Meta):
         model = DeliveryChallanItem
-        fields = ["id", "item", "item_id", "quantity", "rate", "amount"]
-        read_only_fields = ["id", "item", "amount"]
 
 
-class InvoiceItemSerializer(serializers.ModelSerializer):
+class InvoiceItemSerializer(LineItemSerializer):
     """Serializer for InvoiceItem model."""
 
-    item = ItemSerializer(read_only=True)
-    item_id = serializers.PrimaryKeyRelatedField(
-        queryset=Item.objects.all(),
-        source="item",
-        write_only=True,
-    )
+    class Meta(LineItemSerializer.Meta):
+        model = InvoiceItem
+
+
+class CustomerSummarySerializer(DynamicFieldsMixin, serializers.ModelSerializer):
+    """Compact Customer representation for document list responses."""
 
     class Meta:
-        model = InvoiceItem
-        fields = ["id", "item", "item_id", "quantity", "rate", "amount"]
-        read_only_fields = ["id", "item", "amount"]
+        model = Customer
+        fields = ["id", "display_name"]
 
 
-class CustomerSerializer(serializers.ModelSerializer):
+class CustomerSerializer(DynamicFieldsMixin, serializers.ModelSerializer):
     """
     Serializer for Customer model, includes documents and contact persons.
     """
@@ -218,30 +538,81 @@ class CustomerSerializer(serializers.ModelSerializer):
             "tags",
             "remarks",
             "created_at",
+            "updated_at",
         ]
         read_only_fields = ["id", "created_at", "documents"]
 
+    contact_fields = ("salutation", "first_name", "last_name", "email", "work_phone", "mobile")
+
+    def validate_contact_persons(self, contacts):
+        ids = [contact["id"] for contact in contacts if contact.get("id") is not None]
+        if len(ids) != len(set(ids)):
+            raise serializers.ValidationError("Each contact id may appear only once.")
+        stored = {contact.id for contact in self.instance.contact_persons.all()} if self.instance else set()
+        unknown = sorted(set(ids) - stored)
+        if unknown:
+            raise serializers.ValidationError(
+                f"Unknown contact id: {', '.join(str(pk) for pk in unknown)}."
+            )
+        return contacts
+
     def create(self, validated_data):
         contact_persons_data = validated_data.pop("contact_persons", [])
-        customer = super().create(validated_data)
-        for cp_data in contact_persons_data:
-            ContactPerson.objects.create(customer=customer, **cp_data)
+        with transaction.atomic():
+            customer = super().create(validated_data)
+            self.save_contact_persons(customer, contact_persons_data)
         return customer
 
     def update(self, instance, validated_data):
         contact_persons_data = validated_data.pop("contact_persons", None)
-        instance = super().update(instance, validated_data)
-        if contact_persons_data is not None:
-            # Remove existing contact persons
-            instance.contact_persons.all().delete()
-            # Add new contact persons
-            for cp_data in contact_persons_data:
-                ContactPerson.objects.create(customer=instance, **cp_data)
+        with transaction.atomic():
+            instance = super().update(instance, validated_data)
+            if contact_persons_data is not None:
+                self.save_contact_persons(instance, contact_persons_data)
         return instance
 
-
-class InvoiceSerializer(serializers.ModelSerializer):
-    invoice_file_ids = serializers.PrimaryKeyRelatedField(
+    def save_contact_persons(self, customer, contacts):
+        """
+        Make ``contacts`` the customer's contact persons. Each is matched to
+        a stored one by id, else by email, so ids stay stable; only the
+        difference is written, with at most one delete, one bulk_update and
+        one bulk_create.
+        """
+        stored = {contact.id: contact for contact in customer.contact_persons.all()}
+        unmatched = dict(stored)
+        for data in contacts:
+            unmatched.pop(data.get("id"), None)
+        by_email = {}
+        for contact in unmatched.values():
+            by_email.setdefault(contact.email.lower(), contact)
+        new, changed, fields = [], [], set()
+        for data in contacts:
+            # Omitted fields are cleared, as when contacts were recreated
+            values = {
+                name: data.get(name, ContactPerson._meta.get_field(name).get_default())
+                for name in self.contact_fields
+            }
+            contact = stored.get(data.get("id")) or by_email.pop(values["email"].lower(), None)
+            if contact is None:
+                new.append(ContactPerson(customer=customer, **values))
+                continue
+            unmatched.pop(contact.id, None)
+            diff = {name for name, value in values.items() if getattr(contact, name) != value}
+            if diff:
+                for name in diff:
+                    setattr(contact, name, values[name])
+                changed.append(contact)
+                fields |= diff
+        if unmatched:
+            ContactPerson.objects.filter(pk__in=unmatched).delete()
+        if changed:
+            ContactPerson.objects.bulk_update(changed, sorted(fields))
+        if new:
+            ContactPerson.objects.bulk_create(new)
+
+
+class InvoiceSerializer(NumberedDocumentMixin, DiscountedTotalsMixin, DynamicFieldsMixin, serializers.ModelSerializer):
+    invoice_file_ids = PreloadedPrimaryKeyRelatedField(
         queryset=CustomerDocument.objects.all(),
         source="invoice_files",
         many=True,
@@ -250,15 +621,21 @@ class InvoiceSerializer(serializers.ModelSerializer):
     )
     """Serializer for Invoice model, includes customer, items, and files."""
 
+    compact_fields = {"customer": CustomerSummarySerializer}
+    number_field = "invoice_number"
+    number_date_field = "invoice_date"
     customer = CustomerSerializer(read_only=True)
-    customer_id = serializers.PrimaryKeyRelatedField(
+    customer_id = PreloadedPrimaryKeyRelatedField(
         queryset=Customer.objects.all(),
         source="customer",
         write_only=True,
     )
-    item_details = InvoiceItemSerializer(many=True, read_only=True)
+    item_details = InvoiceItemSerializer(many=True, required=False)
+    balance_due = serializers.DecimalField(
+        max_digits=12, decimal_places=2, read_only=True
+    )
     files = CustomerDocumentSerializer(many=True, read_only=True)
-    file_ids = serializers.PrimaryKeyRelatedField(
+    file_ids = PreloadedPrimaryKeyRelatedField(
         queryset=CustomerDocument.objects.all(),
         source="files",
         many=True,
@@ -278,22 +655,54 @@ class InvoiceSerializer(serializers.ModelSerializer):
             "item_details",
             "customer_notes",
             "terms_and_conditions",
+            "subtotal",
+            "discount",
+            "tax_type",
+            "tax_percentage",
+            "adjustment",
             "total_amount",
             "files",  # files uploaded from the UI
             "file_ids",  # legacy/optional
             "invoice_file_ids",  # new field for programmatic file association
+            "amount_paid",
+            "balance_due",
+            "quote_id",
+            "proforma_invoice_id",
             "created_at",
+            "updated_at",
         ]
         read_only_fields = [
-            "id", "created_at", "customer", "item_details", "files", "invoice_file_ids"
+            "id", "created_at", "customer", "files", "invoice_file_ids",
+            "amount_paid", "balance_due", "quote_id", "proforma_invoice_id",
         ]
 
 
-class PaymentSerializer(serializers.ModelSerializer):
+class InvoiceSummarySerializer(DynamicFieldsMixin, serializers.ModelSerializer):
+    """Compact Invoice representation for payment list responses."""
+
+    customer = CustomerSummarySerializer(read_only=True)
+    balance_due = serializers.DecimalField(
+        max_digits=12, decimal_places=2, read_only=True
+    )
+
+    class Meta:
+        model = Invoice
+        fields = [
+            "id",
+            "invoice_number",
+            "invoice_date",
+            "customer",
+            "total_amount",
+            "balance_due",
+        ]
+
+
+class PaymentSerializer(DynamicFieldsMixin, serializers.ModelSerializer):
     """Serializer for Payment model, includes invoice details."""
 
-    invoice = serializers.SerializerMethodField(read_only=True)
-    invoice_id = serializers.PrimaryKeyRelatedField(
+    compact_fields = {"invoice": InvoiceSummarySerializer}
+    invoice = InvoiceSerializer(read_only=True)
+    invoice_id = PreloadedPrimaryKeyRelatedField(
         queryset=Invoice.objects.all(),
         source="invoice",
         write_only=True,
@@ -310,42 +719,31 @@ class PaymentSerializer(serializers.ModelSerializer):
             "method",
             "notes",
             "created_at",
+            "updated_at",
         ]
         read_only_fields = ["id", "created_at", "invoice"]
 
-    def get_invoice(self, obj: Payment) -> dict:
-        """Returns serialized invoice data for the payment."""
-        from .serializers import InvoiceSerializer
-
-        return InvoiceSerializer(obj.invoice).data if obj.invoice else None
 
-
-class QuoteItemSerializer(serializers.ModelSerializer):
+class QuoteItemSerializer(LineItemSerializer):
     """Serializer for QuoteItem model."""
 
-    item = ItemSerializer(read_only=True)
-    item_id = serializers.PrimaryKeyRelatedField(
-        queryset=Item.objects.all(),
-        source="item",
-        write_only=True,
-    )
-
-    class Meta:
+    class Meta(LineItemSerializer.Meta):
         model = QuoteItem
-        fields = ["id", "item", "item_id", "quantity", "rate", "amount"]
-        read_only_fields = ["id", "item", "amount"]
 
 
-class QuoteSerializer(serializers.ModelSerializer):
+class QuoteSerializer(NumberedDocumentMixin, DiscountedTotalsMixin, DynamicFieldsMixin, serializers.ModelSerializer):
     """Serializer for Quote model, includes customer and item details."""
 
+    compact_fields = {"customer": CustomerSummarySerializer}
+    number_field = "quote_number"
+    number_date_field = "quote_date"
     customer = CustomerSerializer(read_only=True)
     customer_id = serializers.PrimaryKeyRelatedField(
         queryset=Customer.objects.all(),
         source="customer",
         write_only=True,
     )
-    item_details = QuoteItemSerializer(many=True, read_only=True)
+    item_details = QuoteItemSerializer(many=True, required=False)
     quote_file_ids = serializers.PrimaryKeyRelatedField(
         queryset=CustomerDocument.objects.all(),
         source="quote_files",
@@ -378,27 +776,19 @@ class QuoteSerializer(serializers.ModelSerializer):
             "status",
             "quote_file_ids",
             "created_at",
+            "updated_at",
         ]
-        read_only_fields = ["id", "created_at", "customer", "item_details"]
+        read_only_fields = ["id", "created_at", "customer"]
 
 
-class ProformaInvoiceItemSerializer(serializers.ModelSerializer):
+class ProformaInvoiceItemSerializer(LineItemSerializer):
     """Serializer for ProformaInvoiceItem model."""
 
-    item = ItemSerializer(read_only=True)
-    item_id = serializers.PrimaryKeyRelatedField(
-        queryset=Item.objects.all(),
-        source="item",
-        write_only=True,
-    )
-
-    class Meta:
+    class Meta(LineItemSerializer.Meta):
         model = ProformaInvoiceItem
-        fields = ["id", "item", "item_id", "quantity", "rate", "amount"]
-        read_only_fields = ["id", "item", "amount"]
 
 
-class ProformaInvoiceSerializer(serializers.ModelSerializer):
+class ProformaInvoiceSerializer(NumberedDocumentMixin, DiscountedTotalsMixin, DynamicFieldsMixin, serializers.ModelSerializer):
     proforma_invoice_file_ids = serializers.PrimaryKeyRelatedField(
         queryset=CustomerDocument.objects.all(),
         source="proforma_invoice_files",
@@ -409,13 +799,16 @@ class ProformaInvoiceSerializer(serializers.ModelSerializer):
     Serializer for ProformaInvoice model, includes customer and item details.
     """
 
+    compact_fields = {"customer": CustomerSummarySerializer}
+    number_field = "invoice_number"
+    number_date_field = "invoice_date"
     customer = CustomerSerializer(read_only=True)
     customer_id = serializers.PrimaryKeyRelatedField(
         queryset=Customer.objects.all(),
         source="customer",
         write_only=True,
     )
-    item_details = ProformaInvoiceItemSerializer(many=True, read_only=True)
+    item_details = ProformaInvoiceItemSerializer(many=True, required=False)
 
     class Meta:
         model = ProformaInvoice
@@ -441,12 +834,14 @@ class ProformaInvoiceSerializer(serializers.ModelSerializer):
             "total_amount",
             "status",
             "proforma_invoice_file_ids",
+            "quote_id",
             "created_at",
+            "updated_at",
         ]
-        read_only_fields = ["id", "created_at", "customer", "item_details"]
+        read_only_fields = ["id", "created_at", "customer", "quote_id"]
 
 
-class DeliveryChallanSerializer(serializers.ModelSerializer):
+class DeliveryChallanSerializer(NumberedDocumentMixin, LineItemsMixin, DynamicFieldsMixin, serializers.ModelSerializer):
     delivery_challan_file_ids = serializers.PrimaryKeyRelatedField(
         queryset=CustomerDocument.objects.all(),
         source="delivery_challan_files",
@@ -455,13 +850,16 @@ class DeliveryChallanSerializer(serializers.ModelSerializer):
     )
     delivery_challan_files = CustomerDocumentSerializer(many=True, read_only=True)
     # No need for a separate read method; PrimaryKeyRelatedField will handle both read and write
+    compact_fields = {"customer": CustomerSummarySerializer}
+    number_field = "challan_number"
+    number_date_field = "date"
     customer = CustomerSerializer(read_only=True)
     customer_id = serializers.PrimaryKeyRelatedField(
         queryset=Customer.objects.all(),
         source="customer",
         write_only=True,
     )
-    item_details = DeliveryChallanItemSerializer(many=True, read_only=True)
+    item_details = DeliveryChallanItemSerializer(many=True, required=False)
 
     class Meta:
         model = DeliveryChallan
@@ -477,17 +875,71 @@ class DeliveryChallanSerializer(serializers.ModelSerializer):
             "delivery_challan_files",
             "delivery_challan_file_ids",
             "total_amount",
+            "quote_id",
+            "proforma_invoice_id",
+            "invoice_id",
             "created_at",
+            "updated_at",
         ]
         read_only_fields = [
             "id",
             "created_at",
             "customer",
-            "item_details",
             "delivery_challan_files",
+            "quote_id",
+            "proforma_invoice_id",
+            "invoice_id",
         ]
 
 
-class InventoryAdjustmentSerializer(serializers.ModelSerializer):
+class InventoryAdjustmentSerializer(NumberedDocumentMixin, serializers.ModelSerializer):
 
     """Serializer for InventoryAdjustment model."""
+
+    number_field = "adjustment_number"
+    number_date_field = "date"
+
+    class Meta:
+        model = InventoryAdjustment
+        fields = [
+            "id",
+            "item",
+            "adjustment_number",
+            "date",
+            "quantity",
+            "reason",
+            "notes",
+            "created_at",
+            "updated_at",
+        ]
+        read_only_fields = ["id", "created_at"]
+
+
+class InvoiceBreakdownSerializer(serializers.Serializer):
+    """Serializer for projected invoice rows in the Profit and Loss breakdown."""
+
+    id = serializers.IntegerField()
+    invoice_number = serializers.CharField()
+    date = serializers.DateField(source="invoice_date")
+    customer = serializers.CharField(source="customer__display_name")
+    total_amount = serializers.FloatField()
+
+
+class BillBreakdownSerializer(serializers.Serializer):
+    """Serializer for projected bill rows in the Profit and Loss breakdown."""
+
+    id = serializers.IntegerField()
+    bill_number = serializers.CharField()
+    date = serializers.DateField(source="bill_date")
+    vendor = serializers.CharField(source="vendor__name")
+    total_amount = serializers.FloatField()
+
+
+class SearchResultSerializer(serializers.ModelSerializer):
+    """Serializer for search results, pointing at the matched record."""
+
+    id = serializers.IntegerField(source="object_id")
+
+    class Meta:
+        model = SearchEntry
+        fields = ["kind", "id", "title", "subtitle"]
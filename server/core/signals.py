@@ -1,11 +1,53 @@
-from django.db.models.signals import post_save, post_delete
+from contextlib import contextmanager
+from contextvars import ContextVar
+from functools import wraps
+
+from django.db import transaction
+from django.db.models import Case, DecimalField, F, Sum, Value, When
+from django.db.models.functions import Now
+from django.db.models.signals import post_save, post_delete, pre_save
 from django.dispatch import receiver
-from django.core.cache import cache
-from .models import Invoice, Bill, Payment
-import hashlib
-import json
+from .models import (
+    Customer, Invoice, Bill, Payment, Vendor, Item, Quote, ProformaInvoice,
+    DeliveryChallan,
+)
+from . import autocomplete
+from .changes import SYNCED_MODELS, record_change, record_changes
+from .report_cache import invalidate_periods
+from .search import index_object, unindex_object
+from .rollups import (
+    DAILY_SOURCES, SOURCE_PARTIES, as_amount, as_date, party_of,
+    party_rollup_deltas,
+    rollup_deltas, schedule_daily_deltas, schedule_party_deltas,
+)
 from datetime import date, timedelta
 
+# Senders whose handlers are skipped, see muted()
+_muted = ContextVar("muted_senders", default=frozenset())
+
+
+@contextmanager
+def muted(*models):
+    """
+    Skip the handlers in this module for ``models`` inside the block. For
+    bulk writes (see core.bulk) that apply the same effects themselves,
+    once for the whole batch.
+    """
+    token = _muted.set(_muted.get() | set(models))
+    try:
+        yield
+    finally:
+        _muted.reset(token)
+
+
+def unless_muted(handler):
+    @wraps(handler)
+    def wrapper(sender, *args, **kwargs):
+        if sender not in _muted.get():
+            return handler(sender, *args, **kwargs)
+    return wrapper
+
+
 def get_periods_for_date(dt):
     """
     Return all report periods (This Month, This Year, Today, Yesterday, Last Month, Last Year)
@@ -34,43 +76,267 @@ def get_periods_for_date(dt):
         periods.append(("Last Year", dt.year, None))
     return periods
 
-def invalidate_report_cache_for_date(dt):
+def invalidate_report_cache_for_dates(dates):
     """
-    Invalidate all report cache keys that could include this date.
-    For simplicity, clears all 'report:*' keys (could be optimized).
-    If using a cache backend that supports it, uses cache.delete_pattern('report:*').
-    Otherwise, clears the whole cache (safe if only used for reports).
-    Args:
-        dt (date): The date for which to invalidate cache.
+    Invalidate the cached reports for every period that could include any of
+    these dates, bumping each period's version once.
     """
-    try:
-        cache.delete_pattern('report:*')
-    except AttributeError:
-        cache.clear()
+    periods = {
+        period[0] for dt in dates for period in get_periods_for_date(as_date(dt))
+    }
+    invalidate_periods(periods | {"Custom", "As Of"})
 
-@receiver(post_save, sender=Invoice)
-@receiver(post_delete, sender=Invoice)
-def invalidate_invoice_cache(sender, instance, **kwargs):
+
+def invalidate_report_cache_on_commit(dates):
+    """
+    Invalidate the report cache for the given dates once the transaction
+    commits, after the rollup deltas have been applied, so a report
+    computed before then cannot stay cached.
     """
-    Signal handler to invalidate report cache when an Invoice is saved or deleted.
+    dates = {dt for dt in dates if dt}
+    if dates:
+        transaction.on_commit(lambda: invalidate_report_cache_for_dates(dates))
+
+@receiver(post_save, sender=Customer)
+@receiver(post_delete, sender=Customer)
+@unless_muted
+def invalidate_opening_balance_cache(sender, instance, **kwargs):
+    """
+    Signal handler to invalidate cumulative "as of" reports, which include
+    customers' opening balances, when a Customer is saved or deleted.
     """
-    if instance.invoice_date:
-        invalidate_report_cache_for_date(instance.invoice_date)
+    transaction.on_commit(lambda: invalidate_periods({"As Of"}))
+
+
+# Source model -> (date field, amount field, DailySummary column)
+ROLLUP_SOURCES = {
+    model: (date_field, amount_field, column)
+    for model, date_field, amount_field, column in DAILY_SOURCES
+}
+
 
+@receiver(pre_save, sender=Invoice)
+@receiver(pre_save, sender=Bill)
+@receiver(pre_save, sender=Payment)
+@unless_muted
+def remember_rollup_values(sender, instance, **kwargs):
+    """
+    Stash the stored date, amount and party of a document about to be saved,
+    so the post_save handler can move the old amount off the old date.
+    """
+    date_field, amount_field, _ = ROLLUP_SOURCES[sender]
+    _, party_path = SOURCE_PARTIES[sender]
+    instance._rollup_before = None
+    if instance.pk is not None:
+        instance._rollup_before = sender.objects.filter(
+            pk=instance.pk
+        ).values_list(date_field, amount_field, party_path).first()
+
+
+@receiver(post_save, sender=Invoice)
 @receiver(post_save, sender=Bill)
+@receiver(post_save, sender=Payment)
+@unless_muted
+def update_daily_summary_on_save(sender, instance, **kwargs):
+    """
+    Signal handler to apply the change in a document's date, amount or party
+    to DailySummary and the party rollup when the transaction commits.
+    """
+    date_field, amount_field, column = ROLLUP_SOURCES[sender]
+    party_model, party_path = SOURCE_PARTIES[sender]
+    before = getattr(instance, "_rollup_before", None)
+    after = (
+        getattr(instance, date_field),
+        getattr(instance, amount_field),
+        party_of(instance, party_path),
+    )
+    schedule_daily_deltas(rollup_deltas(column, before and before[:2], after[:2]))
+    schedule_party_deltas(party_model, party_rollup_deltas(column, before, after))
+    invalidate_report_cache_on_commit([before and before[0], after[0]])
+
+
+@receiver(post_save, sender=Invoice)
+@unless_muted
+def move_payments_with_invoice_customer(sender, instance, **kwargs):
+    """
+    Signal handler to move an invoice's payments between customers'
+    rollups when the invoice is reassigned to another customer.
+    """
+    before = getattr(instance, "_rollup_before", None)
+    if before is None or before[2] == instance.customer_id:
+        return
+    payments = (
+        Payment.objects.filter(invoice=instance)
+        .values("date")
+        .annotate(total=Sum("amount"))
+        .order_by()
+    )
+    party_model, _ = SOURCE_PARTIES[Payment]
+    for row in payments:
+        schedule_party_deltas(party_model, party_rollup_deltas(
+            "payments_total",
+            (row["date"], row["total"], before[2]),
+            (row["date"], row["total"], instance.customer_id),
+        ))
+    invalidate_report_cache_on_commit([row["date"] for row in payments])
+
+
+@receiver(post_delete, sender=Invoice)
 @receiver(post_delete, sender=Bill)
-def invalidate_bill_cache(sender, instance, **kwargs):
+@receiver(post_delete, sender=Payment)
+@unless_muted
+def update_daily_summary_on_delete(sender, instance, **kwargs):
     """
-    Signal handler to invalidate report cache when a Bill is saved or deleted.
+    Signal handler to remove a deleted document's amount from DailySummary
+    and the party rollup when the transaction commits.
     """
-    if instance.bill_date:
-        invalidate_report_cache_for_date(instance.bill_date)
+    date_field, amount_field, column = ROLLUP_SOURCES[sender]
+    party_model, party_path = SOURCE_PARTIES[sender]
+    before = (
+        getattr(instance, date_field),
+        getattr(instance, amount_field),
+        party_of(instance, party_path),
+    )
+    schedule_daily_deltas(rollup_deltas(column, before[:2], None))
+    schedule_party_deltas(party_model, party_rollup_deltas(column, before, None))
+    invalidate_report_cache_on_commit([before[0]])
+
+
+@receiver(pre_save, sender=Payment)
+@unless_muted
+def remember_paid_invoice(sender, instance, **kwargs):
+    """
+    Stash the invoice and amount a payment is stored with, so the post_save
+    handler can move the amount between invoices' amount_paid.
+    """
+    instance._paid_before = None
+    if instance.pk is not None:
+        instance._paid_before = Payment.objects.filter(
+            pk=instance.pk
+        ).values_list("invoice_id", "amount").first()
+
+
+def add_to_amount_paid(invoice_id, amount):
+    """
+    Add ``amount`` to an invoice's amount_paid with an F() update, and log
+    the change for synced clients.
+    """
+    if invoice_id is not None and amount:
+        updated = Invoice.objects.filter(pk=invoice_id).update(
+            amount_paid=F("amount_paid") + amount, updated_at=Now()
+        )
+        if updated:
+            record_change(Invoice, invoice_id)
+
+
+def add_to_amounts_paid(amounts):
+    """
+    Add ``{invoice_id: amount}`` to the invoices' amount_paid like
+    add_to_amount_paid, with one UPDATE per batch of invoices.
+    """
+    amounts = {pk: amount for pk, amount in amounts.items() if pk is not None and amount}
+    ids = list(amounts)
+    for start in range(0, len(ids), 500):
+        batch = ids[start:start + 500]
+        Invoice.objects.filter(pk__in=batch).update(
+            amount_paid=F("amount_paid") + Case(
+                *[When(pk=pk, then=Value(amounts[pk])) for pk in batch],
+                output_field=DecimalField(max_digits=12, decimal_places=2),
+            ),
+            updated_at=Now(),
+        )
+    record_changes(Invoice, Invoice.objects.filter(pk__in=ids).values_list("pk", flat=True))
+
 
 @receiver(post_save, sender=Payment)
+@unless_muted
+def update_amount_paid_on_save(sender, instance, **kwargs):
+    """
+    Signal handler to keep Invoice.amount_paid, and with it balance_due,
+    current when a Payment is saved.
+    """
+    before = getattr(instance, "_paid_before", None)
+    if before is not None:
+        add_to_amount_paid(before[0], -as_amount(before[1]))
+    add_to_amount_paid(instance.invoice_id, as_amount(instance.amount))
+
+
 @receiver(post_delete, sender=Payment)
-def invalidate_payment_cache(sender, instance, **kwargs):
+@unless_muted
+def update_amount_paid_on_delete(sender, instance, **kwargs):
+    """
+    Signal handler to take a deleted Payment off its invoice's amount_paid.
+    """
+    add_to_amount_paid(instance.invoice_id, -as_amount(instance.amount))
+
+
+@receiver(post_save, sender=Customer)
+@receiver(post_save, sender=Vendor)
+@receiver(post_save, sender=Item)
+@receiver(post_save, sender=Invoice)
+@receiver(post_save, sender=Bill)
+@receiver(post_save, sender=Quote)
+@receiver(post_save, sender=ProformaInvoice)
+@receiver(post_save, sender=DeliveryChallan)
+@unless_muted
+def update_search_entry(sender, instance, raw=False, **kwargs):
     """
-    Signal handler to invalidate report cache when a Payment is saved or deleted.
+    Signal handler to keep a record's SearchEntry current when it is saved.
     """
-    if instance.date:
-        invalidate_report_cache_for_date(instance.date)
\ No newline at end of file
+    if not raw:
+        index_object(instance)
+
+
+@receiver(post_delete, sender=Customer)
+@receiver(post_delete, sender=Vendor)
+@receiver(post_delete, sender=Item)
+@receiver(post_delete, sender=Invoice)
+@receiver(post_delete, sender=Bill)
+@receiver(post_delete, sender=Quote)
+@receiver(post_delete, sender=ProformaInvoice)
+@receiver(post_delete, sender=DeliveryChallan)
+@unless_muted
+def delete_search_entry(sender, instance, **kwargs):
+    """
+    Signal handler to drop a deleted record's SearchEntry.
+    """
+    unindex_object(instance)
+
+
+@receiver(post_save, sender=Customer)
+@receiver(post_save, sender=Vendor)
+@receiver(post_save, sender=Item)
+@receiver(post_delete, sender=Customer)
+@receiver(post_delete, sender=Vendor)
+@receiver(post_delete, sender=Item)
+@unless_muted
+def invalidate_autocomplete(sender, instance, **kwargs):
+    """
+    Signal handler to drop cached picker suggestions when a Customer,
+    Vendor or Item is saved or deleted.
+    """
+    autocomplete.invalidate(sender)
+
+
+@unless_muted
+def log_change_on_save(sender, instance, raw=False, **kwargs):
+    """
+    Signal handler to log a saved record of a synced resource in its
+    change feed.
+    """
+    if not raw:
+        record_change(sender, instance.pk)
+
+
+@unless_muted
+def log_change_on_delete(sender, instance, **kwargs):
+    """
+    Signal handler to leave a tombstone in the change feed for a deleted
+    record of a synced resource.
+    """
+    record_change(sender, instance.pk, deleted=True)
+
+
+for model in SYNCED_MODELS:
+    post_save.connect(log_change_on_save, sender=model)
+    post_delete.connect(log_change_on_delete, sender=model)
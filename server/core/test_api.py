@@ -1,9 +1,13 @@
+from django.db import connection
+from django.test.utils import CaptureQueriesContext
 from django.urls import reverse
 from rest_framework import status
 from rest_framework.test import APITestCase
 
 from django.contrib.auth import get_user_model
 
+from .models import Bill, ContactPerson, Customer, Invoice, InvoiceItem, Item, Payment, Vendor
+
 
 class CustomerAPITestCase(APITestCase):
     """Test CRUD operations for Customer endpoint."""
@@ -34,6 +38,46 @@ class CustomerAPITestCase(APITestCase):
         self.assertGreaterEqual(len(response.data), 1)
 
 
+    def test_contact_persons_are_diffed_on_update(self):
+        response = self.client.post(reverse("customer-list"), {
+            **self.customer_data,
+            "contact_persons": [
+                {"first_name": "Ann", "last_name": "Lee", "email": "ann@example.com"},
+                {"first_name": "Bob", "last_name": "Roy", "email": "bob@example.com"},
+                {"first_name": "Cy", "last_name": "Day", "email": "cy@example.com"},
+            ],
+        }, format="json")
+        ann, bob, cy = [contact["id"] for contact in response.data["contact_persons"]]
+        url = reverse("customer-detail", args=[response.data["id"]])
+        with CaptureQueriesContext(connection) as queries:
+            response = self.client.patch(url, {"contact_persons": [
+                {"id": ann, "first_name": "Ann", "last_name": "Lee", "email": "ann@example.com"},
+                {"first_name": "Bobby", "last_name": "Roy", "email": "BOB@example.com"},
+                {"first_name": "Dee", "last_name": "Fox", "email": "dee@example.com"},
+            ]}, format="json")
+        self.assertEqual(response.status_code, 200)
+        writes = [
+            query["sql"].split()[0] for query in queries.captured_queries
+            if not query["sql"].startswith("SELECT") and '"core_contactperson"' in query["sql"]
+        ]
+        self.assertEqual(writes, ["DELETE", "UPDATE", "INSERT"])
+        contacts = dict(ContactPerson.objects.values_list("id", "first_name"))
+        self.assertEqual(contacts[ann], "Ann")
+        self.assertEqual(contacts[bob], "Bobby")
+        self.assertNotIn(cy, contacts)
+        self.assertEqual(len(contacts), 3)
+
+    def test_unknown_contact_id_is_rejected(self):
+        other = Customer.objects.create(display_name="Other", email="other@example.com")
+        foreign = ContactPerson.objects.create(customer=other, first_name="Zed", last_name="Zee", email="zed@example.com")
+        customer = Customer.objects.create(**self.customer_data)
+        response = self.client.patch(reverse("customer-detail", args=[customer.id]), {"contact_persons": [
+            {"id": foreign.id, "first_name": "Zed", "last_name": "Zee", "email": "zed@example.com"},
+        ]}, format="json")
+        self.assertEqual(response.status_code, 400)
+        self.assertEqual(ContactPerson.objects.get().customer_id, other.id)
+
+
 class VendorAPITestCase(APITestCase):
     """Test CRUD operations for Vendor endpoint."""
 
@@ -57,3 +101,145 @@ class VendorAPITestCase(APITestCase):
         response = self.client.get(url)
         self.assertEqual(response.status_code, status.HTTP_200_OK)
         self.assertGreaterEqual(len(response.data), 1)
+
+
+class DocumentFieldsExpandTestCase(APITestCase):
+    """Test ?fields= and ?expand= on document list and detail responses."""
+
+    def setUp(self):
+        self.user = get_user_model().objects.create_user(
+            username="fieldsuser", password="fieldspass"
+        )
+        self.client.force_authenticate(user=self.user)
+        customer = Customer.objects.create(display_name="Fields Customer", email="fields@example.com")
+        ContactPerson.objects.create(customer=customer, first_name="Ann", last_name="Lee", email="ann@example.com")
+        item = Item.objects.create(name="Widget", price=5, sku="FIELDS-1")
+        for i in range(3):
+            invoice = Invoice.objects.create(customer=customer, invoice_number=f"F-INV-{i}", invoice_date="2025-01-01", total_amount=10)
+            InvoiceItem.objects.create(invoice=invoice, item=item, quantity=2, rate=5, amount=10)
+        self.invoice = invoice
+        self.url = reverse("invoice-list")
+
+    def test_list_is_compact_by_default(self):
+        row = self.client.get(self.url).data["results"][0]
+        self.assertEqual(set(row["customer"]), {"id", "display_name"})
+        self.assertEqual(set(row["item_details"][0]["item"]), {"id", "name"})
+
+    def test_expand_restores_nested_structures(self):
+        with self.assertNumQueries(8):
+            row = self.client.get(self.url, {"expand": "customer,item_details.item"}).data["results"][0]
+        self.assertEqual(row["customer"]["contact_persons"][0]["first_name"], "Ann")
+        self.assertEqual(row["item_details"][0]["item"]["sku"], "FIELDS-1")
+
+    def test_fields_trims_response(self):
+        rows = self.client.get(self.url, {"fields": "id,invoice_number,customer.display_name"}).data["results"]
+        self.assertEqual(rows[0], {"id": rows[0]["id"], "invoice_number": rows[0]["invoice_number"], "customer": {"display_name": "Fields Customer"}})
+
+    def test_detail_keeps_full_nesting(self):
+        data = self.client.get(reverse("invoice-detail", args=[self.invoice.id])).data
+        self.assertEqual(data["customer"]["email"], "fields@example.com")
+        self.assertEqual(data["item_details"][0]["item"]["sku"], "FIELDS-1")
+
+    def test_fields_do_not_affect_writes(self):
+        data = {"customer_id": self.invoice.customer_id, "invoice_number": "F-INV-NEW", "invoice_date": "2025-02-01", "total_amount": "3.00"}
+        response = self.client.post(self.url + "?fields=id", data)
+        self.assertEqual(response.status_code, status.HTTP_201_CREATED)
+        self.assertEqual(response.data["invoice_number"], "F-INV-NEW")
+
+
+class PaymentInvoiceSummaryTestCase(APITestCase):
+    """Test that payment lists embed a compact invoice at a constant query count."""
+
+    def setUp(self):
+        self.user = get_user_model().objects.create_user(
+            username="payuser", password="paypass"
+        )
+        self.client.force_authenticate(user=self.user)
+        self.customer = Customer.objects.create(display_name="Pay Customer", email="pay@example.com")
+        self.item = Item.objects.create(name="Gadget", price=5, sku="PAY-1")
+        self.url = reverse("payment-list")
+
+    def add_payments(self, count):
+        for _ in range(count):
+            invoice = Invoice.objects.create(customer=self.customer, invoice_number=f"P-INV-{Invoice.objects.count()}", invoice_date="2025-01-01", total_amount=10)
+            InvoiceItem.objects.create(invoice=invoice, item=self.item, quantity=2, rate=5, amount=10)
+            Payment.objects.create(invoice=invoice, amount=4, date="2025-01-02")
+
+    def test_list_embeds_invoice_summary(self):
+        self.add_payments(1)
+        with self.assertNumQueries(2):
+            row = self.client.get(self.url).data["results"][0]
+        self.assertEqual(set(row["invoice"]), {"id", "invoice_number", "invoice_date", "customer", "total_amount", "balance_due"})
+        self.assertEqual(row["invoice"]["customer"]["display_name"], "Pay Customer")
+        self.assertEqual(row["invoice"]["balance_due"], "6.00")
+
+    def test_query_count_does_not_grow_with_page_size(self):
+        for params, queries in [({}, 2), ({"expand": "invoice"}, 6), ({"expand": "invoice.customer,invoice.item_details.item"}, 8)]:
+            Payment.objects.all().delete()
+            self.add_payments(1)
+            with self.assertNumQueries(queries):
+                self.client.get(self.url, params)
+            self.add_payments(9)
+            with self.assertNumQueries(queries):
+                rows = self.client.get(self.url, params).data["results"]
+            self.assertEqual(len(rows), 10)
+        self.assertEqual(rows[0]["invoice"]["item_details"][0]["item"]["sku"], "PAY-1")
+        self.assertEqual(rows[0]["invoice"]["customer"]["email"], "pay@example.com")
+
+    def test_detail_keeps_full_invoice(self):
+        self.add_payments(1)
+        payment = Payment.objects.get()
+        data = self.client.get(reverse("payment-detail", args=[payment.id])).data
+        self.assertEqual(data["invoice"]["customer"]["email"], "pay@example.com")
+
+
+class ListFilterTestCase(APITestCase):
+    """Test the customer, vendor, status and date filters on document lists."""
+
+    def setUp(self):
+        self.user = get_user_model().objects.create_user(
+            username="filteruser", password="filterpass"
+        )
+        self.client.force_authenticate(user=self.user)
+        self.vendors = [Vendor.objects.create(name=f"Filter Vendor {i}", email=f"fv{i}@example.com") for i in range(2)]
+        for i, (vendor, bill_date, status_code) in enumerate([
+            (0, "2025-01-10", "UNPAID"), (1, "2025-02-10", "PAID"), (0, "2025-04-10", "UNPAID"), (0, "2025-02-20", "PARTIAL"),
+        ]):
+            Bill.objects.create(
+                vendor=self.vendors[vendor], bill_number=f"F-BILL-{i}", status=status_code,
+                bill_date=bill_date, due_date=bill_date, total_amount=10,
+            )
+        self.customers = [Customer.objects.create(display_name=f"Filter Customer {i}", email=f"fc{i}@example.com") for i in range(2)]
+        for i, customer in enumerate(self.customers):
+            invoice = Invoice.objects.create(customer=customer, invoice_number=f"F-INV-{i}", invoice_date="2025-03-01", total_amount=10)
+            Payment.objects.create(invoice=invoice, amount=4, date="2025-03-02")
+
+    def bill_numbers(self, params):
+        response = self.client.get(reverse("bill-list"), params)
+        self.assertEqual(response.status_code, status.HTTP_200_OK)
+        return sorted(row["bill_number"] for row in response.data["results"])
+
+    def test_unpaid_bills_for_vendor_in_quarter(self):
+        params = {"vendor_id": self.vendors[0].id, "status": "UNPAID,PARTIAL", "bill_date_from": "2025-01-01", "bill_date_to": "2025-03-31"}
+        self.assertEqual(self.bill_numbers(params), ["F-BILL-0", "F-BILL-3"])
+
+    def test_single_filters(self):
+        self.assertEqual(self.bill_numbers({"status": "PAID"}), ["F-BILL-1"])
+        self.assertEqual(self.bill_numbers({"due_date_from": "2025-02-15"}), ["F-BILL-2", "F-BILL-3"])
+        self.assertEqual(len(self.bill_numbers({})), 4)
+
+    def test_customer_filters(self):
+        customer = self.customers[1]
+        invoices = self.client.get(reverse("invoice-list"), {"customer_id": customer.id}).data["results"]
+        self.assertEqual([row["invoice_number"] for row in invoices], ["F-INV-1"])
+        payments = self.client.get(reverse("payment-list"), {"customer_id": customer.id}).data["results"]
+        self.assertEqual([row["invoice"]["invoice_number"] for row in payments], ["F-INV-1"])
+
+    def test_invalid_values(self):
+        self.assertEqual(self.client.get(reverse("bill-list"), {"vendor_id": "x"}).status_code, status.HTTP_400_BAD_REQUEST)
+        self.assertEqual(self.client.get(reverse("bill-list"), {"bill_date_from": "soon"}).status_code, status.HTTP_400_BAD_REQUEST)
+
+    def test_filters_do_not_hide_details(self):
+        bill = Bill.objects.get(bill_number="F-BILL-1")
+        response = self.client.get(reverse("bill-detail", args=[bill.id]), {"status": "UNPAID"})
+        self.assertEqual(response.status_code, status.HTTP_200_OK)
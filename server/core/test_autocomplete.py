@@ -0,0 +1,72 @@
+from django.contrib.auth import get_user_model
+from django.core.cache import cache
+from django.urls import reverse
+from rest_framework.test import APITestCase
+
+from .autocomplete import _version_key, suggest
+from .models import Customer, Item, Vendor
+from .testing import local_cache
+
+
+class AutocompleteTestCase(APITestCase):
+    """Test the picker suggestions and their per-process cache."""
+    def setUp(self):
+        cache.clear()
+        self.user = get_user_model().objects.create_user(username="pickuser", password="pickpass")
+        self.client.force_authenticate(user=self.user)
+        for name in ("Acme Traders", "acme labs", "Apex Corp", "Zenith"):
+            Customer.objects.create(display_name=name, email=f"{name.split()[0].lower()}{len(name)}@example.com")
+        Vendor.objects.create(name="Acme Supplies", email="supplies@example.com")
+        Item.objects.create(name="Copper Wire", sku="CW-1", price=5)
+
+    def suggest(self, kind, **params):
+        response = self.client.get(reverse("autocomplete", args=[kind]), params)
+        self.assertEqual(response.status_code, 200)
+        return response.data["results"]
+
+    def test_prefix_is_case_insensitive_and_ordered(self):
+        labels = [row["label"] for row in self.suggest("customer", q="ACME")]
+        self.assertEqual(labels, ["acme labs", "Acme Traders"])
+        self.assertEqual(len(self.suggest("customer", q="a", limit=2)), 2)
+        self.assertEqual(len(self.suggest("customer")), 4)
+
+    def test_prefix_matches_punctuation_exactly(self):
+        for i, name in enumerate(("A-B Logistics", "Abz Foods", "A-😀 Emoji")):
+            Customer.objects.create(display_name=name, email=f"punct{i}@example.com")
+        self.assertEqual([row["label"] for row in self.suggest("customer", q="a-b")], ["A-B Logistics"])
+        self.assertEqual([row["label"] for row in self.suggest("customer", q="a-")], ["A-B Logistics", "A-😀 Emoji"])
+
+    def test_rows_carry_only_key_fields(self):
+        row = self.suggest("item", q="cop")[0]
+        self.assertEqual(row, {"id": Item.objects.get().id, "label": "Copper Wire", "sku": "CW-1", "price": "5.00"})
+        self.assertEqual(set(self.suggest("vendor", q="acme")[0]), {"id", "label", "company_name", "email"})
+
+    @local_cache()
+    def test_repeat_prefix_is_served_from_cache(self):
+        self.suggest("customer", q="ze")
+        with self.assertNumQueries(0):
+            suggest("customer", "ze")
+
+    def test_saves_and_deletes_invalidate(self):
+        self.assertEqual(len(self.suggest("customer", q="zen")), 1)
+        Customer.objects.create(display_name="Zenon", email="zenon@example.com")
+        self.assertEqual(len(self.suggest("customer", q="zen")), 2)
+        Customer.objects.filter(display_name="Zenith").get().delete()
+        self.assertEqual([row["label"] for row in self.suggest("customer", q="zen")], ["Zenon"])
+
+    def test_other_workers_see_invalidations(self):
+        self.suggest("customer", q="zen")
+        # A write this process never saw: only the shared token tells it
+        Customer.objects.filter(display_name="Zenith").update(display_name="Zenobia")
+        self.assertEqual(suggest("customer", "zen")[0]["label"], "Zenith")
+        cache.set(_version_key("customer"), 1, None)
+        self.assertEqual(suggest("customer", "zen")[0]["label"], "Zenobia")
+
+    def test_token_is_replaced_again_on_commit(self):
+        with self.captureOnCommitCallbacks(execute=True):
+            Customer.objects.create(display_name="Zenon", email="zenon@example.com")
+            before_commit = cache.get(_version_key("customer"))
+        self.assertNotEqual(cache.get(_version_key("customer")), before_commit)
+
+    def test_unknown_kind(self):
+        self.assertEqual(self.client.get(reverse("autocomplete", args=["bill"])).status_code, 404)
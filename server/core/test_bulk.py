@@ -0,0 +1,158 @@
+from datetime import date
+from decimal import Decimal
+
+from django.contrib.auth import get_user_model
+from django.db import connection
+from django.test.utils import CaptureQueriesContext
+from django.urls import reverse
+from rest_framework.test import APITestCase
+
+from .models import (
+    Bill, BillItem, ChangeEvent, Customer, CustomerDailySummary, DailySummary, Invoice,
+    InvoiceItem, Item, Payment, SearchEntry, Vendor,
+)
+
+
+class BulkWriteTestCase(APITestCase):
+    """Test the <resource>/bulk/ batch endpoints and their side effects."""
+    def setUp(self):
+        self.user = get_user_model().objects.create_user(username="bulkuser", password="bulkpass")
+        self.client.force_authenticate(user=self.user)
+        self.customer = Customer.objects.create(display_name="Bulk Customer", email="bulk@example.com")
+        self.other = Customer.objects.create(display_name="Other Customer", email="other@example.com")
+        self.item = Item.objects.create(name="Bulk Widget", sku="BW-1", price=5)
+        self.day = date(2025, 3, 1)
+
+    def send(self, method, resource, rows):
+        with self.captureOnCommitCallbacks(execute=True):
+            response = getattr(self.client, method)(reverse(f"{resource}-bulk"), rows, format="json")
+        self.assertEqual(response.status_code, 200)
+        return response.data["results"]
+
+    def invoice_rows(self, count, start=0):
+        return [{
+            "customer_id": self.customer.id,
+            "invoice_number": f"BULK-{i}",
+            "invoice_date": str(self.day),
+            "item_details": [{"item_id": self.item.id, "quantity": 2, "rate": "5.00"}],
+        } for i in range(start, start + count)]
+
+    def daily(self, field):
+        return getattr(DailySummary.objects.get(date=self.day), field)
+
+    def test_create_reports_per_row_results(self):
+        rows = self.invoice_rows(3)
+        rows[1]["customer_id"] = 999
+        rows.append(dict(rows[0]))
+        results = self.send("post", "invoice", rows)
+        self.assertEqual([row["status"] for row in results], ["invalid", "invalid", "created", "invalid"])
+        self.assertIn("customer_id", results[1]["errors"])
+        self.assertEqual(results[0]["errors"], {"invoice_number": ["Repeated in this batch."]})
+        invoice = Invoice.objects.get()
+        self.assertEqual(invoice.id, results[2]["id"])
+        self.assertEqual(invoice.total_amount, Decimal("10"))
+        self.assertEqual(InvoiceItem.objects.get().invoice_id, invoice.id)
+        results = self.send("post", "invoice", self.invoice_rows(1, start=2))
+        self.assertIn("already exists", results[0]["errors"]["invoice_number"][0])
+
+    def test_query_count_does_not_grow_with_the_batch(self):
+        # The first batch also creates the day's rollup rows
+        self.send("post", "invoice", self.invoice_rows(1))
+        counts = []
+        for start, size in ((10, 5), (100, 50)):
+            with CaptureQueriesContext(connection) as queries:
+                self.send("post", "invoice", self.invoice_rows(size, start=start))
+            counts.append(len(queries))
+        self.assertEqual(counts[0], counts[1])
+        self.assertEqual(Invoice.objects.count(), 56)
+
+    def test_side_effects_match_single_writes(self):
+        self.send("post", "invoice", self.invoice_rows(2))
+        first, second = Invoice.objects.order_by("id")
+        self.assertEqual(self.daily("invoices_total"), Decimal("20"))
+        self.assertEqual(SearchEntry.objects.filter(kind="invoice").count(), 2)
+        self.assertEqual(ChangeEvent.objects.filter(resource="invoice").count(), 2)
+
+        self.send("post", "payment", [
+            {"invoice_id": first.id, "amount": "4.00", "date": str(self.day)},
+            {"invoice_id": first.id, "amount": "1.00", "date": str(self.day)},
+        ])
+        first.refresh_from_db()
+        self.assertEqual((first.amount_paid, first.balance_due), (Decimal("5"), Decimal("5")))
+        self.assertEqual(self.daily("payments_total"), Decimal("5"))
+
+        payment = Payment.objects.order_by("id").first()
+        self.send("patch", "payment", [{"id": payment.id, "invoice_id": second.id}])
+        first.refresh_from_db()
+        second.refresh_from_db()
+        self.assertEqual((first.amount_paid, second.amount_paid), (Decimal("1"), Decimal("4")))
+
+        results = self.send("patch", "invoice", [
+            {"id": second.id, "customer_id": self.other.id},
+            {"id": 999, "order_number": "X"},
+        ])
+        self.assertEqual([row["status"] for row in results], ["updated", "invalid"])
+        self.assertEqual(
+            CustomerDailySummary.objects.get(customer=self.other, date=self.day).payments_total,
+            Decimal("4"),
+        )
+        self.assertEqual(Invoice.objects.get(pk=second.id).total_amount, Decimal("10"))
+
+        results = self.send("delete", "invoice", [first.id, 999])
+        self.assertEqual([row["status"] for row in results], ["deleted", "invalid"])
+        self.assertEqual(self.daily("invoices_total"), Decimal("10"))
+        self.assertEqual(self.daily("payments_total"), Decimal("4"))
+        self.assertFalse(SearchEntry.objects.filter(kind="invoice", object_id=first.id).exists())
+        self.assertTrue(ChangeEvent.objects.get(resource="invoice", object_id=first.id).deleted)
+
+    def test_update_diffs_line_items(self):
+        self.send("post", "invoice", self.invoice_rows(1))
+        invoice = Invoice.objects.get()
+        line = invoice.item_details.get()
+        self.send("patch", "invoice", [{"id": invoice.id, "item_details": [
+            {"id": line.id, "item_id": self.item.id, "quantity": 3, "rate": "5.00"},
+        ]}])
+        line.refresh_from_db()
+        self.assertEqual((line.quantity, line.amount), (3, Decimal("15")))
+        self.assertEqual(Invoice.objects.get().total_amount, Decimal("15"))
+        self.assertEqual(self.daily("invoices_total"), Decimal("15"))
+
+    def test_update_with_partial_lines_and_blank_numbers(self):
+        self.send("post", "invoice", self.invoice_rows(2))
+        first, second = Invoice.objects.order_by("id")
+        line = first.item_details.get()
+        results = self.send("patch", "invoice", [
+            {"id": first.id, "invoice_number": "", "item_details": [{"id": line.id, "quantity": 4}]},
+            {"id": second.id, "invoice_number": "", "item_details": [{"item_id": self.item.id, "quantity": 1}]},
+        ])
+        self.assertEqual([row["status"] for row in results], ["updated", "invalid"])
+        self.assertEqual(results[1]["errors"], {"item_details": [{"rate": ["This field is required."]}]})
+        first.refresh_from_db()
+        line.refresh_from_db()
+        self.assertEqual((first.invoice_number, first.total_amount), ("BULK-0", Decimal("20")))
+        self.assertEqual((line.item_id, line.quantity, line.rate), (self.item.id, 4, Decimal("5")))
+        rows = self.invoice_rows(2, start=10)
+        for row in rows:
+            row["invoice_number"] = ""
+        self.assertEqual([row["status"] for row in self.send("post", "invoice", rows)], ["created"] * 2)
+
+    def test_partial_lines_keep_their_stored_item(self):
+        vendor = Vendor.objects.create(name="Bulk Vendor", email="bulkv@example.com")
+        bill = Bill.objects.create(vendor=vendor, bill_number="BULK-B1", bill_date=self.day, due_date=self.day)
+        line = BillItem.objects.create(bill=bill, item=self.item, quantity=2, rate=5, amount=10)
+        # No row names the item: it comes from the stored line
+        results = self.send("patch", "bill", [{"id": bill.id, "item_details": [{"id": line.id, "rate": "1"}]}])
+        self.assertEqual([row["status"] for row in results], ["updated"])
+        bill.refresh_from_db()
+        line.refresh_from_db()
+        self.assertEqual((line.item_id, line.amount, bill.total_amount), (self.item.id, Decimal("2"), Decimal("2")))
+
+    def test_items_invalidate_suggestions(self):
+        self.assertEqual(self.client.get(reverse("autocomplete", args=["item"]), {"q": "bulk"}).data["results"][0]["label"], "Bulk Widget")
+        self.send("post", "item", [{"name": "Bulk Gadget", "sku": "BW-2", "price": "7.00"}])
+        labels = [row["label"] for row in self.client.get(reverse("autocomplete", args=["item"]), {"q": "bulk"}).data["results"]]
+        self.assertEqual(labels, ["Bulk Gadget", "Bulk Widget"])
+
+    def test_rejects_anything_but_a_list(self):
+        response = self.client.post(reverse("item-bulk"), {"name": "x"}, format="json")
+        self.assertEqual(response.status_code, 400)
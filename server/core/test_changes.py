@@ -0,0 +1,85 @@
+from django.contrib.auth import get_user_model
+from django.urls import reverse
+from rest_framework.test import APITestCase
+
+from .models import ChangeEvent, Customer, Invoice, Payment, Vendor
+from .signals import muted
+
+
+class ChangeFeedTestCase(APITestCase):
+    """Test the per-resource change feeds used for delta sync."""
+    def setUp(self):
+        self.user = get_user_model().objects.create_user(username="syncuser", password="syncpass")
+        self.client.force_authenticate(user=self.user)
+        self.vendors = [Vendor.objects.create(name=f"Sync Vendor {i}", email=f"sync{i}@example.com") for i in range(3)]
+        self.url = reverse("vendor-changes")
+
+    def sync(self, since, **params):
+        response = self.client.get(self.url, {"since": since, **params})
+        self.assertEqual(response.status_code, 200)
+        return response.data
+
+    def test_first_sync_returns_every_record(self):
+        data = self.sync(0)
+        self.assertEqual([row["id"] for row in data["results"]], [vendor.id for vendor in self.vendors])
+        self.assertEqual(data["deleted"], [])
+        self.assertFalse(data["has_more"])
+        self.assertIn("updated_at", data["results"][0])
+
+    def test_only_changes_after_the_cursor(self):
+        cursor = self.sync(0)["cursor"]
+        self.assertEqual(self.sync(cursor)["results"], [])
+        self.vendors[1].name = "Renamed"
+        self.vendors[1].save()
+        deleted_id = self.vendors[2].id
+        self.vendors[2].delete()
+        data = self.sync(cursor)
+        self.assertEqual([row["name"] for row in data["results"]], ["Renamed"])
+        self.assertEqual(data["deleted"], [deleted_id])
+        self.assertEqual(self.sync(data["cursor"])["results"], [])
+
+    def test_repeated_writes_appear_once(self):
+        cursor = self.sync(0)["cursor"]
+        for name in ("One", "Two", "Three"):
+            self.vendors[0].name = name
+            self.vendors[0].save()
+        data = self.sync(cursor)
+        self.assertEqual([row["name"] for row in data["results"]], ["Three"])
+
+    def test_limit_pages_through_the_feed(self):
+        data = self.sync(0, limit=2)
+        self.assertTrue(data["has_more"])
+        self.assertEqual(len(data["results"]), 2)
+        rest = self.sync(data["cursor"], limit=2)
+        self.assertFalse(rest["has_more"])
+        self.assertEqual([row["id"] for row in rest["results"]], [self.vendors[2].id])
+
+    def test_payments_touch_their_invoice(self):
+        customer = Customer.objects.create(display_name="Sync Customer", email="synccust@example.com")
+        invoice = Invoice.objects.create(customer=customer, invoice_number="SYNC-1", invoice_date="2025-01-01", total_amount=10)
+        url = reverse("invoice-changes")
+        cursor = self.client.get(url, {"since": 0}).data["cursor"]
+        before = Invoice.objects.get().updated_at
+        Payment.objects.create(invoice=invoice, amount=4, date="2025-01-02")
+        data = self.client.get(url, {"since": cursor}).data
+        self.assertEqual([row["balance_due"] for row in data["results"]], ["6.00"])
+        self.assertGreater(Invoice.objects.get().updated_at, before)
+
+    def test_late_commits_with_lower_ids_are_not_skipped(self):
+        cursor = self.sync(0)["cursor"]
+        # Two writers: the first takes event id N, the second N + 1, and the
+        # second commits first, so a client reads its event before N exists
+        early = Vendor.objects.create(name="Early", email="early@example.com")
+        event = ChangeEvent.objects.get(resource="vendor", object_id=early.id)
+        ChangeEvent.objects.filter(pk=event.pk).update(id=event.pk + 1000)
+        data = self.sync(cursor)
+        self.assertEqual([row["name"] for row in data["results"]], ["Early"])
+        with muted(Vendor):
+            late = Vendor.objects.create(name="Late", email="late@example.com")
+        ChangeEvent.objects.create(id=event.pk, resource="vendor", object_id=late.id)
+        data = self.sync(data["cursor"])
+        self.assertEqual([row["name"] for row in data["results"]], ["Late"])
+        self.assertEqual(self.sync(data["cursor"])["results"], [])
+
+    def test_invalid_cursor(self):
+        self.assertEqual(self.client.get(self.url, {"since": "later"}).status_code, 400)
@@ -0,0 +1,79 @@
+from django.contrib.auth import get_user_model
+from django.core.cache import cache
+from django.urls import reverse
+from django.utils.http import http_date
+from rest_framework.test import APITestCase
+
+from .models import Customer, Invoice, Vendor
+from .testing import local_cache
+
+
+class ConditionalGetTestCase(APITestCase):
+    """Test ETag, Last-Modified and 304 responses on resources and reports."""
+    def setUp(self):
+        cache.clear()
+        self.user = get_user_model().objects.create_user(username="etaguser", password="etagpass")
+        self.client.force_authenticate(user=self.user)
+        self.customer = Customer.objects.create(display_name="ETag Customer", email="etag@example.com")
+        self.invoice = Invoice.objects.create(customer=self.customer, invoice_number="ETAG-1", invoice_date="2025-01-01", total_amount=10)
+        self.detail = reverse("invoice-detail", args=[self.invoice.id])
+        self.list = reverse("invoice-list")
+
+    def revalidate(self, url, etag, **params):
+        return self.client.get(url, params, HTTP_IF_NONE_MATCH=etag)
+
+    def test_unchanged_detail_is_304_after_one_query(self):
+        etag = self.client.get(self.detail)["ETag"]
+        with self.assertNumQueries(1):
+            response = self.revalidate(self.detail, etag)
+        self.assertEqual(response.status_code, 304)
+        self.assertEqual(response["ETag"], etag)
+        self.assertFalse(response.content)
+
+    def test_detail_changes_with_row_and_nested_rows(self):
+        etag = self.client.get(self.detail)["ETag"]
+        self.invoice.order_number = "PO-9"
+        self.invoice.save()
+        response = self.revalidate(self.detail, etag)
+        self.assertEqual(response.status_code, 200)
+        etag = response["ETag"]
+        self.customer.display_name = "Renamed"
+        self.customer.save()
+        self.assertEqual(self.revalidate(self.detail, etag).status_code, 200)
+
+    def test_representation_params_are_part_of_the_etag(self):
+        etag = self.client.get(self.detail)["ETag"]
+        self.assertEqual(self.revalidate(self.detail, etag, fields="id").status_code, 200)
+
+    def test_if_modified_since_on_detail(self):
+        response = self.client.get(self.detail)
+        last_modified = response["Last-Modified"]
+        self.assertEqual(self.client.get(self.detail, HTTP_IF_MODIFIED_SINCE=last_modified).status_code, 304)
+        self.assertEqual(self.client.get(self.detail, HTTP_IF_MODIFIED_SINCE=http_date(0)).status_code, 200)
+
+    def test_list_etag_follows_writes_to_rendered_models(self):
+        etag = self.client.get(self.list)["ETag"]
+        with self.assertNumQueries(1):
+            self.assertEqual(self.revalidate(self.list, etag).status_code, 304)
+        Vendor.objects.create(name="Unrelated", email="unrelated@example.com")
+        self.assertEqual(self.revalidate(self.list, etag).status_code, 304)
+        self.customer.display_name = "Renamed"
+        self.customer.save()
+        response = self.revalidate(self.list, etag)
+        self.assertEqual(response.status_code, 200)
+        etag = response["ETag"]
+        self.invoice.delete()
+        self.assertEqual(self.revalidate(self.list, etag).status_code, 200)
+
+    def test_missing_detail_is_still_404(self):
+        self.assertEqual(self.client.get(reverse("invoice-detail", args=[999])).status_code, 404)
+
+    @local_cache()
+    def test_report_etag_comes_from_its_cache_key(self):
+        url = reverse("ar-aging-report")
+        etag = self.client.get(url)["ETag"]
+        with self.assertNumQueries(0):
+            self.assertEqual(self.revalidate(url, etag).status_code, 304)
+        with self.captureOnCommitCallbacks(execute=True):
+            Invoice.objects.create(customer=self.customer, invoice_number="ETAG-2", invoice_date="2025-01-02", total_amount=5)
+        self.assertEqual(self.revalidate(url, etag).status_code, 200)
@@ -0,0 +1,127 @@
+from decimal import Decimal
+
+from django.contrib.auth import get_user_model
+from django.db import connection
+from django.test.utils import CaptureQueriesContext
+from django.urls import reverse
+from rest_framework.test import APITestCase
+
+from .models import (
+    ChangeEvent, Customer, DailySummary, DeliveryChallan, Invoice, InvoiceItem,
+    Item, ProformaInvoice, Quote, QuoteItem,
+)
+
+
+class DocumentConversionTestCase(APITestCase):
+    """Test the <resource>/convert/ endpoints."""
+    def setUp(self):
+        self.user = get_user_model().objects.create_user(username="convertuser", password="convertpass")
+        self.client.force_authenticate(user=self.user)
+        self.customer = Customer.objects.create(display_name="Convert Customer", email="convert@example.com")
+        self.item = Item.objects.create(name="Convert Widget", sku="CV-1", price=10)
+
+    def make_quote(self, number, status="accepted", quantity=2):
+        quote = Quote.objects.create(
+            customer=self.customer, quote_number=number, reference_number=f"PO-{number}",
+            quote_date="2025-05-01", expiry_date="2025-05-31", subject="Widgets",
+            discount=10, tax_type="TCS", tax_percentage="18", adjustment=5, status=status,
+        )
+        QuoteItem.objects.create(quote=quote, item=self.item, quantity=quantity, rate=50, amount=quantity * 50)
+        return quote
+
+    def convert(self, quote, to, **extra):
+        with self.captureOnCommitCallbacks(execute=True):
+            return self.client.post(
+                reverse("quote-convert", args=[quote.id]), {"to": to, **extra}, format="json",
+            )
+
+    def test_quote_to_invoice(self):
+        quote = self.make_quote("CV-Q1")
+        response = self.convert(quote, "invoice", date="2025-06-01")
+        self.assertEqual(response.status_code, 201)
+        self.assertEqual(response.data["invoice_number"], "INV-000001")
+        self.assertEqual(response.data["invoice_date"], "2025-06-01")
+        self.assertEqual(response.data["order_number"], "PO-CV-Q1")
+        self.assertEqual(response.data["quote_id"], quote.id)
+        # 100 - 10 discount + 16.20 TCS + 5 adjustment, as on the quote
+        self.assertEqual((response.data["subtotal"], response.data["total_amount"]), ("100.00", "111.20"))
+        line = InvoiceItem.objects.get()
+        self.assertEqual((line.item_id, line.quantity, line.amount), (self.item.id, 2, Decimal("100")))
+        quote.refresh_from_db()
+        self.assertEqual(quote.status, "invoiced")
+        self.assertEqual(DailySummary.objects.get(date="2025-06-01").invoices_total, Decimal("111.20"))
+        self.assertTrue(ChangeEvent.objects.filter(resource="quote", object_id=quote.id).exists())
+        self.assertEqual(self.convert(quote, "invoice").data, {"status": ["Already invoiced."]})
+        self.assertEqual(Invoice.objects.count(), 1)
+
+    def test_quote_to_proforma_keeps_pricing_and_validity(self):
+        quote = self.make_quote("CV-Q2", status="sent")
+        response = self.convert(quote, "proformainvoice", date="2025-05-10")
+        self.assertEqual(response.status_code, 201)
+        proforma = ProformaInvoice.objects.get()
+        self.assertEqual((proforma.subject, proforma.tax_type, proforma.quote_id), ("Widgets", "TCS", quote.id))
+        # 100 - 10 discount + 16.20 TCS + 5 adjustment
+        self.assertEqual((proforma.subtotal, proforma.total_amount), (Decimal("100"), Decimal("111.20")))
+        self.assertEqual(str(proforma.expiry_date), "2025-06-09")
+        quote.refresh_from_db()
+        self.assertEqual(quote.status, "accepted")
+
+        response = self.client.post(
+            reverse("proformainvoice-convert", args=[proforma.id]), {"to": "invoice"}, format="json",
+        )
+        self.assertEqual((response.data["quote_id"], response.data["proforma_invoice_id"]), (quote.id, proforma.id))
+        self.assertEqual(response.data["total_amount"], "111.20")
+        quote.refresh_from_db()
+        self.assertEqual(quote.status, "invoiced")
+        # Not invoiced again directly
+        self.assertEqual(self.convert(quote, "invoice").data, {"status": ["Already invoiced."]})
+        self.assertEqual(Invoice.objects.count(), 1)
+        response = self.client.post(
+            reverse("invoice-convert", args=[response.data["id"]]), {"to": "deliverychallan"}, format="json",
+        )
+        challan = DeliveryChallan.objects.get()
+        self.assertEqual(challan.reference_number, Invoice.objects.get().invoice_number)
+        self.assertEqual((challan.quote_id, challan.proforma_invoice_id), (quote.id, proforma.id))
+        self.assertEqual(challan.item_details.get().quantity, 2)
+
+    def test_refuses_closed_sources_and_unknown_targets(self):
+        quote = self.make_quote("CV-Q3", status="rejected")
+        response = self.convert(quote, "invoice")
+        self.assertEqual(response.status_code, 400)
+        self.assertIn("status", response.data)
+        response = self.convert(self.make_quote("CV-Q4"), "bill")
+        self.assertEqual(response.status_code, 400)
+        self.assertIn("to", response.data)
+        self.assertFalse(Invoice.objects.exists())
+
+    def test_batch_converts_in_a_fixed_number_of_queries(self):
+        quotes = [self.make_quote(f"CV-B{i}", quantity=i + 1) for i in range(12)]
+        quotes[3].status = "expired"
+        quotes[3].save()
+        ids = [quote.id for quote in quotes] + [999]
+
+        def run(ids):
+            with CaptureQueriesContext(connection) as queries:
+                with self.captureOnCommitCallbacks(execute=True):
+                    response = self.client.post(
+                        reverse("quote-convert-many"), {"to": "invoice", "ids": ids}, format="json",
+                    )
+            return response.data["results"], len(queries)
+
+        results, _ = run(ids)
+        self.assertEqual(
+            [row["status"] for row in results],
+            ["created"] * 3 + ["invalid"] + ["created"] * 8 + ["invalid"],
+        )
+        self.assertEqual(results[-1]["errors"], {"id": ["Not found."]})
+        self.assertEqual(Invoice.objects.get(pk=results[11]["id"]).total_amount, Decimal("642.20"))
+        self.assertEqual(Quote.objects.filter(status="invoiced").count(), 11)
+        # Converting again invoices nothing twice
+        results, _ = run(ids)
+        self.assertEqual({row["status"] for row in results}, {"invalid"})
+        self.assertEqual(Invoice.objects.count(), 11)
+
+        _, few = run([str(self.make_quote("CV-C1").id)])
+        self.assertEqual(Quote.objects.get(quote_number="CV-C1").status, "invoiced")
+        _, many = run([self.make_quote(f"CV-D{i}").id for i in range(10)])
+        self.assertEqual(few, many)
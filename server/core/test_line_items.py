@@ -0,0 +1,140 @@
+from decimal import Decimal
+
+from django.contrib.auth import get_user_model
+from django.db import connection
+from django.test.utils import CaptureQueriesContext
+from django.urls import reverse
+from rest_framework.test import APITestCase
+
+from .models import Bill, Customer, Invoice, InvoiceItem, Item, Quote, Vendor
+
+
+class LineItemWriteTestCase(APITestCase):
+    """Test nested item_details writes and the totals computed from them."""
+    def setUp(self):
+        self.user = get_user_model().objects.create_user(username="lineuser", password="linepass")
+        self.client.force_authenticate(user=self.user)
+        self.customer = Customer.objects.create(display_name="Line Customer", email="line@example.com")
+        self.widget = Item.objects.create(name="Widget", sku="LI-W", price=10)
+        self.gadget = Item.objects.create(name="Gadget", sku="LI-G", price=25)
+
+    def create_invoice(self, lines, **extra):
+        return self.client.post(reverse("invoice-list"), {
+            "customer_id": self.customer.id,
+            "invoice_number": "LI-1",
+            "invoice_date": "2025-01-01",
+            "item_details": lines,
+            **extra,
+        }, format="json")
+
+    def test_create_prices_lines_and_totals_on_the_server(self):
+        response = self.create_invoice([
+            {"item_id": self.widget.id, "quantity": 3, "rate": "10.50"},
+            {"item_id": self.gadget.id, "quantity": 1, "rate": "25.00", "amount": "999"},
+        ], total_amount="1.00")
+        self.assertEqual(response.status_code, 201)
+        self.assertEqual([line["amount"] for line in response.data["item_details"]], ["31.50", "25.00"])
+        self.assertEqual(response.data["total_amount"], "56.50")
+        self.assertEqual(response.data["item_details"][0]["item"]["name"], "Widget")
+
+    def test_quote_totals_apply_discount_tax_and_adjustment(self):
+        response = self.client.post(reverse("quote-list"), {
+            "customer_id": self.customer.id,
+            "quote_number": "LI-Q1",
+            "quote_date": "2025-01-01",
+            "expiry_date": "2025-01-31",
+            "discount": "10",
+            "tax_type": "TCS",
+            "tax_percentage": "18",
+            "adjustment": "-2.00",
+            "item_details": [{"item_id": self.widget.id, "quantity": 10, "rate": "10.00"}],
+        }, format="json")
+        self.assertEqual(response.status_code, 201)
+        self.assertEqual(response.data["subtotal"], "100.00")
+        # 100 - 10 discount + 16.20 TCS - 2 adjustment
+        self.assertEqual(response.data["total_amount"], "104.20")
+        quote = Quote.objects.get()
+        response = self.client.patch(
+            reverse("quote-detail", args=[quote.id]), {"tax_type": "TDS"}, format="json",
+        )
+        self.assertEqual(response.data["total_amount"], "71.80")
+
+    def test_bill_totals_are_taxed_per_line(self):
+        vendor = Vendor.objects.create(name="Line Vendor", email="linevendor@example.com")
+        response = self.client.post(reverse("bill-list"), {
+            "vendor_id": vendor.id,
+            "bill_number": "LI-B1",
+            "bill_date": "2025-01-01",
+            "due_date": "2025-01-31",
+            "item_details": [
+                {"item_id": self.widget.id, "quantity": 2, "rate": "50.00", "tax_percentage": "18"},
+                {"item_id": self.gadget.id, "quantity": 1, "rate": "20.00"},
+            ],
+        }, format="json")
+        self.assertEqual(response.status_code, 201)
+        bill = Bill.objects.get()
+        self.assertEqual((bill.subtotal, bill.tax, bill.total_amount), (Decimal("120"), Decimal("18"), Decimal("138")))
+
+    def test_update_diffs_lines_by_id(self):
+        response = self.create_invoice([
+            {"item_id": self.widget.id, "quantity": 1, "rate": "10.00"},
+            {"item_id": self.widget.id, "quantity": 2, "rate": "10.00"},
+            {"item_id": self.gadget.id, "quantity": 1, "rate": "25.00"},
+        ])
+        kept, changed, dropped = [line["id"] for line in response.data["item_details"]]
+        url = reverse("invoice-detail", args=[response.data["id"]])
+        response = self.client.patch(url, {"item_details": [
+            {"id": kept, "item_id": self.widget.id, "quantity": 1, "rate": "10.00"},
+            {"id": changed, "item_id": self.gadget.id, "quantity": 4, "rate": "25.00"},
+            {"item_id": self.gadget.id, "quantity": 1, "rate": "5.00"},
+        ]}, format="json")
+        self.assertEqual(response.status_code, 200)
+        lines = list(InvoiceItem.objects.order_by("id").values_list("id", "item_id", "quantity", "amount"))
+        self.assertEqual(lines[:2], [
+            (kept, self.widget.id, 1, Decimal("10")),
+            (changed, self.gadget.id, 4, Decimal("100")),
+        ])
+        self.assertEqual(len(lines), 3)
+        self.assertNotIn(dropped, [line[0] for line in lines])
+        self.assertEqual(Invoice.objects.get().total_amount, Decimal("115"))
+
+    def test_invalid_lines_write_nothing(self):
+        response = self.create_invoice([{"item_id": 999, "quantity": 1, "rate": "1.00"}])
+        self.assertEqual(response.status_code, 400)
+        self.assertIn("item_details", response.data)
+        self.assertFalse(Invoice.objects.exists())
+        invoice_id = self.create_invoice([{"item_id": self.widget.id, "quantity": 1, "rate": "1.00"}]).data["id"]
+        other = Invoice.objects.create(customer=self.customer, invoice_number="LI-2", invoice_date="2025-01-01")
+        foreign = InvoiceItem.objects.create(invoice=other, item=self.widget, quantity=1, rate=1, amount=1)
+        response = self.client.patch(reverse("invoice-detail", args=[invoice_id]), {"item_details": [
+            {"id": foreign.id, "item_id": self.widget.id, "quantity": 5, "rate": "1.00"},
+        ]}, format="json")
+        self.assertEqual(response.status_code, 400)
+        foreign.refresh_from_db()
+        self.assertEqual(foreign.quantity, 1)
+
+    def test_lines_are_validated_with_one_item_query(self):
+        lines = [{"item_id": self.widget.id, "quantity": i + 1, "rate": "1.00"} for i in range(20)]
+        with CaptureQueriesContext(connection) as queries:
+            self.assertEqual(self.create_invoice(lines).status_code, 201)
+        sql = [query["sql"] for query in queries.captured_queries]
+        validation = sql[:next(i for i, query in enumerate(sql) if query.startswith("INSERT"))]
+        self.assertEqual(sum('FROM "core_item"' in query for query in validation), 1)
+        self.assertEqual(sum(query.startswith('INSERT INTO "core_invoiceitem"') for query in sql), 1)
+
+    def test_partial_lines_in_a_patch(self):
+        response = self.create_invoice([{"item_id": self.widget.id, "quantity": 1, "rate": "10.00"}])
+        url = reverse("invoice-detail", args=[response.data["id"]])
+        line_id = response.data["item_details"][0]["id"]
+        response = self.client.patch(url, {"item_details": [{"id": line_id, "quantity": 3}]}, format="json")
+        self.assertEqual(response.status_code, 200)
+        line = InvoiceItem.objects.get()
+        self.assertEqual((line.item_id, line.quantity, line.rate, line.amount), (self.widget.id, 3, Decimal("10"), Decimal("30")))
+        self.assertEqual(Invoice.objects.get().total_amount, Decimal("30"))
+        response = self.client.patch(url, {"item_details": [
+            {"id": line_id},
+            {"item_id": self.gadget.id, "quantity": 2},
+        ]}, format="json")
+        self.assertEqual(response.status_code, 400)
+        self.assertEqual(response.data["item_details"], [{}, {"rate": ["This field is required."]}])
+        self.assertEqual(InvoiceItem.objects.count(), 1)
@@ -0,0 +1,76 @@
+from django.contrib.auth import get_user_model
+from django.urls import reverse
+from rest_framework.test import APITestCase
+
+from . import numbering
+from .models import Customer, Invoice, NumberCounter, NumberSeries, Quote
+
+
+class NumberSeriesTestCase(APITestCase):
+    """Test server-side document numbers from the number series."""
+    def setUp(self):
+        numbering._blocks.clear()
+        self.user = get_user_model().objects.create_user(username="numberuser", password="numberpass")
+        self.client.force_authenticate(user=self.user)
+        self.customer = Customer.objects.create(display_name="Number Customer", email="number@example.com")
+
+    def create_invoice(self, **extra):
+        response = self.client.post(reverse("invoice-list"), {
+            "customer_id": self.customer.id,
+            "invoice_date": "2025-05-01",
+            **extra,
+        }, format="json")
+        self.assertEqual(response.status_code, 201)
+        return response.data["invoice_number"]
+
+    def test_unnumbered_documents_are_numbered_in_sequence(self):
+        self.assertEqual([self.create_invoice() for _ in range(2)], ["INV-000001", "INV-000002"])
+        self.assertEqual(self.create_invoice(invoice_number="HAND-1"), "HAND-1")
+        self.assertEqual(self.create_invoice(invoice_number=""), "INV-000003")
+        response = self.client.post(reverse("quote-list"), {
+            "customer_id": self.customer.id, "quote_date": "2025-05-01", "expiry_date": "2025-05-31",
+        }, format="json")
+        self.assertEqual(response.data["quote_number"], "Q-000001")
+
+    def test_hand_made_numbers_are_skipped(self):
+        Invoice.objects.create(customer=self.customer, invoice_number="INV-000001", invoice_date="2025-05-01")
+        self.assertEqual(self.create_invoice(), "INV-000002")
+
+    def test_fiscal_year_reset(self):
+        NumberSeries.objects.filter(document="invoice").update(reset_yearly=True, padding=4)
+        self.assertEqual(self.create_invoice(invoice_date="2025-03-31"), "INV-2024-25/0001")
+        self.assertEqual(self.create_invoice(invoice_date="2025-04-01"), "INV-2025-26/0001")
+        self.assertEqual(self.create_invoice(invoice_date="2026-01-15"), "INV-2025-26/0002")
+        NumberSeries.objects.filter(document="invoice").update(fiscal_year_start_month=1)
+        self.assertEqual(self.create_invoice(invoice_date="2026-01-15"), "INV-2026/0001")
+
+    def test_allocation_takes_one_counter_update(self):
+        numbering.allocate(Quote)
+        with self.assertNumQueries(5):
+            # series, then savepoint, UPDATE, SELECT, release
+            self.assertEqual(numbering.allocate(Quote, count=3), ["Q-000002", "Q-000003", "Q-000004"])
+
+    def test_blocks_are_reserved_per_process(self):
+        NumberSeries.objects.filter(document="quote").update(block_size=10)
+        with self.captureOnCommitCallbacks(execute=True):
+            self.assertEqual(numbering.allocate(Quote), ["Q-000001"])
+        self.assertEqual(NumberCounter.objects.get().next_value, 11)
+        with self.assertNumQueries(1):
+            self.assertEqual(numbering.allocate(Quote, count=2), ["Q-000002", "Q-000003"])
+        with self.captureOnCommitCallbacks(execute=True):
+            numbers = numbering.allocate(Quote, count=8)
+        self.assertEqual(numbers[-1], "Q-000011")
+        self.assertEqual(NumberCounter.objects.get().next_value, 21)
+
+    def test_bulk_create_numbers_each_row(self):
+        with self.captureOnCommitCallbacks(execute=True):
+            response = self.client.post(reverse("invoice-bulk"), [
+                {"customer_id": self.customer.id, "invoice_date": "2025-05-01"},
+                {"customer_id": self.customer.id, "invoice_date": "2025-05-01", "invoice_number": "INV-000002"},
+                {"customer_id": self.customer.id, "invoice_date": "2025-05-01"},
+            ], format="json")
+        self.assertEqual([row["status"] for row in response.data["results"]], ["created"] * 3)
+        self.assertEqual(
+            sorted(Invoice.objects.values_list("invoice_number", flat=True)),
+            ["INV-000001", "INV-000002", "INV-000003"],
+        )
@@ -0,0 +1,85 @@
+from django.contrib.auth import get_user_model
+from django.core.cache import cache
+from django.urls import reverse
+from django.utils import timezone
+from rest_framework.test import APITestCase
+
+from .models import Vendor
+from .testing import local_cache
+
+
+class ListPaginationTestCase(APITestCase):
+    """Test keyset pagination on the ModelViewSets and the legacy page mode."""
+    def setUp(self):
+        self.user = get_user_model().objects.create_user(username="pageuser", password="pagepass")
+        self.client.force_authenticate(user=self.user)
+        Vendor.objects.bulk_create([Vendor(name=f"Vendor {i}", email=f"v{i}@example.com") for i in range(25)])
+        # Shared timestamps make the id tiebreaker carry the order
+        Vendor.objects.filter(id__lte=Vendor.objects.order_by("id")[12].id).update(created_at=timezone.now())
+        self.url = reverse("vendor-list")
+        cache.clear()
+
+    def test_cursor_pages_cover_every_row_once_in_order(self):
+        response = self.client.get(self.url)
+        self.assertNotIn("count", response.data)
+        seen = []
+        while True:
+            seen += [row["id"] for row in response.data["results"]]
+            if not response.data["next"]:
+                break
+            # The page itself, after the ETag validator query
+            with self.assertNumQueries(2) as queries:
+                response = self.client.get(response.data["next"])
+            self.assertNotIn("OFFSET", queries.captured_queries[-1]["sql"])
+        expected = list(Vendor.objects.order_by("-created_at", "-id").values_list("id", flat=True))
+        self.assertEqual(seen, expected)
+
+    def test_page_param_keeps_legacy_mode(self):
+        response = self.client.get(self.url, {"page": 2})
+        self.assertEqual(response.data["count"], 25)
+        self.assertEqual(len(response.data["results"]), 10)
+        self.assertIn("page=3", response.data["next"])
+        self.assertIsNotNone(response.data["previous"])
+
+    def test_invalid_cursor(self):
+        self.assertEqual(self.client.get(self.url, {"cursor": "nope"}).status_code, 404)
+
+    def test_page_size_is_bounded_in_both_modes(self):
+        Vendor.objects.bulk_create([Vendor(name=f"More {i}", email=f"m{i}@example.com") for i in range(100)])
+        self.assertEqual(len(self.client.get(self.url, {"page_size": 5}).data["results"]), 5)
+        self.assertEqual(len(self.client.get(self.url, {"page_size": 500}).data["results"]), 100)
+        response = self.client.get(self.url, {"page": 1, "page_size": 500})
+        self.assertEqual(len(response.data["results"]), 100)
+
+    def test_count_none_skips_the_count_query(self):
+        with self.assertNumQueries(2) as queries:
+            response = self.client.get(self.url, {"page": 2, "count": "none"})
+        self.assertNotIn("COUNT", queries.captured_queries[-1]["sql"].upper())
+        self.assertNotIn("count", response.data)
+        self.assertEqual(len(response.data["results"]), 10)
+        self.assertIn("page=3", response.data["next"])
+        self.assertNotIn("page=", response.data["previous"])
+
+        last = self.client.get(self.url, {"page": 3, "count": "none"})
+        self.assertEqual(len(last.data["results"]), 5)
+        self.assertIsNone(last.data["next"])
+        self.assertEqual(self.client.get(self.url, {"page": 4, "count": "none"}).status_code, 404)
+
+    def test_count_none_pages_match_exact_pages(self):
+        for page in (1, 2, 3):
+            exact = self.client.get(self.url, {"page": page}).data["results"]
+            fast = self.client.get(self.url, {"page": page, "count": "none"}).data["results"]
+            self.assertEqual(fast, exact)
+
+    @local_cache()
+    def test_estimated_count_is_cached_off_postgres(self):
+        response = self.client.get(self.url, {"page": 1, "count": "estimated"})
+        self.assertEqual(response.data["count"], 25)
+        with self.assertNumQueries(2):
+            response = self.client.get(self.url, {"page": 2, "count": "estimated"})
+        self.assertEqual(response.data["count"], 25)
+
+    def test_keyset_mode_counts_on_request(self):
+        self.assertEqual(self.client.get(self.url, {"count": "exact"}).data["count"], 25)
+        self.assertEqual(self.client.get(self.url, {"count": "estimated"}).data["count"], 25)
+        self.assertEqual(self.client.get(self.url, {"count": "bogus"}).status_code, 400)
@@ -0,0 +1,148 @@
+from datetime import date
+
+from django.contrib.auth import get_user_model
+from django.test import override_settings
+from django.urls import reverse
+from rest_framework.test import APITestCase
+
+from .models import (
+    Bill, BillItem, ContactPerson, Customer, CustomerDocument, DeliveryChallan,
+    DeliveryChallanItem, InventoryAdjustment, Invoice, InvoiceItem, Item, Payment,
+    ProformaInvoice, ProformaInvoiceItem, Quote, QuoteItem, Vendor,
+)
+from .testing import QueryBudgetMixin
+
+SIZES = (1, 10, 100)
+# Large enough for every row to be serialized at each size
+PAGE = {"page_size": max(SIZES)}
+TODAY = date(2025, 1, 1)
+
+
+class Fixtures:
+    """Builds rows with every relation the serializers render."""
+
+    def __init__(self):
+        self.serial = 0
+        self.document = CustomerDocument.objects.create(file="budget.pdf")
+        self.items = [Item.objects.create(name=f"Budget Item {i}", price=5, sku=f"BUDGET-{i}") for i in range(2)]
+
+    def number(self, prefix):
+        self.serial += 1
+        return f"{prefix}-{self.serial}"
+
+    def add_lines(self, model, owner_field, owner):
+        model.objects.bulk_create([model(**{owner_field: owner}, item=item, quantity=1, rate=5, amount=5) for item in self.items])
+
+    def customer(self):
+        customer = Customer.objects.create(display_name=self.number("Customer"), email=f"{self.number('c')}@example.com")
+        ContactPerson.objects.create(customer=customer, first_name="Budget", last_name="Contact", email="contact@example.com")
+        customer.documents.add(self.document)
+        return customer
+
+    def vendor(self):
+        return Vendor.objects.create(name=self.number("Vendor"), email=f"{self.number('v')}@example.com")
+
+    def item(self):
+        return Item.objects.create(name=self.number("Item"), price=5, sku=self.number("SKU"))
+
+    def invoice(self):
+        invoice = Invoice.objects.create(customer=self.customer(), invoice_number=self.number("INV"), invoice_date=TODAY, total_amount=10)
+        self.add_lines(InvoiceItem, "invoice", invoice)
+        invoice.files.add(self.document)
+        invoice.invoice_files.add(self.document)
+        return invoice
+
+    def bill(self):
+        bill = Bill.objects.create(vendor=self.vendor(), bill_number=self.number("BILL"), bill_date=TODAY, due_date=TODAY, total_amount=10)
+        for item in self.items:
+            BillItem.objects.create(bill=bill, item=item, quantity=1, rate=5, amount=5)
+        return bill
+
+    def payment(self):
+        return Payment.objects.create(invoice=self.invoice(), amount=4, date=TODAY)
+
+    def quote(self):
+        quote = Quote.objects.create(customer=self.customer(), quote_number=self.number("QT"), quote_date=TODAY, expiry_date=TODAY)
+        self.add_lines(QuoteItem, "quote", quote)
+        quote.quote_files.add(self.document)
+        return quote
+
+    def proformainvoice(self):
+        proforma = ProformaInvoice.objects.create(customer=self.customer(), invoice_number=self.number("PI"), invoice_date=TODAY, expiry_date=TODAY)
+        self.add_lines(ProformaInvoiceItem, "proforma_invoice", proforma)
+        proforma.proforma_invoice_files.add(self.document)
+        return proforma
+
+    def deliverychallan(self):
+        challan = DeliveryChallan.objects.create(customer=self.customer(), challan_number=self.number("DC"), date=TODAY, challan_type="others")
+        self.add_lines(DeliveryChallanItem, "delivery_challan", challan)
+        challan.delivery_challan_files.add(self.document)
+        return challan
+
+    def inventoryadjustment(self):
+        return InventoryAdjustment.objects.create(item=self.items[0], adjustment_number=self.number("ADJ"), date=TODAY, quantity=3)
+
+
+# basename -> (list budget, detail budget), each including the one query
+# that reads the ETag validators (see core.views.ConditionalGetMixin)
+BUDGETS = {
+    "customer": (4, 4),
+    "vendor": (2, 2),
+    "item": (2, 2),
+    "invoice": (6, 8),
+    "bill": (4, 4),
+    "payment": (2, 8),
+    "quote": (5, 7),
+    "proformainvoice": (5, 7),
+    "deliverychallan": (5, 7),
+    "inventoryadjustment": (2, 2),
+}
+
+
+class QueryBudgetTestCase(QueryBudgetMixin, APITestCase):
+    """Test that every list and detail endpoint runs a fixed number of queries."""
+    def setUp(self):
+        self.user = get_user_model().objects.create_user(username="budgetuser", password="budgetpass")
+        self.client.force_authenticate(user=self.user)
+        self.fixtures = Fixtures()
+
+    def check_endpoint(self, basename):
+        list_budget, detail_budget = BUDGETS[basename]
+        build = getattr(self.fixtures, basename)
+        rows, counts = [], set()
+        for size in SIZES:
+            rows += [build() for _ in range(size - len(rows))]
+            with self.assertQueryBudget(list_budget, f"{basename} list with {size} rows") as queries:
+                response = self.client.get(reverse(f"{basename}-list"), PAGE)
+            self.assertEqual(response.status_code, 200)
+            self.assertGreaterEqual(len(response.data["results"]), size)
+            counts.add(len(queries))
+            with self.assertQueryBudget(detail_budget, f"{basename} detail with {size} rows"):
+                response = self.client.get(reverse(f"{basename}-detail", args=[rows[-1].pk]))
+            self.assertEqual(response.status_code, 200)
+        self.assertEqual(len(counts), 1, f"{basename} list queries grow with rows: {sorted(counts)}")
+
+    def test_every_viewset(self):
+        for basename in BUDGETS:
+            with self.subTest(basename):
+                self.check_endpoint(basename)
+
+    def test_file_list(self):
+        for size in SIZES:
+            CustomerDocument.objects.bulk_create([CustomerDocument(file=f"f{i}.pdf") for i in range(size)])
+            with self.assertQueryBudget(1):
+                self.client.get(reverse("file-list"), PAGE)
+
+    @override_settings(QUERY_BUDGET_HEADERS=True)
+    def test_middleware_reports_query_count(self):
+        self.fixtures.invoice()
+        response = self.client.get(reverse("invoice-list"))
+        self.assertEqual(response["X-Query-Count"], str(BUDGETS["invoice"][0]))
+        self.assertIn("X-Query-Time-Ms", response)
+        self.assertIn("X-Response-Time-Ms", response)
+
+    def test_middleware_logs_requests_over_budget(self):
+        self.fixtures.invoice()
+        with override_settings(QUERY_BUDGET=1), self.assertLogs("core.middleware", "WARNING") as logs:
+            self.client.get(reverse("invoice-list"))
+        self.assertIn("over the budget of 1", logs.output[0])
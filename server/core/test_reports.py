@@ -0,0 +1,367 @@
+from datetime import date, timedelta
+from decimal import Decimal
+
+from django.contrib.auth import get_user_model
+from django.core.cache import cache
+from django.db import connection
+from django.test.utils import CaptureQueriesContext
+from django.urls import reverse
+from rest_framework.test import APITestCase
+
+from .models import (
+    Bill, Customer, CustomerDailySummary, DailySummary, Invoice, Payment, Vendor,
+)
+from .rollups import rebuild_daily_summaries, summarize_range
+from .testing import local_cache
+
+
+class ProfitAndLossRollupTestCase(APITestCase):
+    """Test that P&L summaries are served from DailySummary rollups."""
+    def setUp(self):
+        cache.clear()
+        self.user = get_user_model().objects.create_user(username="pluser", password="plpass")
+        self.client.force_authenticate(user=self.user)
+        self.customer = Customer.objects.create(display_name="PL Customer", email="pl@example.com")
+        self.vendor = Vendor.objects.create(name="PL Vendor", email="plv@example.com")
+        self.today = date.today()
+        self.invoice = Invoice.objects.create(customer=self.customer, invoice_number="PL-INV-1", invoice_date=self.today, total_amount=500)
+        Bill.objects.create(vendor=self.vendor, bill_number="PL-BILL-1", bill_date=self.today, due_date=self.today, total_amount=200)
+        Payment.objects.create(invoice=self.invoice, amount=300, date=self.today)
+        self.url = reverse("profit-and-loss-report")
+
+    def test_summary_without_rollups_reads_source_tables(self):
+        resp = self.client.get(self.url, {"time": "This Year", "summary_only": "true"})
+        self.assertEqual(resp.status_code, 200)
+        self.assertEqual(resp.data["report"]["operating_income"], 500.0)
+        self.assertEqual(resp.data["report"]["net_profit_loss"], 300.0)
+        self.assertEqual(resp.data["report"]["payments_received"], 300.0)
+
+    def test_summary_reads_rolled_up_days(self):
+        rebuild_daily_summaries()
+        # A tampered rollup row proves the report did not rescan invoices
+        DailySummary.objects.filter(date=self.today).update(invoices_total=Decimal("999"))
+        resp = self.client.get(self.url, {"time": "This Year", "summary_only": "true"})
+        self.assertEqual(resp.data["report"]["operating_income"], 999.0)
+        self.assertIsNone(resp.data["report"]["invoice_breakdown"])
+
+    def test_summarize_range_adds_days_after_checkpoint(self):
+        yesterday = self.today - timedelta(days=1)
+        rebuild_daily_summaries(end=yesterday)
+        totals = summarize_range(self.today.replace(month=1, day=1), self.today)
+        self.assertEqual(totals["invoices_total"], Decimal("500"))
+        self.assertEqual(totals["bills_total"], Decimal("200"))
+
+    def test_customer_filter_still_reads_invoices(self):
+        other = Customer.objects.create(display_name="Other", email="other@example.com")
+        Invoice.objects.create(customer=other, invoice_number="PL-INV-2", invoice_date=self.today, total_amount=40)
+        rebuild_daily_summaries()
+        resp = self.client.get(self.url, {"time": "This Year", "summary_only": "true", "customer_id": other.id})
+        self.assertEqual(resp.data["report"]["operating_income"], 40.0)
+
+    def test_customer_filter_reads_customer_rollup(self):
+        rebuild_daily_summaries()
+        CustomerDailySummary.objects.filter(customer=self.customer, date=self.today).update(invoices_total=Decimal("777"))
+        with CaptureQueriesContext(connection) as queries:
+            resp = self.client.get(self.url, {"time": "This Year", "summary_only": "true", "customer_id": self.customer.id})
+        self.assertFalse([q for q in queries if '"core_invoice"' in q["sql"] or '"core_payment"' in q["sql"]])
+        self.assertEqual(resp.data["report"]["operating_income"], 777.0)
+        self.assertEqual(resp.data["report"]["payments_received"], 300.0)
+        self.assertEqual(resp.data["report"]["cost_of_goods_sold"], 200.0)
+
+    def test_vendor_filter_narrows_cost(self):
+        other = Vendor.objects.create(name="Other Vendor", email="otherv@example.com")
+        Bill.objects.create(vendor=other, bill_number="PL-BILL-2", bill_date=self.today, due_date=self.today, total_amount=15)
+        for covered in (False, True):
+            if covered:
+                rebuild_daily_summaries()
+                cache.clear()
+            resp = self.client.get(self.url, {"time": "This Year", "vendor_id": other.id})
+            self.assertEqual(resp.data["report"]["cost_of_goods_sold"], 15.0)
+            self.assertEqual(resp.data["report"]["operating_income"], 500.0)
+            self.assertIn(f"vendor_id={other.id}", resp.data["report"]["bill_breakdown"])
+        bills = self.client.get(resp.data["report"]["bill_breakdown"]).data["results"]
+        self.assertEqual([row["bill_number"] for row in bills], ["PL-BILL-2"])
+
+    def test_invalid_party_filter(self):
+        self.assertEqual(self.client.get(self.url, {"customer_id": "abc"}).status_code, 400)
+        self.assertEqual(self.client.get(reverse("timeseries-report"), {"vendor_id": "abc"}).status_code, 400)
+
+    def test_custom_date_range(self):
+        Invoice.objects.create(customer=self.customer, invoice_number="PL-INV-3", invoice_date=date(2020, 5, 5), total_amount=70)
+        rebuild_daily_summaries()
+        resp = self.client.get(self.url, {"start_date": "2020-01-01", "end_date": "2020-12-31", "summary_only": "true"})
+        self.assertEqual(resp.status_code, 200)
+        self.assertEqual(resp.data["period"], "Custom")
+        self.assertEqual(resp.data["report"]["operating_income"], 70.0)
+
+    def test_custom_date_range_validation(self):
+        for params in [{"start_date": "2020-01-01"}, {"start_date": "2020-02-01", "end_date": "2020-01-01"}, {"start_date": "bad", "end_date": "2020-01-01"}]:
+            self.assertEqual(self.client.get(self.url, params).status_code, 400)
+            self.assertEqual(self.client.get(reverse("balance-sheet-report"), params).status_code, 400)
+
+
+class ReportCacheTestCase(APITestCase):
+    """Test caching of report responses and period-scoped invalidation."""
+    def setUp(self):
+        cache.clear()
+        self.user = get_user_model().objects.create_user(username="cacheuser", password="cachepass")
+        self.client.force_authenticate(user=self.user)
+        self.customer = Customer.objects.create(display_name="Cache Customer", email="cache@example.com")
+        self.url = reverse("profit-and-loss-report")
+        self.params = {"time": "This Year", "summary_only": "true"}
+
+    def income(self):
+        return self.client.get(self.url, self.params).data["report"]["operating_income"]
+
+    def test_response_is_cached(self):
+        self.assertEqual(self.income(), 0.0)
+        # Bypass signals: the cached response must be served unchanged
+        Invoice.objects.bulk_create([Invoice(customer=self.customer, invoice_number="C-INV-1", invoice_date=date.today(), total_amount=10)])
+        self.assertEqual(self.income(), 0.0)
+
+    def test_save_in_period_invalidates(self):
+        self.assertEqual(self.income(), 0.0)
+        with self.captureOnCommitCallbacks(execute=True):
+            Invoice.objects.create(customer=self.customer, invoice_number="C-INV-2", invoice_date=date.today(), total_amount=25)
+        self.assertEqual(self.income(), 25.0)
+
+    def test_save_outside_period_keeps_cache(self):
+        self.assertEqual(self.income(), 0.0)
+        Invoice.objects.bulk_create([Invoice(customer=self.customer, invoice_number="C-INV-3", invoice_date=date.today(), total_amount=10)])
+        old = date(date.today().year - 3, 1, 1)
+        Invoice.objects.create(customer=self.customer, invoice_number="C-INV-4", invoice_date=old, total_amount=5)
+        self.assertEqual(self.income(), 0.0)
+
+    def test_balance_sheet_is_cached_per_time(self):
+        url = reverse("balance-sheet-report")
+        today = self.client.get(url, {"time": "Today"})
+        month = self.client.get(url, {"time": "This Month"})
+        self.assertEqual(today.data["time"], "Today")
+        self.assertEqual(month.data["time"], "This Month")
+        self.assertEqual(self.client.get(url, {"time": "Today"}).data, today.data)
+
+    def test_custom_range_is_invalidated_by_any_write(self):
+        params = {"start_date": "2019-01-01", "end_date": "2019-12-31", "summary_only": "true"}
+        self.assertEqual(self.client.get(self.url, params).data["report"]["operating_income"], 0.0)
+        with self.captureOnCommitCallbacks(execute=True):
+            Invoice.objects.create(customer=self.customer, invoice_number="C-INV-5", invoice_date=date(2019, 3, 3), total_amount=8)
+        self.assertEqual(self.client.get(self.url, params).data["report"]["operating_income"], 8.0)
+
+
+class ProfitAndLossBreakdownTestCase(APITestCase):
+    """Test the cursor-paginated invoice and bill breakdown endpoints."""
+    def setUp(self):
+        cache.clear()
+        self.user = get_user_model().objects.create_user(username="bduser", password="bdpass")
+        self.client.force_authenticate(user=self.user)
+        self.customer = Customer.objects.create(display_name="Breakdown Customer", email="bd@example.com")
+        self.vendor = Vendor.objects.create(name="Breakdown Vendor", email="bdv@example.com")
+        Invoice.objects.bulk_create([
+            Invoice(customer=self.customer, invoice_number=f"BD-INV-{i}", invoice_date=date(2024, 1, 1 + i % 3), total_amount=i)
+            for i in range(25)
+        ])
+        Bill.objects.create(vendor=self.vendor, bill_number="BD-BILL-1", bill_date=date(2024, 1, 2), due_date=date(2024, 2, 2), total_amount=9)
+        self.params = {"start_date": "2024-01-01", "end_date": "2024-01-31"}
+
+    def test_report_links_to_breakdowns(self):
+        resp = self.client.get(reverse("profit-and-loss-report"), self.params)
+        self.assertIn("/api/reports/profit-and-loss/invoices/?start_date=2024-01-01", resp.data["report"]["invoice_breakdown"])
+        self.assertIn("/api/reports/profit-and-loss/bills/", resp.data["report"]["bill_breakdown"])
+
+    def test_invoice_pages_cover_every_row_once(self):
+        url = reverse("profit-and-loss-invoices")
+        seen = []
+        resp = self.client.get(url, {**self.params, "page_size": 10})
+        while True:
+            self.assertEqual(resp.status_code, 200)
+            seen += [row["invoice_number"] for row in resp.data["results"]]
+            if not resp.data["next"]:
+                break
+            with self.assertNumQueries(1):
+                resp = self.client.get(resp.data["next"])
+        self.assertEqual(sorted(seen), sorted(f"BD-INV-{i}" for i in range(25)))
+        self.assertEqual(resp.data["results"][-1]["customer"], "Breakdown Customer")
+
+    def test_bill_rows_are_projected(self):
+        resp = self.client.get(reverse("profit-and-loss-bills"), self.params)
+        self.assertEqual(resp.data["results"], [{"id": resp.data["results"][0]["id"], "bill_number": "BD-BILL-1", "date": "2024-01-02", "vendor": "Breakdown Vendor", "total_amount": 9.0}])
+
+    def test_invalid_cursor_and_range(self):
+        url = reverse("profit-and-loss-invoices")
+        self.assertEqual(self.client.get(url, {**self.params, "cursor": "garbage"}).status_code, 404)
+        self.assertEqual(self.client.get(url, {"time": "Someday"}).status_code, 400)
+
+    def test_invalid_customer_id(self):
+        resp = self.client.get(reverse("profit-and-loss-invoices"), {**self.params, "customer_id": "abc"})
+        self.assertEqual(resp.status_code, 400)
+        self.assertEqual(resp.data, {"error": "Invalid customer_id parameter."})
+
+    def test_invalid_vendor_id(self):
+        resp = self.client.get(reverse("profit-and-loss-bills"), {**self.params, "vendor_id": "abc"})
+        self.assertEqual(resp.status_code, 400)
+        self.assertEqual(resp.data, {"error": "Invalid vendor_id parameter."})
+
+
+class BalanceSheetRollupTestCase(APITestCase):
+    """Test the rollup-backed Balance Sheet and its cumulative as_of mode."""
+    def setUp(self):
+        cache.clear()
+        self.user = get_user_model().objects.create_user(username="bsuser", password="bspass")
+        self.client.force_authenticate(user=self.user)
+        self.customer = Customer.objects.create(display_name="BS Customer", email="bs@example.com", opening_balance=1000)
+        vendor = Vendor.objects.create(name="BS Vendor", email="bsv@example.com")
+        invoice = Invoice.objects.create(customer=self.customer, invoice_number="BS-INV-1", invoice_date=date(2023, 5, 1), total_amount=400)
+        Invoice.objects.create(customer=self.customer, invoice_number="BS-INV-2", invoice_date=date(2024, 2, 1), total_amount=600)
+        Payment.objects.create(invoice=invoice, amount=150, date=date(2023, 6, 1))
+        Bill.objects.create(vendor=vendor, bill_number="BS-BILL-1", bill_date=date(2023, 7, 1), due_date=date(2023, 8, 1), total_amount=250)
+        rebuild_daily_summaries()
+        self.url = reverse("balance-sheet-report")
+
+    @local_cache()
+    def test_window_uses_rollups(self):
+        # Checkpoint lookup plus a single YearlySummary row
+        with self.assertNumQueries(2):
+            resp = self.client.get(self.url, {"start_date": "2023-01-01", "end_date": "2023-12-31"})
+        current = resp.data["assets"]["current_assets"]
+        self.assertEqual(current["cash"], 150.0)
+        self.assertEqual(current["accounts_receivable"], 250.0)
+        self.assertEqual(resp.data["liabilities_and_equities"]["liabilities"]["current_liabilities"], 250.0)
+
+    def test_as_of_is_cumulative_from_opening_balance(self):
+        resp = self.client.get(self.url, {"as_of": "2023-12-31"})
+        self.assertEqual(resp.status_code, 200)
+        self.assertEqual(resp.data["time"], "As Of")
+        self.assertEqual(resp.data["as_of"], "2023-12-31")
+        self.assertEqual(resp.data["assets"]["current_assets"]["accounts_receivable"], 1250.0)
+        later = self.client.get(self.url, {"as_of": "2024-12-31"})
+        self.assertEqual(later.data["assets"]["current_assets"]["accounts_receivable"], 1850.0)
+
+    def test_as_of_is_invalidated_by_opening_balance_change(self):
+        self.client.get(self.url, {"as_of": "2023-12-31"})
+        with self.captureOnCommitCallbacks(execute=True):
+            self.customer.opening_balance = 0
+            self.customer.save()
+        resp = self.client.get(self.url, {"as_of": "2023-12-31"})
+        self.assertEqual(resp.data["assets"]["current_assets"]["accounts_receivable"], 250.0)
+
+    def test_invalid_as_of(self):
+        self.assertEqual(self.client.get(self.url, {"as_of": "yesterday"}).status_code, 400)
+
+
+class TimeSeriesReportTestCase(APITestCase):
+    """Test the bucketed time-series report."""
+    def setUp(self):
+        cache.clear()
+        self.user = get_user_model().objects.create_user(username="tsuser", password="tspass")
+        self.client.force_authenticate(user=self.user)
+        customer = Customer.objects.create(display_name="TS Customer", email="ts@example.com")
+        vendor = Vendor.objects.create(name="TS Vendor", email="tsv@example.com")
+        for number, day, amount in [("TS-1", date(2023, 2, 10), 5), ("TS-2", date(2024, 1, 15), 100), ("TS-3", date(2024, 3, 31), 40), ("TS-4", date(2024, 4, 1), 7)]:
+            Invoice.objects.create(customer=customer, invoice_number=number, invoice_date=day, total_amount=amount)
+        Bill.objects.create(vendor=vendor, bill_number="TS-BILL-1", bill_date=date(2024, 1, 20), due_date=date(2024, 2, 20), total_amount=30)
+        self.url = reverse("timeseries-report")
+
+    @local_cache()
+    def test_monthly_buckets_in_one_grouped_query(self):
+        rebuild_daily_summaries()
+        # Checkpoint lookup plus one grouped DailySummary query
+        with self.assertNumQueries(2):
+            resp = self.client.get(self.url, {"interval": "month", "periods": 3, "end_date": "2024-03-15"})
+        self.assertEqual(resp.status_code, 200)
+        self.assertEqual([b["start_date"] for b in resp.data["series"]], ["2024-01-01", "2024-02-01", "2024-03-01"])
+        self.assertEqual(resp.data["series"][-1]["end_date"], "2024-03-15")
+        self.assertEqual(resp.data["series"][0], {"start_date": "2024-01-01", "end_date": "2024-01-31", "income": 100.0, "cost": 30.0, "profit": 70.0, "payments": 0.0})
+        self.assertEqual(resp.data["series"][2]["income"], 0.0)
+
+    def test_quarters_and_weeks(self):
+        rebuild_daily_summaries()
+        quarters = self.client.get(self.url, {"interval": "quarter", "periods": 2, "end_date": "2024-06-30"}).data["series"]
+        self.assertEqual([(b["start_date"], b["income"]) for b in quarters], [("2024-01-01", 140.0), ("2024-04-01", 7.0)])
+        weeks = self.client.get(self.url, {"interval": "week", "periods": 2, "end_date": "2024-04-01"}).data["series"]
+        # 2024-04-01 is a Monday, so 2024-03-31 closes the previous week
+        self.assertEqual([(b["start_date"], b["end_date"], b["income"]) for b in weeks], [("2024-03-25", "2024-03-31", 40.0), ("2024-04-01", "2024-04-01", 7.0)])
+
+    def test_days_after_checkpoint_come_from_source_tables(self):
+        rebuild_daily_summaries(end=date(2024, 1, 31))
+        series = self.client.get(self.url, {"interval": "month", "periods": 4, "end_date": "2024-04-30"}).data["series"]
+        self.assertEqual([b["income"] for b in series], [100.0, 0.0, 40.0, 7.0])
+
+    def test_compare_series(self):
+        resp = self.client.get(self.url, {"interval": "month", "periods": 2, "end_date": "2024-02-29", "compare_with": "previous_year"})
+        self.assertEqual([b["start_date"] for b in resp.data["compare_series"]], ["2023-01-01", "2023-02-01"])
+        self.assertEqual(resp.data["compare_series"][1]["end_date"], "2023-02-28")
+        self.assertEqual(resp.data["compare_series"][1]["income"], 5.0)
+        previous = self.client.get(self.url, {"interval": "month", "periods": 2, "end_date": "2024-04-30", "compare_with": "previous_period"}).data["compare_series"]
+        self.assertEqual([(b["start_date"], b["income"]) for b in previous], [("2024-01-01", 100.0), ("2024-02-01", 0.0)])
+
+    def test_invalid_parameters(self):
+        for params in [{"interval": "fortnight"}, {"periods": 0}, {"periods": "many"}, {"end_date": "soon"}, {"compare_with": "last_decade"}]:
+            self.assertEqual(self.client.get(self.url, params).status_code, 400)
+
+    def test_customer_series(self):
+        rebuild_daily_summaries(end=date(2024, 2, 29))
+        other = Customer.objects.create(display_name="Other TS", email="ots@example.com")
+        Invoice.objects.create(customer=other, invoice_number="TS-5", invoice_date=date(2024, 3, 3), total_amount=3)
+        series = self.client.get(self.url, {"interval": "quarter", "periods": 1, "end_date": "2024-03-31", "customer_id": other.id}).data["series"]
+        self.assertEqual((series[0]["income"], series[0]["cost"]), (3.0, 30.0))
+
+
+class AccountsReceivableAgingTestCase(APITestCase):
+    """Test Invoice.amount_paid/balance_due upkeep and the AR aging report."""
+    def setUp(self):
+        cache.clear()
+        self.user = get_user_model().objects.create_user(username="aruser", password="arpass")
+        self.client.force_authenticate(user=self.user)
+        self.customer = Customer.objects.create(display_name="AR Customer", email="ar@example.com")
+        self.today = date.today()
+        self.url = reverse("ar-aging-report")
+
+    def invoice(self, number, age, amount, customer=None):
+        return Invoice.objects.create(customer=customer or self.customer, invoice_number=number, invoice_date=self.today - timedelta(days=age), total_amount=amount)
+
+    def test_payments_move_amount_paid(self):
+        invoice = self.invoice("AR-1", 0, 100)
+        other = self.invoice("AR-2", 0, 50)
+        payment = Payment.objects.create(invoice=invoice, amount=30, date=self.today)
+        Payment.objects.create(invoice=invoice, amount=20, date=self.today)
+        invoice.refresh_from_db()
+        self.assertEqual((invoice.amount_paid, invoice.balance_due), (Decimal("50"), Decimal("50")))
+        payment.invoice = other
+        payment.amount = 10
+        payment.save()
+        invoice.refresh_from_db()
+        other.refresh_from_db()
+        self.assertEqual(invoice.amount_paid, Decimal("20"))
+        self.assertEqual(other.balance_due, Decimal("40"))
+        payment.delete()
+        other.refresh_from_db()
+        self.assertEqual(other.balance_due, Decimal("50"))
+
+    def test_saving_a_stale_invoice_keeps_amount_paid(self):
+        invoice = self.invoice("AR-3", 0, 100)
+        Payment.objects.create(invoice=invoice, amount=60, date=self.today)
+        invoice.total_amount = 120
+        invoice.save()
+        invoice.refresh_from_db()
+        self.assertEqual((invoice.amount_paid, invoice.balance_due), (Decimal("60"), Decimal("60")))
+
+    @local_cache()
+    def test_aging_buckets(self):
+        for number, age, amount in [("AR-4", 0, 1), ("AR-5", 1, 2), ("AR-6", 30, 4), ("AR-7", 31, 8), ("AR-8", 90, 16), ("AR-9", 91, 32)]:
+            self.invoice(number, age, amount)
+        paid = self.invoice("AR-10", 45, 64)
+        Payment.objects.create(invoice=paid, amount=64, date=self.today)
+        with self.assertNumQueries(1):
+            resp = self.client.get(self.url)
+        self.assertEqual(resp.data["aging"], {"current": 1.0, "1-30": 6.0, "31-60": 8.0, "61-90": 16.0, "90+": 32.0})
+        self.assertEqual(resp.data["total"], 63.0)
+
+    def test_customer_filter_and_invalidation(self):
+        other = Customer.objects.create(display_name="AR Other", email="aro@example.com")
+        invoice = self.invoice("AR-11", 10, 100, customer=other)
+        self.invoice("AR-12", 10, 5)
+        self.assertEqual(self.client.get(self.url, {"customer_id": other.id}).data["total"], 100.0)
+        with self.captureOnCommitCallbacks(execute=True):
+            Payment.objects.create(invoice=invoice, amount=25, date=self.today)
+        self.assertEqual(self.client.get(self.url, {"customer_id": other.id}).data["aging"]["1-30"], 75.0)
+        self.assertEqual(self.client.get(self.url, {"customer_id": "x"}).status_code, 400)
@@ -0,0 +1,239 @@
+import io
+from datetime import date, timedelta
+from decimal import Decimal
+
+from django.core.management import call_command
+from django.db import connection
+from django.test import TestCase
+from django.test.utils import CaptureQueriesContext
+
+from .models import (
+    Bill, Customer, CustomerDailySummary, DailySummary, Invoice, MonthlySummary,
+    Payment, RollupCheckpoint, Vendor, VendorDailySummary, YearlySummary,
+)
+from .rollups import (
+    apply_daily_deltas, rebuild_daily_summaries, since_last_run_start, split_range, summarize_range,
+)
+
+
+class DailySummaryBackfillTestCase(TestCase):
+    """Test the set-based DailySummary backfill and its checkpoint."""
+    def setUp(self):
+        self.customer = Customer.objects.create(display_name="Rollup Customer", email="rollup@example.com")
+        self.vendor = Vendor.objects.create(name="Rollup Vendor", email="rollupv@example.com")
+        self.day1 = date(2025, 1, 10)
+        self.day2 = date(2025, 3, 5)
+        self.invoice = Invoice.objects.create(customer=self.customer, invoice_number="R-INV-1", invoice_date=self.day1, total_amount=100)
+        Invoice.objects.create(customer=self.customer, invoice_number="R-INV-2", invoice_date=self.day1, total_amount=50)
+        Bill.objects.create(vendor=self.vendor, bill_number="R-BILL-1", bill_date=self.day2, due_date=self.day2, total_amount=30)
+        Payment.objects.create(invoice=self.invoice, amount=40, date=self.day2)
+
+    def test_full_rebuild_groups_by_day(self):
+        start, end, written = rebuild_daily_summaries()
+        self.assertEqual(start, self.day1)
+        self.assertEqual(end, date.today())
+        self.assertEqual(written, 2)
+        first = DailySummary.objects.get(date=self.day1)
+        self.assertEqual(first.invoices_total, Decimal("150"))
+        self.assertEqual(first.bills_total, 0)
+        second = DailySummary.objects.get(date=self.day2)
+        self.assertEqual(second.bills_total, Decimal("30"))
+        self.assertEqual(second.payments_total, Decimal("40"))
+        self.assertEqual(RollupCheckpoint.objects.get().covered_through, date.today())
+
+    def test_rebuild_removes_days_without_activity(self):
+        rebuild_daily_summaries()
+        Bill.objects.all().delete()
+        Payment.objects.all().delete()
+        rebuild_daily_summaries(start=self.day2, end=self.day2)
+        self.assertFalse(DailySummary.objects.filter(date=self.day2).exists())
+        self.assertTrue(DailySummary.objects.filter(date=self.day1).exists())
+
+    def test_since_last_run_picks_up_new_backdated_documents(self):
+        self.assertIsNone(since_last_run_start())
+        rebuild_daily_summaries()
+        self.assertEqual(since_last_run_start(), date.today() + timedelta(days=1))
+        backdated = date(2024, 12, 31)
+        Invoice.objects.create(customer=self.customer, invoice_number="R-INV-3", invoice_date=backdated, total_amount=10)
+        self.assertEqual(since_last_run_start(), backdated)
+
+    def test_partial_run_does_not_claim_coverage(self):
+        rebuild_daily_summaries(start=self.day2, end=self.day2)
+        self.assertIsNone(RollupCheckpoint.objects.get().covered_through)
+
+    def test_rebuild_replaces_each_year_in_its_own_transaction(self):
+        Invoice.objects.create(customer=self.customer, invoice_number="R-INV-3", invoice_date=date(2024, 12, 31), total_amount=10)
+        rebuild_daily_summaries()
+        with CaptureQueriesContext(connection) as queries:
+            rebuild_daily_summaries()
+        sql = [query["sql"] for query in queries.captured_queries]
+        begins = [i for i, query in enumerate(sql) if query.startswith("SAVEPOINT")]
+        aggregates = [i for i, query in enumerate(sql) if 'FROM "core_invoice" WHERE' in query]
+        # 2024, 2025..today, then the checkpoint
+        self.assertEqual(len(begins), date.today().year - 2024 + 2)
+        # Each year is aggregated inside its own transaction
+        for begin, next_begin in zip(begins, begins[1:]):
+            self.assertTrue(any(begin < i < next_begin for i in aggregates))
+        checkpoint = [i for i, query in enumerate(sql) if 'FROM "core_rollupcheckpoint"' in query]
+        self.assertGreater(checkpoint[0], begins[-1])
+        self.assertEqual(YearlySummary.objects.get(year=2024).invoices_total, Decimal("10"))
+        with CaptureQueriesContext(connection) as queries:
+            apply_daily_deltas({self.day1: {"invoices_total": Decimal("5")}})
+        # Deltas leave the checkpoint alone
+        self.assertFalse(any("core_rollupcheckpoint" in query["sql"] for query in queries.captured_queries))
+        self.assertEqual(DailySummary.objects.get(date=self.day1).invoices_total, Decimal("155"))
+
+    def test_management_command_options(self):
+        call_command("preaggregate_daily_summaries", "--start", "2025-01-01", "--end", "2025-01-31", stdout=io.StringIO())
+        self.assertEqual(list(DailySummary.objects.values_list("date", flat=True)), [self.day1])
+        call_command("preaggregate_daily_summaries", "--since-last-run", stdout=io.StringIO())
+        self.assertEqual(DailySummary.objects.count(), 2)
+
+
+class DailySummarySignalTestCase(TestCase):
+    """Test that document writes keep DailySummary current."""
+    def setUp(self):
+        self.customer = Customer.objects.create(display_name="Delta Customer", email="delta@example.com")
+        self.day1 = date(2025, 6, 1)
+        self.day2 = date(2025, 6, 2)
+
+    def totals(self, day, field):
+        row = DailySummary.objects.filter(date=day).first()
+        return getattr(row, field) if row else None
+
+    def test_create_update_move_and_delete_invoice(self):
+        with self.captureOnCommitCallbacks(execute=True):
+            invoice = Invoice.objects.create(customer=self.customer, invoice_number="D-INV-1", invoice_date=self.day1, total_amount=100)
+        self.assertEqual(self.totals(self.day1, "invoices_total"), Decimal("100"))
+
+        with self.captureOnCommitCallbacks(execute=True):
+            invoice.total_amount = 120
+            invoice.save()
+        self.assertEqual(self.totals(self.day1, "invoices_total"), Decimal("120"))
+
+        with self.captureOnCommitCallbacks(execute=True):
+            invoice.invoice_date = self.day2
+            invoice.save()
+        self.assertEqual(self.totals(self.day1, "invoices_total"), 0)
+        self.assertEqual(self.totals(self.day2, "invoices_total"), Decimal("120"))
+
+        with self.captureOnCommitCallbacks(execute=True):
+            invoice.delete()
+        self.assertEqual(self.totals(self.day2, "invoices_total"), 0)
+
+    def test_cascaded_payment_delete_is_removed(self):
+        with self.captureOnCommitCallbacks(execute=True):
+            invoice = Invoice.objects.create(customer=self.customer, invoice_number="D-INV-2", invoice_date=self.day1, total_amount=50)
+            Payment.objects.create(invoice=invoice, amount=20, date=self.day2)
+        self.assertEqual(self.totals(self.day2, "payments_total"), Decimal("20"))
+        with self.captureOnCommitCallbacks(execute=True):
+            invoice.delete()
+        self.assertEqual(self.totals(self.day2, "payments_total"), 0)
+
+    def test_deltas_match_full_rebuild(self):
+        vendor = Vendor.objects.create(name="Delta Vendor", email="deltav@example.com")
+        with self.captureOnCommitCallbacks(execute=True):
+            Bill.objects.create(vendor=vendor, bill_number="D-BILL-1", bill_date=self.day1, due_date=self.day1, total_amount=75)
+            Bill.objects.create(vendor=vendor, bill_number="D-BILL-2", bill_date=self.day1, due_date=self.day1, total_amount=25)
+        live = self.totals(self.day1, "bills_total")
+        rebuild_daily_summaries()
+        self.assertEqual(live, self.totals(self.day1, "bills_total"))
+
+
+class HierarchicalRollupTestCase(TestCase):
+    """Test monthly and yearly rollups and range decomposition."""
+    def setUp(self):
+        self.customer = Customer.objects.create(display_name="Tree Customer", email="tree@example.com")
+        for number, day, amount in [
+            ("T-1", date(2022, 12, 30), 1), ("T-2", date(2023, 2, 14), 10),
+            ("T-3", date(2023, 11, 3), 100), ("T-4", date(2024, 7, 1), 1000),
+            ("T-5", date(2025, 1, 2), 10000),
+        ]:
+            Invoice.objects.create(customer=self.customer, invoice_number=number, invoice_date=day, total_amount=amount)
+
+    def test_split_range_uses_whole_years_and_months(self):
+        days, months, years = split_range(date(2022, 12, 30), date(2025, 2, 3))
+        self.assertEqual(years, (2023, 2024))
+        self.assertEqual(months, [(date(2025, 1, 1), date(2025, 1, 1))])
+        self.assertEqual(days, [(date(2022, 12, 30), date(2022, 12, 31)), (date(2025, 2, 1), date(2025, 2, 3))])
+
+    def test_split_range_within_a_month(self):
+        self.assertEqual(split_range(date(2024, 3, 5), date(2024, 3, 9)), ([(date(2024, 3, 5), date(2024, 3, 9))], [], None))
+
+    def test_backfill_builds_month_and_year_rows(self):
+        rebuild_daily_summaries()
+        self.assertEqual(MonthlySummary.objects.get(month=date(2023, 11, 1)).invoices_total, Decimal("100"))
+        self.assertEqual(YearlySummary.objects.get(year=2023).invoices_total, Decimal("110"))
+        self.assertEqual(YearlySummary.objects.count(), 4)
+
+    def test_arbitrary_ranges_match_source_totals(self):
+        rebuild_daily_summaries()
+        for start, end, expected in [
+            (date(2022, 12, 30), date(2025, 2, 3), 11111),
+            (date(2023, 2, 15), date(2024, 7, 1), 1100),
+            (date(2023, 1, 1), date(2023, 12, 31), 110),
+            (date(2024, 7, 2), date(2024, 12, 31), 0),
+        ]:
+            with CaptureQueriesContext(connection) as queries:
+                totals = summarize_range(start, end)
+            self.assertLessEqual(len(queries), 4)
+            self.assertEqual(totals["invoices_total"], Decimal(expected), (start, end))
+
+    def test_deltas_reach_month_and_year_rows(self):
+        rebuild_daily_summaries()
+        invoice = Invoice.objects.get(invoice_number="T-4")
+        with self.captureOnCommitCallbacks(execute=True):
+            invoice.invoice_date = date(2023, 11, 20)
+            invoice.save()
+        self.assertEqual(MonthlySummary.objects.get(month=date(2024, 7, 1)).invoices_total, 0)
+        self.assertEqual(MonthlySummary.objects.get(month=date(2023, 11, 1)).invoices_total, Decimal("1100"))
+        self.assertEqual(YearlySummary.objects.get(year=2023).invoices_total, Decimal("1110"))
+        self.assertEqual(YearlySummary.objects.get(year=2024).invoices_total, 0)
+
+
+class PartyRollupTestCase(TestCase):
+    """Test the per-customer and per-vendor daily rollups."""
+    def setUp(self):
+        self.alice = Customer.objects.create(display_name="Alice", email="alice@example.com")
+        self.bob = Customer.objects.create(display_name="Bob", email="bob@example.com")
+        self.vendor = Vendor.objects.create(name="Party Vendor", email="partyv@example.com")
+        self.day1 = date(2025, 4, 1)
+        self.day2 = date(2025, 4, 2)
+
+    def row(self, customer, day):
+        return CustomerDailySummary.objects.filter(customer=customer, date=day).values("invoices_total", "payments_total").first()
+
+    def test_backfill_groups_by_party_and_day(self):
+        invoice = Invoice.objects.create(customer=self.alice, invoice_number="P-INV-1", invoice_date=self.day1, total_amount=100)
+        Invoice.objects.create(customer=self.bob, invoice_number="P-INV-2", invoice_date=self.day1, total_amount=7)
+        Payment.objects.create(invoice=invoice, amount=60, date=self.day2)
+        Bill.objects.create(vendor=self.vendor, bill_number="P-BILL-1", bill_date=self.day2, due_date=self.day2, total_amount=30)
+        rebuild_daily_summaries()
+        self.assertEqual(self.row(self.alice, self.day1), {"invoices_total": Decimal("100"), "payments_total": 0})
+        self.assertEqual(self.row(self.alice, self.day2), {"invoices_total": 0, "payments_total": Decimal("60")})
+        self.assertEqual(self.row(self.bob, self.day1)["invoices_total"], Decimal("7"))
+        self.assertEqual(VendorDailySummary.objects.get(vendor=self.vendor, date=self.day2).bills_total, Decimal("30"))
+
+    def test_customer_change_moves_invoice_and_payments(self):
+        with self.captureOnCommitCallbacks(execute=True):
+            invoice = Invoice.objects.create(customer=self.alice, invoice_number="P-INV-3", invoice_date=self.day1, total_amount=100)
+            Payment.objects.create(invoice=invoice, amount=40, date=self.day2)
+        with self.captureOnCommitCallbacks(execute=True):
+            invoice.customer = self.bob
+            invoice.save()
+        self.assertEqual(self.row(self.alice, self.day1)["invoices_total"], 0)
+        self.assertEqual(self.row(self.alice, self.day2)["payments_total"], 0)
+        self.assertEqual(self.row(self.bob, self.day1)["invoices_total"], Decimal("100"))
+        self.assertEqual(self.row(self.bob, self.day2)["payments_total"], Decimal("40"))
+        live = set(CustomerDailySummary.objects.exclude(invoices_total=0, payments_total=0).values_list("customer", "date", "invoices_total", "payments_total"))
+        rebuild_daily_summaries()
+        self.assertEqual(live, set(CustomerDailySummary.objects.values_list("customer", "date", "invoices_total", "payments_total")))
+
+    def test_deleting_a_party_drops_its_rows(self):
+        with self.captureOnCommitCallbacks(execute=True):
+            invoice = Invoice.objects.create(customer=self.alice, invoice_number="P-INV-4", invoice_date=self.day1, total_amount=10)
+            Payment.objects.create(invoice=invoice, amount=5, date=self.day1)
+        with self.captureOnCommitCallbacks(execute=True):
+            self.alice.delete()
+        self.assertFalse(CustomerDailySummary.objects.exists())
+        self.assertEqual(DailySummary.objects.get(date=self.day1).invoices_total, 0)
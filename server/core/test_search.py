@@ -0,0 +1,80 @@
+import io
+
+from django.contrib.auth import get_user_model
+from django.core.management import call_command
+from django.urls import reverse
+from rest_framework.test import APITestCase
+
+from .models import Bill, Customer, Invoice, Item, SearchEntry, Vendor
+from .search import fts_available, search
+
+
+class SearchTestCase(APITestCase):
+    """Test the maintained search index and the /api/search/ endpoint."""
+    def setUp(self):
+        self.user = get_user_model().objects.create_user(username="searchuser", password="searchpass")
+        self.client.force_authenticate(user=self.user)
+        self.customer = Customer.objects.create(
+            display_name="Acme Traders", company_name="Acme Traders Pvt Ltd",
+            email="accounts@acme.example.com", pan="ABCDE1234F", mobile="9876543210",
+        )
+        Customer.objects.create(display_name="Globex", email="hello@globex.example.com")
+        self.vendor = Vendor.objects.create(name="Acme Supplies", email="sales@supplies.example.com")
+        self.item = Item.objects.create(name="Copper Wire", sku="CW-2040", price=5, description="Insulated, 2 mm")
+        Invoice.objects.create(customer=self.customer, invoice_number="INV-77812", invoice_date="2025-01-01", total_amount=10)
+        self.bill = Bill.objects.create(
+            vendor=self.vendor, bill_number="BILL-5521", bill_date="2025-01-02", due_date="2025-01-30", total_amount=10,
+        )
+        self.url = reverse("search")
+
+    def results(self, **params):
+        response = self.client.get(self.url, params)
+        self.assertEqual(response.status_code, 200)
+        return [(row["kind"], row["title"]) for row in response.data["results"]]
+
+    def test_signals_index_every_source(self):
+        self.assertEqual(SearchEntry.objects.count(), 6)
+        self.assertEqual(
+            set(SearchEntry.objects.values_list("kind", flat=True)),
+            {"customer", "vendor", "item", "invoice", "bill"},
+        )
+
+    def test_partial_matches_on_any_indexed_field(self):
+        self.assertEqual(self.results(q="acme trad"), [("customer", "Acme Traders")])
+        self.assertEqual(self.results(q="ABCDE1234"), [("customer", "Acme Traders")])
+        self.assertEqual(self.results(q="543210"), [("customer", "Acme Traders")])
+        self.assertEqual(self.results(q="cw-20"), [("item", "Copper Wire")])
+        self.assertEqual(self.results(q="77812"), [("invoice", "INV-77812")])
+        self.assertEqual(sorted(self.results(q="acme")), [("customer", "Acme Traders"), ("vendor", "Acme Supplies")])
+
+    def test_kind_and_limit(self):
+        self.assertEqual(self.results(q="acme", kind="vendor"), [("vendor", "Acme Supplies")])
+        self.assertEqual(len(self.results(q="example", limit=1)), 1)
+        self.assertEqual(self.client.get(self.url, {"q": "acme", "kind": "nope"}).status_code, 400)
+        self.assertEqual(self.client.get(self.url).status_code, 400)
+
+    def test_short_terms_fall_back_to_like(self):
+        self.assertEqual(self.results(q="cw 2 mm"), [("item", "Copper Wire")])
+
+    def test_entries_follow_updates_and_deletes(self):
+        self.vendor.name = "Initech"
+        self.vendor.save()
+        self.assertEqual(self.results(q="initech"), [("vendor", "Initech")])
+        self.assertEqual(self.results(q="acme supplies"), [])
+        self.bill.delete()
+        self.assertEqual(self.results(q="bill-5521"), [])
+
+    def test_search_reads_only_the_index(self):
+        with self.assertNumQueries(1) as queries:
+            search("copper")
+        self.assertNotIn("core_item", queries.captured_queries[0]["sql"])
+        if fts_available():
+            self.assertIn("MATCH", queries.captured_queries[0]["sql"])
+
+    def test_rebuild_command(self):
+        SearchEntry.objects.all().delete()
+        Item.objects.filter(pk=self.item.pk).update(name="Brass Wire")
+        out = io.StringIO()
+        call_command("rebuild_search_index", stdout=out)
+        self.assertIn("Indexed 6 records", out.getvalue())
+        self.assertEqual(self.results(q="brass"), [("item", "Brass Wire")])
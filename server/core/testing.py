@@ -0,0 +1,40 @@
+"""Helpers shared by the core test suites."""
+from contextlib import contextmanager
+
+from django.core.cache import cache
+from django.db import connection
+from django.test import override_settings
+from django.test.utils import CaptureQueriesContext
+
+
+class QueryBudgetMixin:
+    """TestCase mixin for asserting how many queries a block of code runs."""
+
+    @contextmanager
+    def assertQueryBudget(self, budget, msg=None):
+        """
+        Fail if the block runs more than ``budget`` queries. The captured
+        queries, with their SQL and time, are yielded for further checks.
+        """
+        with CaptureQueriesContext(connection) as queries:
+            yield queries
+        if len(queries) > budget:
+            sql = "\n".join(f"{i}. {query['sql']}" for i, query in enumerate(queries, 1))
+            self.fail(f"{msg or 'Query budget exceeded'}: {len(queries)} > {budget}\n{sql}")
+
+
+class local_cache(override_settings):
+    """
+    Run a test on an empty per-process cache, for assertions on query counts
+    that would otherwise also count reads of the database cache table (see
+    CACHES in settings).
+    """
+
+    def __init__(self):
+        super().__init__(CACHES={
+            "default": {"BACKEND": "django.core.cache.backends.locmem.LocMemCache"}
+        })
+
+    def enable(self):
+        super().enable()
+        cache.clear()
@@ -14,7 +14,13 @@ from .views import (
     BillViewSet,
     CustomerDocumentViewSet,
     ProfitAndLossReportView,
+    ProfitAndLossInvoiceBreakdownView,
+    ProfitAndLossBillBreakdownView,
     BalanceSheetReportView,
+    TimeSeriesReportView,
+    SearchView,
+    AutocompleteView,
+    AccountsReceivableAgingView,
 )
 
 
@@ -46,5 +52,11 @@ router.register(r"files", CustomerDocumentViewSet, basename="file")
 urlpatterns = [
     path("", include(router.urls)),
     path("reports/profit-and-loss/", ProfitAndLossReportView.as_view(), name="profit-and-loss-report"),
+    path("reports/profit-and-loss/invoices/", ProfitAndLossInvoiceBreakdownView.as_view(), name="profit-and-loss-invoices"),
+    path("reports/profit-and-loss/bills/", ProfitAndLossBillBreakdownView.as_view(), name="profit-and-loss-bills"),
     path("reports/balance-sheet/", BalanceSheetReportView.as_view(), name="balance-sheet-report"),
+    path("reports/timeseries/", TimeSeriesReportView.as_view(), name="timeseries-report"),
+    path("reports/ar-aging/", AccountsReceivableAgingView.as_view(), name="ar-aging-report"),
+    path("search/", SearchView.as_view(), name="search"),
+    path("autocomplete/<str:kind>/", AutocompleteView.as_view(), name="autocomplete"),
 ]
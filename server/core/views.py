@@ -1,15 +1,21 @@
+import hashlib
+import json
 from datetime import date, timedelta
+from urllib.parse import urlencode
 from django.core.cache import cache
 import calendar
-from django.db.models import Sum, Q
+from django.db.models import Max, Sum, Q
+from django.urls import reverse
+from django.utils.http import http_date, parse_etags, parse_http_date_safe, quote_etag
 from django.utils.timezone import now
 
-from rest_framework import viewsets, permissions, status
+from rest_framework import generics, viewsets, permissions, serializers, status
+from rest_framework.exceptions import ValidationError
 from rest_framework.parsers import MultiPartParser, FormParser
 from rest_framework.response import Response
 from rest_framework.views import APIView
 from rest_framework.permissions import IsAuthenticated
-from rest_framework.decorators import api_view, permission_classes
+from rest_framework.decorators import action, api_view, permission_classes
 
 from .models import (
     CustomerDocument, Customer, Invoice, Vendor, Item, Payment, Quote,
@@ -20,22 +26,167 @@ from .serializers import (
     VendorSerializer, ItemSerializer, PaymentSerializer, QuoteSerializer,
     ProformaInvoiceSerializer, DeliveryChallanSerializer,
     InventoryAdjustmentSerializer, BillSerializer,
+    InvoiceBreakdownSerializer, BillBreakdownSerializer, SearchResultSerializer,
 )
+from . import bulk, conversions, report_cache
+from .pagination import KeysetPagination
+from .search import SEARCH_SOURCES, search
+from .changes import SYNCED_MODELS, changes_since, latest_change_ids
+from .autocomplete import AUTOCOMPLETE_SOURCES, suggest
+from .rollups import (
+    BUCKET_INTERVALS, bucket_start, shift_bucket, summarize_buckets,
+    summarize_range,
+)
+
+
+def get_custom_range(query_params):
+    """
+    Returns the (start, end) dates given by the start_date and end_date
+    query params, or (None, None) if neither is present.
+    Raises ValueError if either is missing or malformed, or if end precedes start.
+    """
+    start_param = query_params.get("start_date")
+    end_param = query_params.get("end_date")
+    if start_param is None and end_param is None:
+        return None, None
+    if not start_param or not end_param:
+        raise ValueError("start_date and end_date must be given together.")
+    start, end = date.fromisoformat(start_param), date.fromisoformat(end_param)
+    if start > end:
+        raise ValueError("start_date must not be after end_date.")
+    return start, end
+
+
+def get_period_range(period, today):
+    """
+    Returns the (start, end) dates of a named Profit and Loss period,
+    or (None, None) if the period is unknown.
+    """
+    if period == "This Month":
+        start = today.replace(day=1)
+        end = today
+    elif period == "Last Month":
+        first = today.replace(day=1) - timedelta(days=1)
+        start = first.replace(day=1)
+        end = first
+    elif period == "This Year":
+        start = today.replace(month=1, day=1)
+        end = today
+    elif period == "Last Year":
+        start = today.replace(year=today.year-1, month=1, day=1)
+        end = today.replace(year=today.year-1, month=12, day=calendar.monthrange(today.year-1, 12)[1])
+    else:
+        return None, None
+    return start, end
+
+
+def get_report_range(query_params, default_period):
+    """
+    Returns (period, start, end) for a report request: a custom range when
+    start_date and end_date are given, otherwise the named period in the
+    time query param. Raises ValueError if neither resolves to a range.
+    """
+    start, end = get_custom_range(query_params)
+    if start:
+        return "Custom", start, end
+    period = query_params.get("time", default_period)
+    start, end = get_period_range(period, date.today())
+    if not start:
+        raise ValueError("Invalid time parameter.")
+    return period, start, end
+
+
+def make_etag(*parts):
+    """Return a quoted strong ETag hashed from ``parts``."""
+    raw = json.dumps(parts, sort_keys=True, default=str)
+    return quote_etag(hashlib.md5(raw.encode()).hexdigest())
+
+
+def etag_matches(request, etag):
+    """Whether the request's If-None-Match names ``etag`` (weak comparison)."""
+    header = request.headers.get("If-None-Match")
+    if not header:
+        return False
+    if header.strip() == "*":
+        return True
+    return etag.removeprefix("W/") in [tag.removeprefix("W/") for tag in parse_etags(header)]
+
+
+def not_modified(etag, last_modified=None):
+    """A bodiless 304 response carrying the validators."""
+    response = Response(status=status.HTTP_304_NOT_MODIFIED)
+    response["ETag"] = etag
+    if last_modified:
+        response["Last-Modified"] = http_date(last_modified.timestamp())
+    return response
+
+
+class ReportETagMixin:
+    """
+    Sets the ``etag`` a report view derives from its cache key on its 200
+    responses. The key changes whenever the report's data or parameters
+    do, so a matching If-None-Match can be answered before any work.
+    """
+    etag = None
 
-class BalanceSheetReportView(APIView):
+    def check_etag(self, request, cache_key):
+        """Store the report's ETag and return a 304 if the client has it."""
+        self.etag = make_etag(cache_key)
+        if etag_matches(request, self.etag):
+            return not_modified(self.etag)
+        return None
+
+    def finalize_response(self, request, response, *args, **kwargs):
+        response = super().finalize_response(request, response, *args, **kwargs)
+        if self.etag and response.status_code == 200:
+            response["ETag"] = self.etag
+        return response
+
+
+def get_party_filters(query_params):
+    """
+    Returns (customer_id, vendor_id) from the query params as ints, or None
+    where absent. Raises ValueError if either is not a number.
+    """
+    ids = []
+    for name in ("customer_id", "vendor_id"):
+        value = query_params.get(name)
+        try:
+            ids.append(int(value) if value else None)
+        except ValueError:
+            raise ValueError(f"Invalid {name} parameter.")
+    return tuple(ids)
+
+
+class BalanceSheetReportView(ReportETagMixin, APIView):
     permission_classes = [IsAuthenticated]
 
     def get(self, request, *args, **kwargs):
         """
         Returns a Balance Sheet report for the given time and basis.
-        Query params: time (Today|Yesterday|This Month), basis (Accrual|Cash)
+        Query params: time (Today|Yesterday|This Month), basis (Accrual|Cash),
+        or start_date and end_date (YYYY-MM-DD) for a custom range,
+        or as_of (YYYY-MM-DD) for cumulative balances up to that date
         """
         time_param = request.query_params.get("time", "Today")
         basis = request.query_params.get("basis", "Accrual")
 
         # Date range logic
         today = date.today()
-        if time_param == "Today":
+        try:
+            custom_start, custom_end = get_custom_range(request.query_params)
+            as_of = request.query_params.get("as_of")
+            as_of = date.fromisoformat(as_of) if as_of else None
+        except ValueError as exc:
+            return Response({"error": str(exc)}, status=400)
+        if as_of:
+            # Everything from the first document up to and including as_of
+            time_param = "As Of"
+            start_date, end_date = date.min, as_of
+        elif custom_start:
+            time_param = "Custom"
+            start_date, end_date = custom_start, custom_end
+        elif time_param == "Today":
             start_date = end_date = today
         elif time_param == "Yesterday":
             start_date = end_date = today - timedelta(days=1)
@@ -45,25 +196,40 @@ class BalanceSheetReportView(APIView):
         else:
             return Response({"error": "Invalid time parameter."}, status=400)
 
-        # Helper: filter by date field depending on basis
-        def filter_by_basis(qs, date_field):
-            if basis == "Accrual":
-                return qs.filter(**{f"{date_field}__gte": start_date, f"{date_field}__lte": end_date})
-            elif basis == "Cash":
-                # For cash, use payment date for inflows, bill date for outflows
-                return qs.filter(**{f"{date_field}__gte": start_date, f"{date_field}__lte": end_date})
-            else:
-                return qs.none()
+        cache_key = report_cache.build_key(
+            "balance-sheet",
+            {
+                "time": time_param,
+                "basis": basis,
+                "start_date": start_date,
+                "end_date": end_date,
+            },
+            [time_param],
+        )
+        unchanged = self.check_etag(request, cache_key)
+        if unchanged:
+            return unchanged
+        cached = report_cache.get_cached(cache_key)
+        if cached is not None:
+            return Response(cached)
+
+        # Invoice, bill and payment totals for the range come from the rollup
+        # tables in at most one query each, whatever the length of the range
+        if basis in ("Accrual", "Cash"):
+            totals = summarize_range(start_date, end_date)
+        else:
+            totals = dict.fromkeys(("invoices_total", "bills_total", "payments_total"), 0)
+        opening_balance = 0
+        if as_of:
+            opening_balance = Customer.objects.aggregate(total=Sum("opening_balance"))['total'] or 0
 
         # Current Assets
         # Cash/Bank: Payments received (inflows)
-        cash_inflows = filter_by_basis(Payment.objects.all(), "date").aggregate(total=Sum("amount"))['total'] or 0
-        # Accounts Receivable: Unpaid invoice amounts
-        invoices = filter_by_basis(Invoice.objects.all(), "invoice_date")
-        total_invoiced = invoices.aggregate(total=Sum("total_amount"))['total'] or 0
-        payments = filter_by_basis(Payment.objects.all(), "date")
-        total_paid = payments.aggregate(total=Sum("amount"))['total'] or 0
-        accounts_receivable = max(total_invoiced - total_paid, 0)
+        cash_inflows = totals["payments_total"]
+        # Accounts Receivable: Unpaid invoice amounts, plus customers' opening balances when cumulative
+        total_invoiced = totals["invoices_total"]
+        total_paid = totals["payments_total"]
+        accounts_receivable = max(opening_balance + total_invoiced - total_paid, 0)
         # Other current assets: Not tracked, set to 0
         other_current_assets = 0
         total_current_assets = cash_inflows + accounts_receivable + other_current_assets
@@ -75,8 +241,7 @@ class BalanceSheetReportView(APIView):
 
         # Liabilities
         # Accounts Payable: Unpaid bills
-        bills = filter_by_basis(Bill.objects.all(), "bill_date")
-        total_billed = bills.aggregate(total=Sum("total_amount"))['total'] or 0
+        total_billed = totals["bills_total"]
         # No bill payments tracked, so all bills are payable
         accounts_payable = total_billed
         # Current Liabilities, Long term liabilities, Other liabilities: Not tracked, set to 0
@@ -89,7 +254,7 @@ class BalanceSheetReportView(APIView):
         equities = 0
         total_liabilities_and_equities = total_liabilities + equities
 
-        return Response({
+        data = {
             "assets": {
                 "current_assets": {
                     "cash": float(cash_inflows),
@@ -114,9 +279,13 @@ class BalanceSheetReportView(APIView):
             },
             "time": time_param,
             "basis": basis,
-            "start_date": str(start_date),
+            "start_date": None if as_of else str(start_date),
             "end_date": str(end_date),
-        })
+        }
+        if as_of:
+            data["as_of"] = str(as_of)
+        report_cache.store(cache_key, data)
+        return Response(data)
 from rest_framework import viewsets, permissions, status
 from rest_framework.parsers import MultiPartParser, FormParser
 from rest_framework.response import Response
@@ -132,9 +301,252 @@ from .serializers import (
     CustomerDocumentSerializer, CustomerSerializer, InvoiceSerializer,
     VendorSerializer, ItemSerializer, PaymentSerializer, QuoteSerializer,
     ProformaInvoiceSerializer, DeliveryChallanSerializer,
-    InventoryAdjustmentSerializer, BillSerializer,
+    InventoryAdjustmentSerializer, BillSerializer, split_param,
 )
 
+# Prefetches for a document's full customer, which list responses only
+# render when asked for with ?expand=customer
+CUSTOMER_PREFETCHES = ("customer__documents", "customer__contact_persons")
+
+
+class ExpandPrefetchMixin:
+    """
+    Adds the prefetches in ``expand_prefetches`` for the nested data a
+    response renders in full: everything outside of list responses, and
+    in lists only what ``?expand=`` names. Keys may be dotted, and
+    expanding ``invoice.customer`` also expands ``invoice``.
+    """
+    expand_prefetches = {}
+
+    def get_queryset(self):
+        queryset = super().get_queryset()
+        if self.action == "list":
+            expand = set()
+            for name in split_param(self.request.query_params.get("expand")):
+                parts = name.split(".")
+                expand.update(".".join(parts[:i]) for i in range(1, len(parts) + 1))
+        else:
+            expand = self.expand_prefetches.keys()
+        lookups = [lookup for name in expand for lookup in self.expand_prefetches.get(name, ())]
+        return queryset.prefetch_related(*lookups) if lookups else queryset
+
+
+class ListFilterMixin:
+    """
+    Filters list responses by the query params in ``list_filters``, which
+    maps each param to its kind:
+
+    - "id": an integer foreign key, e.g. ``?customer_id=3``
+    - "choice": one or more comma-separated values, e.g. ``?status=UNPAID,PARTIAL``
+    - "date": an inclusive range given by ``<param>_from`` and/or ``<param>_to``
+
+    Params filter the model field of the same name unless ``filter_lookups``
+    names another lookup. Each filtered column leads a composite index on
+    the model, so the common combinations are index range scans.
+    """
+    list_filters = {}
+    filter_lookups = {}
+
+    def get_queryset(self):
+        queryset = super().get_queryset()
+        if self.action != "list":
+            return queryset
+        params = self.request.query_params
+        filters = {}
+        for param, kind in self.list_filters.items():
+            lookup = self.filter_lookups.get(param, param)
+            if kind == "date":
+                for suffix, operator in (("_from", "gte"), ("_to", "lte")):
+                    value = params.get(param + suffix)
+                    if not value:
+                        continue
+                    try:
+                        filters[f"{lookup}__{operator}"] = date.fromisoformat(value)
+                    except ValueError:
+                        raise ValidationError({param + suffix: "Use the YYYY-MM-DD format."})
+            elif kind == "choice":
+                values = split_param(params.get(param))
+                if values:
+                    filters[f"{lookup}__in"] = values
+            else:
+                value = params.get(param)
+                if not value:
+                    continue
+                try:
+                    filters[lookup] = int(value)
+                except ValueError:
+                    raise ValidationError({param: "Must be an integer."})
+        return queryset.filter(**filters) if filters else queryset
+
+
+class ChangeFeedMixin:
+    """
+    Adds ``GET <resource>/changes/?since=<cursor>``, returning the records
+    created or updated after the cursor in full, the ids of those deleted,
+    and the cursor to send next time (see core.changes). Start from
+    ``since=0``; while ``has_more`` is true, ask again with the new cursor.
+    """
+    changes_max_limit = 500
+
+    @action(detail=False, methods=["get"])
+    def changes(self, request, *args, **kwargs):
+        try:
+            since = int(request.query_params.get("since", 0))
+            limit = min(int(request.query_params.get("limit", 100)), self.changes_max_limit)
+        except ValueError:
+            raise ValidationError({"error": "since and limit must be integers."})
+        if since < 0 or limit < 1:
+            raise ValidationError({"error": "since must not be negative and limit must be positive."})
+        events = changes_since(self.get_queryset().model, since, limit)
+        has_more = len(events) > limit
+        events = events[:limit]
+        changed = [event.object_id for event in events if not event.deleted]
+        records = self.get_queryset().in_bulk(changed)
+        serializer = self.get_serializer([records[pk] for pk in changed if pk in records], many=True)
+        return Response({
+            "cursor": events[-1].sequence if events else since,
+            "has_more": has_more,
+            "results": serializer.data,
+            "deleted": [event.object_id for event in events if event.deleted],
+        })
+
+
+class BulkMixin:
+    """
+    Adds ``<resource>/bulk/`` for batch writes (see core.bulk): POST a list
+    of records to create them, PATCH a list of partial records, each with
+    its ``id``, to update them, or DELETE a list of ids. The valid rows are
+    written together in one transaction; the response has one result per
+    row, in request order, with the errors of any row left out.
+    """
+
+    @action(detail=False, methods=["post", "patch", "delete"])
+    def bulk(self, request, *args, **kwargs):
+        rows = request.data
+        if not isinstance(rows, list):
+            raise ValidationError({"error": "Send a list of records."})
+        if len(rows) > bulk.BULK_MAX_ROWS:
+            raise ValidationError({"error": f"Send at most {bulk.BULK_MAX_ROWS} records at a time."})
+        if request.method == "DELETE":
+            results = bulk.delete_rows(self.get_queryset(), rows)
+        elif request.method == "PATCH":
+            results = bulk.update_rows(self.get_serializer(), self.get_queryset(), rows)
+        else:
+            results = bulk.create_rows(self.get_serializer(), rows)
+        return Response({"results": results})
+
+
+class ConvertMixin:
+    """
+    Adds ``<resource>/<id>/convert/`` to make a new document from this one
+    (see core.conversions): POST ``{"to": "invoice"}``, with an optional
+    ``date`` for the new document, to get the new document back. POST
+    ``{"to": ..., "ids": [...]}`` to ``<resource>/convert/`` to convert many
+    at once; the response has one result per id, in request order, like
+    ``bulk``.
+    """
+
+    def conversion_args(self, request):
+        target = conversions.target_model(self.get_queryset().model, request.data.get("to"))
+        day = request.data.get("date")
+        if day is not None:
+            try:
+                day = serializers.DateField().to_internal_value(day)
+            except ValidationError as exc:
+                raise ValidationError({"date": exc.detail})
+        return target, day
+
+    @action(detail=True, methods=["post"])
+    def convert(self, request, *args, **kwargs):
+        source = self.get_object()
+        target, day = self.conversion_args(request)
+        context = self.get_serializer_context()
+        objs, errors = conversions.convert(type(source), [source.pk], target, day, context)
+        if errors:
+            raise ValidationError(errors[0])
+        serializer = conversions.SERIALIZERS[target](objs[0], context=context)
+        return Response(serializer.data, status=status.HTTP_201_CREATED)
+
+    @action(detail=False, methods=["post"], url_path="convert")
+    def convert_many(self, request, *args, **kwargs):
+        target, day = self.conversion_args(request)
+        ids = request.data.get("ids")
+        if not isinstance(ids, list):
+            raise ValidationError({"ids": ["Send a list of ids."]})
+        if len(ids) > bulk.BULK_MAX_ROWS:
+            raise ValidationError({"ids": [f"Send at most {bulk.BULK_MAX_ROWS} ids at a time."]})
+        model = self.get_queryset().model
+        objs, errors = conversions.convert(model, ids, target, day, self.get_serializer_context())
+        return Response({"results": [
+            {"index": index, "status": "invalid", "errors": errors[index]}
+            if index in errors else
+            {"index": index, "status": "created", "id": objs[index].pk}
+            for index in range(len(ids))
+        ]})
+
+
+class ConditionalGetMixin:
+    """
+    ETags and 304 responses for list and detail GETs.
+
+    A detail's ETag and Last-Modified come from the row's ``updated_at``
+    and those of the related rows its representation nests, named by the
+    ``updated_at`` lookups in ``etag_related``. A list's ETag comes from the
+    newest change events of the model and of those related models (see
+    core.changes), which every create, update and delete moves. Either is
+    read in one query, so a matching If-None-Match, or If-Modified-Since
+    on a detail, is answered before anything is loaded or serialized.
+    """
+    etag_related = ()
+
+    def etag_models(self):
+        base = self.queryset.model
+        models = [base]
+        for lookup in self.etag_related:
+            model = base
+            for part in lookup.split("__")[:-1]:
+                model = model._meta.get_field(part).related_model
+            models.append(model)
+        # Line items have no events of their own; they change with their document
+        return [model for model in dict.fromkeys(models) if model in SYNCED_MODELS]
+
+    def representation(self, request):
+        return request.get_full_path(), request.accepted_media_type
+
+    def list(self, request, *args, **kwargs):
+        etag = make_etag(self.representation(request), latest_change_ids(self.etag_models()))
+        if etag_matches(request, etag):
+            return not_modified(etag)
+        response = super().list(request, *args, **kwargs)
+        response["ETag"] = etag
+        return response
+
+    def retrieve(self, request, *args, **kwargs):
+        lookup_url_kwarg = self.lookup_url_kwarg or self.lookup_field
+        rows = self.filter_queryset(self.get_queryset()).filter(
+            **{self.lookup_field: self.kwargs[lookup_url_kwarg]}
+        )
+        versions = rows.aggregate(
+            updated_at=Max("updated_at"),
+            **{f"related_{i}": Max(lookup) for i, lookup in enumerate(self.etag_related)},
+        )
+        if versions["updated_at"] is None:
+            # Let the regular lookup raise the 404
+            return super().retrieve(request, *args, **kwargs)
+        last_modified = max(value for value in versions.values() if value is not None)
+        etag = make_etag(self.representation(request), versions)
+        since = parse_http_date_safe(request.headers.get("If-Modified-Since", ""))
+        if etag_matches(request, etag) or (
+            "If-None-Match" not in request.headers
+            and since is not None
+            and int(last_modified.timestamp()) <= since
+        ):
+            return not_modified(etag, last_modified)
+        response = super().retrieve(request, *args, **kwargs)
+        response["ETag"] = etag
+        response["Last-Modified"] = http_date(last_modified.timestamp())
+        return response
+
 
 class CustomerDocumentViewSet(viewsets.ModelViewSet):
     """ViewSet for uploading, retrieving,
@@ -142,6 +554,7 @@ class CustomerDocumentViewSet(viewsets.ModelViewSet):
     queryset = CustomerDocument.objects.all().order_by(
         "-uploaded_at"
     )  # No related fields to optimize
+    ordering = ("-uploaded_at", "-id")
     serializer_class = CustomerDocumentSerializer
     permission_classes = [permissions.IsAuthenticated]
     parser_classes = [MultiPartParser, FormParser]
@@ -185,14 +598,16 @@ class CustomerDocumentViewSet(viewsets.ModelViewSet):
         return Response(serializer.data)
 
 
-class BillViewSet(viewsets.ModelViewSet):
+class BillViewSet(ConditionalGetMixin, ChangeFeedMixin, BulkMixin, ListFilterMixin, viewsets.ModelViewSet):
     """ViewSet for managing Bills."""
-    queryset = Bill.objects.select_related("vendor").prefetch_related("billitem_set").order_by("-created_at")
+    queryset = Bill.objects.select_related("vendor").prefetch_related("item_details__item").order_by("-created_at")
+    list_filters = {"vendor_id": "id", "status": "choice", "bill_date": "date", "due_date": "date"}
+    etag_related = ("vendor__updated_at", "item_details__item__updated_at")
     serializer_class = BillSerializer
     permission_classes = [permissions.IsAuthenticated]
 
 
-class CustomerViewSet(viewsets.ModelViewSet):
+class CustomerViewSet(ConditionalGetMixin, ChangeFeedMixin, viewsets.ModelViewSet):
     """ViewSet for managing Customers."""
 
     queryset = Customer.objects.prefetch_related("documents", "contact_persons").order_by("-created_at")
@@ -200,15 +615,18 @@ class CustomerViewSet(viewsets.ModelViewSet):
     permission_classes = [permissions.IsAuthenticated]
 
 
-class InvoiceViewSet(viewsets.ModelViewSet):
+class InvoiceViewSet(ConditionalGetMixin, ChangeFeedMixin, ConvertMixin, BulkMixin, ListFilterMixin, ExpandPrefetchMixin, viewsets.ModelViewSet):
     """ViewSet for managing Invoices."""
 
-    queryset = Invoice.objects.select_related("customer").prefetch_related("item_details", "files").order_by("-created_at")
+    queryset = Invoice.objects.select_related("customer").prefetch_related("item_details__item", "files", "invoice_files").order_by("-created_at")
+    list_filters = {"customer_id": "id", "invoice_date": "date"}
+    etag_related = ("customer__updated_at", "item_details__item__updated_at")
+    expand_prefetches = {"customer": CUSTOMER_PREFETCHES}
     serializer_class = InvoiceSerializer
     permission_classes = [permissions.IsAuthenticated]
 
 
-class VendorViewSet(viewsets.ModelViewSet):
+class VendorViewSet(ConditionalGetMixin, ChangeFeedMixin, viewsets.ModelViewSet):
     """ViewSet for managing Vendors."""
 
     queryset = Vendor.objects.all().order_by("-created_at")  # No related fields to optimize
@@ -216,7 +634,7 @@ class VendorViewSet(viewsets.ModelViewSet):
     permission_classes = [permissions.IsAuthenticated]
 
 
-class ItemViewSet(viewsets.ModelViewSet):
+class ItemViewSet(ConditionalGetMixin, ChangeFeedMixin, BulkMixin, viewsets.ModelViewSet):
     """ViewSet for managing Items."""
 
     queryset = Item.objects.all().order_by("-created_at")  # No related fields to optimize
@@ -224,48 +642,68 @@ class ItemViewSet(viewsets.ModelViewSet):
     permission_classes = [permissions.IsAuthenticated]
 
 
-class PaymentViewSet(viewsets.ModelViewSet):
+class PaymentViewSet(ConditionalGetMixin, ChangeFeedMixin, BulkMixin, ListFilterMixin, ExpandPrefetchMixin, viewsets.ModelViewSet):
     """ViewSet for managing Payments."""
 
-    queryset = Payment.objects.select_related("invoice").order_by("-created_at")
+    queryset = Payment.objects.select_related("invoice__customer").order_by("-created_at")
+    list_filters = {"invoice_id": "id", "customer_id": "id", "date": "date"}
+    filter_lookups = {"customer_id": "invoice__customer_id"}
+    etag_related = (
+        "invoice__updated_at", "invoice__customer__updated_at",
+        "invoice__item_details__item__updated_at",
+    )
+    expand_prefetches = {
+        "invoice": ("invoice__item_details__item", "invoice__files", "invoice__invoice_files"),
+        "invoice.customer": tuple(f"invoice__{lookup}" for lookup in CUSTOMER_PREFETCHES),
+    }
     serializer_class = PaymentSerializer
     permission_classes = [permissions.IsAuthenticated]
 
 
-class QuoteViewSet(viewsets.ModelViewSet):
+class QuoteViewSet(ConditionalGetMixin, ChangeFeedMixin, ConvertMixin, ListFilterMixin, ExpandPrefetchMixin, viewsets.ModelViewSet):
     """ViewSet for managing Quotes."""
 
-    queryset = Quote.objects.select_related("customer").prefetch_related("item_details", "quote_files").order_by("-created_at")
+    queryset = Quote.objects.select_related("customer").prefetch_related("item_details__item", "quote_files").order_by("-created_at")
+    list_filters = {"customer_id": "id", "status": "choice", "quote_date": "date", "expiry_date": "date"}
+    etag_related = ("customer__updated_at", "item_details__item__updated_at")
+    expand_prefetches = {"customer": CUSTOMER_PREFETCHES}
     serializer_class = QuoteSerializer
     permission_classes = [permissions.IsAuthenticated]
 
 
-class ProformaInvoiceViewSet(viewsets.ModelViewSet):
+class ProformaInvoiceViewSet(ConditionalGetMixin, ChangeFeedMixin, ConvertMixin, ListFilterMixin, ExpandPrefetchMixin, viewsets.ModelViewSet):
     """ViewSet for managing Proforma Invoices."""
 
-    queryset = ProformaInvoice.objects.select_related("customer").prefetch_related("item_details", "proforma_invoice_files").order_by("-created_at")
+    queryset = ProformaInvoice.objects.select_related("customer").prefetch_related("item_details__item", "proforma_invoice_files").order_by("-created_at")
+    list_filters = {"customer_id": "id", "status": "choice", "invoice_date": "date", "expiry_date": "date"}
+    etag_related = ("customer__updated_at", "item_details__item__updated_at")
+    expand_prefetches = {"customer": CUSTOMER_PREFETCHES}
     serializer_class = ProformaInvoiceSerializer
     permission_classes = [permissions.IsAuthenticated]
 
 
-class DeliveryChallanViewSet(viewsets.ModelViewSet):
+class DeliveryChallanViewSet(ConditionalGetMixin, ChangeFeedMixin, ListFilterMixin, ExpandPrefetchMixin, viewsets.ModelViewSet):
     """ViewSet for managing Delivery Challans."""
 
-    queryset = DeliveryChallan.objects.select_related("customer").prefetch_related("delivery_challan_files").order_by("-created_at")
+    queryset = DeliveryChallan.objects.select_related("customer").prefetch_related("item_details__item", "delivery_challan_files").order_by("-created_at")
+    list_filters = {"customer_id": "id", "challan_type": "choice", "date": "date"}
+    etag_related = ("customer__updated_at", "item_details__item__updated_at")
+    expand_prefetches = {"customer": CUSTOMER_PREFETCHES}
     serializer_class = DeliveryChallanSerializer
     permission_classes = [permissions.IsAuthenticated]
 
 
-class InventoryAdjustmentViewSet(viewsets.ModelViewSet):
+class InventoryAdjustmentViewSet(ConditionalGetMixin, ChangeFeedMixin, ListFilterMixin, viewsets.ModelViewSet):
     """ViewSet for managing Inventory Adjustments."""
 
     queryset = InventoryAdjustment.objects.all().order_by("-created_at")  # No related fields to optimize
+    list_filters = {"item_id": "id", "date": "date"}
     serializer_class = InventoryAdjustmentSerializer
     permission_classes = [permissions.IsAuthenticated]
 
 
 # Profit and Loss Report API
-class ProfitAndLossReportView(APIView):
+class ProfitAndLossReportView(ReportETagMixin, APIView):
     permission_classes = [IsAuthenticated]
 
     def get(self, request, *args, **kwargs):
@@ -273,51 +711,32 @@ class ProfitAndLossReportView(APIView):
         Returns a Profit and Loss report for the given period, basis, and comparison.
         Query params:
           - time: "This Month", "Last Month", "This Year" (default: This Month)
+          - start_date, end_date: YYYY-MM-DD, a custom range used instead of time
+          - customer_id: narrows income and payments to one customer
+          - vendor_id: narrows cost to one vendor
         """
         today = date.today()
-        time_param = request.query_params.get("time", "This Month")
         basis = request.query_params.get("basis", "Accrual")
         compare_with = request.query_params.get("compare_with", "None")
-        customer_id = request.query_params.get("customer_id")
-
-        def get_range(period, today):
-            if period == "This Month":
-                start = today.replace(day=1)
-                end = today
-            elif period == "Last Month":
-                first = today.replace(day=1) - timedelta(days=1)
-                start = first.replace(day=1)
-                end = first
-            elif period == "This Year":
-                start = today.replace(month=1, day=1)
-                end = today
-            elif period == "Last Year":
-                start = today.replace(year=today.year-1, month=1, day=1)
-                end = today.replace(year=today.year-1, month=12, day=calendar.monthrange(today.year-1, 12)[1])
-            else:
-                return None, None
-            return start, end
 
-        start_date, end_date = get_range(time_param, today)
-        if not start_date or not end_date:
-            return Response({"error": "Invalid time parameter."}, status=400)
+        try:
+            time_param, start_date, end_date = get_report_range(request.query_params, "This Month")
+            customer_id, vendor_id = get_party_filters(request.query_params)
+        except ValueError as exc:
+            return Response({"error": str(exc)}, status=400)
 
         compare_data = None
         if compare_with and compare_with != "None":
-            compare_start, compare_end = get_range(compare_with, today)
+            compare_start, compare_end = get_period_range(compare_with, today)
         else:
             compare_start = compare_end = None
 
-        def get_report(start_date, end_date, summary_only=False, customer_id=None):
-            invoice_filter = Q(invoice_date__gte=start_date, invoice_date__lte=end_date)
-            if customer_id:
-                invoice_filter &= Q(customer_id=customer_id)
-            invoices = Invoice.objects.filter(invoice_filter)
-            operating_income = invoices.aggregate(total=Sum("total_amount"))['total'] or 0
-
-            bill_filter = Q(bill_date__gte=start_date, bill_date__lte=end_date)
-            bills = Bill.objects.filter(bill_filter)
-            cost_of_goods_sold = bills.aggregate(total=Sum("total_amount"))['total'] or 0
+        def get_report(start_date, end_date, summary_only=False):
+            # Party filters read the per-customer and per-vendor rollups
+            totals = summarize_range(start_date, end_date, customer_id=customer_id, vendor_id=vendor_id)
+            operating_income = totals["invoices_total"]
+            cost_of_goods_sold = totals["bills_total"]
+            payments_total = totals["payments_total"]
 
             gross_profit = operating_income - cost_of_goods_sold
             operating_expense = 0
@@ -325,29 +744,20 @@ class ProfitAndLossReportView(APIView):
             non_operating_income = 0
             non_operating_expense = 0
             net_profit_loss = operating_profit + non_operating_income - non_operating_expense
-            payments_total = Payment.objects.filter(date__gte=start_date, date__lte=end_date).aggregate(total=Sum("amount"))['total'] or 0
 
             if not summary_only:
-                invoice_breakdown = [
-                    {
-                        "id": inv.id,
-                        "invoice_number": inv.invoice_number,
-                        "date": inv.invoice_date,
-                        "customer": inv.customer.display_name,
-                        "total_amount": float(inv.total_amount),
-                    }
-                    for inv in invoices
-                ]
-                bill_breakdown = [
-                    {
-                        "id": bill.id,
-                        "bill_number": bill.bill_number,
-                        "date": bill.bill_date,
-                        "vendor": bill.vendor.name,
-                        "total_amount": float(bill.total_amount),
-                    }
-                    for bill in bills
-                ]
+                # Detail rows are served page by page from the breakdown endpoints
+                params = {"start_date": start_date, "end_date": end_date}
+                invoice_breakdown = request.build_absolute_uri(
+                    reverse("profit-and-loss-invoices") + "?" + urlencode(
+                        {**params, "customer_id": customer_id} if customer_id else params
+                    )
+                )
+                bill_breakdown = request.build_absolute_uri(
+                    reverse("profit-and-loss-bills") + "?" + urlencode(
+                        {**params, "vendor_id": vendor_id} if vendor_id else params
+                    )
+                )
             else:
                 invoice_breakdown = None
                 bill_breakdown = None
@@ -367,9 +777,30 @@ class ProfitAndLossReportView(APIView):
             }
 
         summary_only = request.query_params.get("summary_only", "false").lower() == "true"
-        main_data = get_report(start_date, end_date, summary_only=summary_only, customer_id=customer_id)
+        cache_key = report_cache.build_key(
+            "profit-and-loss",
+            {
+                "time": time_param,
+                "start_date": start_date,
+                "end_date": end_date,
+                "basis": basis,
+                "compare_with": compare_with,
+                "customer_id": customer_id,
+                "vendor_id": vendor_id,
+                "summary_only": summary_only,
+            },
+            [time_param] + ([compare_with] if compare_start else []),
+        )
+        unchanged = self.check_etag(request, cache_key)
+        if unchanged:
+            return unchanged
+        cached = report_cache.get_cached(cache_key)
+        if cached is not None:
+            return Response(cached)
+
+        main_data = get_report(start_date, end_date, summary_only=summary_only)
         if compare_start and compare_end:
-            compare_data = get_report(compare_start, compare_end, summary_only=summary_only, customer_id=customer_id)
+            compare_data = get_report(compare_start, compare_end, summary_only=summary_only)
 
         response = {
             "period": time_param,
@@ -381,4 +812,256 @@ class ProfitAndLossReportView(APIView):
         if compare_data:
             response["compare_with"] = compare_with
             response["compare_report"] = compare_data
+        report_cache.store(cache_key, response)
         return Response(response)
+
+
+class ProfitAndLossInvoiceBreakdownView(generics.ListAPIView):
+    """
+    Cursor-paginated invoice rows behind a Profit and Loss report.
+    Accepts the same time, start_date/end_date and customer_id query params.
+    """
+    permission_classes = [IsAuthenticated]
+    serializer_class = InvoiceBreakdownSerializer
+    pagination_class = KeysetPagination
+    ordering = ("invoice_date", "id")
+
+    def get_queryset(self):
+        try:
+            _, start_date, end_date = get_report_range(self.request.query_params, "This Month")
+            customer_id, _ = get_party_filters(self.request.query_params)
+        except ValueError as exc:
+            raise ValidationError({"error": str(exc)})
+        invoices = Invoice.objects.filter(invoice_date__range=(start_date, end_date))
+        if customer_id is not None:
+            invoices = invoices.filter(customer_id=customer_id)
+        return invoices.values(
+            "id", "invoice_number", "invoice_date", "customer__display_name", "total_amount",
+        )
+
+
+class ProfitAndLossBillBreakdownView(generics.ListAPIView):
+    """
+    Cursor-paginated bill rows behind a Profit and Loss report.
+    Accepts the same time, start_date/end_date and vendor_id query params.
+    """
+    permission_classes = [IsAuthenticated]
+    serializer_class = BillBreakdownSerializer
+    pagination_class = KeysetPagination
+    ordering = ("bill_date", "id")
+
+    def get_queryset(self):
+        try:
+            _, start_date, end_date = get_report_range(self.request.query_params, "This Month")
+            _, vendor_id = get_party_filters(self.request.query_params)
+        except ValueError as exc:
+            raise ValidationError({"error": str(exc)})
+        bills = Bill.objects.filter(bill_date__range=(start_date, end_date))
+        if vendor_id is not None:
+            bills = bills.filter(vendor_id=vendor_id)
+        return bills.values(
+            "id", "bill_number", "bill_date", "vendor__name", "total_amount",
+        )
+
+
+class TimeSeriesReportView(ReportETagMixin, APIView):
+    permission_classes = [IsAuthenticated]
+    max_periods = 366
+
+    def get(self, request, *args, **kwargs):
+        """
+        Returns income, cost, profit and payments for consecutive buckets.
+        Query params:
+          - interval: "day", "week", "month", "quarter" (default: month)
+          - periods: number of buckets, ending with the one containing end_date (default: 12)
+          - end_date: YYYY-MM-DD (default: today)
+          - compare_with: "None", "previous_period", "previous_year" (default: None)
+          - customer_id, vendor_id: narrow income and payments, or cost, to one party
+        """
+        interval = request.query_params.get("interval", "month")
+        compare_with = request.query_params.get("compare_with", "None")
+        if interval not in BUCKET_INTERVALS:
+            return Response({"error": "Invalid interval parameter."}, status=400)
+        if compare_with not in ("None", "previous_period", "previous_year"):
+            return Response({"error": "Invalid compare_with parameter."}, status=400)
+        try:
+            periods = int(request.query_params.get("periods", 12))
+            end_param = request.query_params.get("end_date")
+            end_date = date.fromisoformat(end_param) if end_param else date.today()
+        except ValueError:
+            return Response({"error": "Invalid periods or end_date parameter."}, status=400)
+        try:
+            customer_id, vendor_id = get_party_filters(request.query_params)
+        except ValueError as exc:
+            return Response({"error": str(exc)}, status=400)
+        if not 1 <= periods <= self.max_periods:
+            return Response({"error": f"periods must be between 1 and {self.max_periods}."}, status=400)
+
+        cache_key = report_cache.build_key(
+            "timeseries",
+            {
+                "interval": interval,
+                "periods": periods,
+                "end_date": end_date,
+                "compare_with": compare_with,
+                "customer_id": customer_id,
+                "vendor_id": vendor_id,
+            },
+            ["Custom"],
+        )
+        unchanged = self.check_etag(request, cache_key)
+        if unchanged:
+            return unchanged
+        cached = report_cache.get_cached(cache_key)
+        if cached is not None:
+            return Response(cached)
+
+        def get_series(end_date):
+            last = bucket_start(interval, end_date)
+            first = shift_bucket(interval, last, 1 - periods)
+            totals = summarize_buckets(interval, first, end_date, customer_id=customer_id, vendor_id=vendor_id)
+            series = []
+            for index in range(periods):
+                start = shift_bucket(interval, first, index)
+                end = min(shift_bucket(interval, start, 1) - timedelta(days=1), end_date)
+                bucket = totals.get(start, {})
+                income = bucket.get("invoices_total", 0)
+                cost = bucket.get("bills_total", 0)
+                series.append({
+                    "start_date": str(start),
+                    "end_date": str(end),
+                    "income": float(income),
+                    "cost": float(cost),
+                    "profit": float(income - cost),
+                    "payments": float(bucket.get("payments_total", 0)),
+                })
+            return series
+
+        series = get_series(end_date)
+        response = {
+            "interval": interval,
+            "periods": periods,
+            "start_date": series[0]["start_date"],
+            "end_date": str(end_date),
+            "series": series,
+        }
+        if compare_with == "previous_period":
+            compare_end = date.fromisoformat(series[0]["start_date"]) - timedelta(days=1)
+        elif compare_with == "previous_year":
+            last_day = calendar.monthrange(end_date.year - 1, end_date.month)[1]
+            compare_end = end_date.replace(year=end_date.year - 1, day=min(end_date.day, last_day))
+        if compare_with != "None":
+            response["compare_with"] = compare_with
+            response["compare_series"] = get_series(compare_end)
+        report_cache.store(cache_key, response)
+        return Response(response)
+
+
+# (label, aggregate alias, min age in days, max age in days)
+AGING_BUCKETS = (
+    ("current", "current", None, 0),
+    ("1-30", "days_1_30", 1, 30),
+    ("31-60", "days_31_60", 31, 60),
+    ("61-90", "days_61_90", 61, 90),
+    ("90+", "days_over_90", 91, None),
+)
+
+
+class AccountsReceivableAgingView(ReportETagMixin, APIView):
+    permission_classes = [IsAuthenticated]
+
+    def get(self, request, *args, **kwargs):
+        """
+        Returns unpaid invoice balances grouped by age in days.
+        Invoices carry no due date, so age is counted from the invoice date.
+        Query params:
+          - customer_id: limits the report to one customer (optional)
+        """
+        try:
+            customer_id, _ = get_party_filters(request.query_params)
+        except ValueError as exc:
+            return Response({"error": str(exc)}, status=400)
+        today = date.today()
+
+        cache_key = report_cache.build_key("ar-aging", {"customer_id": customer_id}, ["As Of"])
+        unchanged = self.check_etag(request, cache_key)
+        if unchanged:
+            return unchanged
+        cached = report_cache.get_cached(cache_key)
+        if cached is not None:
+            return Response(cached)
+
+        # One pass over the partial index on unpaid invoices
+        invoices = Invoice.objects.filter(balance_due__gt=0)
+        if customer_id:
+            invoices = invoices.filter(customer_id=customer_id)
+        aggregates = {}
+        for _, alias, min_age, max_age in AGING_BUCKETS:
+            condition = Q()
+            if min_age is not None:
+                condition &= Q(invoice_date__lte=today - timedelta(days=min_age))
+            if max_age is not None:
+                condition &= Q(invoice_date__gte=today - timedelta(days=max_age))
+            aggregates[alias] = Sum("balance_due", filter=condition, default=0)
+        totals = invoices.aggregate(**aggregates)
+
+        response = {
+            "as_of": str(today),
+            "customer_id": customer_id,
+            "aging": {label: float(totals[alias]) for label, alias, _, _ in AGING_BUCKETS},
+            "total": float(sum(totals.values())),
+        }
+        report_cache.store(cache_key, response)
+        return Response(response)
+
+
+class SearchView(APIView):
+    permission_classes = [IsAuthenticated]
+    max_limit = 50
+
+    def get(self, request, *args, **kwargs):
+        """
+        Searches customers, vendors, items and document numbers.
+        Query params:
+          - q: the words to find; every word must match (required)
+          - kind: comma-separated kinds to search, e.g. customer,item (optional)
+          - limit: number of results, up to 50 (default 20)
+        """
+        query = request.query_params.get("q", "").strip()
+        if not query:
+            return Response({"error": "q is required."}, status=400)
+        kinds = split_param(request.query_params.get("kind"))
+        unknown = set(kinds) - set(SEARCH_SOURCES)
+        if unknown:
+            return Response({"error": f"Unknown kind: {', '.join(sorted(unknown))}."}, status=400)
+        try:
+            limit = min(int(request.query_params.get("limit", 20)), self.max_limit)
+        except ValueError:
+            return Response({"error": "Invalid limit parameter."}, status=400)
+        if limit < 1:
+            return Response({"error": "Invalid limit parameter."}, status=400)
+        results = search(query, kinds=kinds, limit=limit)
+        return Response({"results": SearchResultSerializer(results, many=True).data})
+
+
+class AutocompleteView(APIView):
+    permission_classes = [IsAuthenticated]
+    max_limit = 25
+
+    def get(self, request, kind, *args, **kwargs):
+        """
+        Returns picker suggestions for customers, vendors or items whose
+        name starts with ``q``: id, label and a few key fields each.
+        Query params:
+          - q: the typed prefix, matched case-insensitively (default: empty)
+          - limit: number of suggestions, up to 25 (default 10)
+        """
+        if kind not in AUTOCOMPLETE_SOURCES:
+            return Response({"error": f"Unknown kind: {kind}."}, status=404)
+        try:
+            limit = min(int(request.query_params.get("limit", 10)), self.max_limit)
+        except ValueError:
+            return Response({"error": "Invalid limit parameter."}, status=400)
+        if limit < 1:
+            return Response({"error": "Invalid limit parameter."}, status=400)
+        return Response({"results": suggest(kind, request.query_params.get("q", ""), limit)})
@@ -70,6 +70,7 @@ MIDDLEWARE = [
     'django.contrib.auth.middleware.AuthenticationMiddleware',
     'django.contrib.messages.middleware.MessageMiddleware',
     'django.middleware.clickjacking.XFrameOptionsMiddleware',
+    'core.middleware.QueryBudgetMiddleware',
 ]
 
 CORS_ALLOWED_ORIGINS = [
@@ -194,6 +195,34 @@ SECURE_HSTS_PRELOAD = not DEBUG
 
 DEFAULT_AUTO_FIELD = "django.db.models.BigAutoField"
 
+# Report responses and the version tokens that invalidate them (see
+# core/report_cache.py), and the autocomplete versions, must be shared by
+# every gunicorn worker, or a write handled by one worker would leave the
+# others serving stale data. Redis when REDIS_URL is set, else a table in the
+# database (created by start.sh with createcachetable).
+if os.environ.get("REDIS_URL"):
+    CACHES = {
+        "default": {
+            "BACKEND": "django.core.cache.backends.redis.RedisCache",
+            "LOCATION": os.environ["REDIS_URL"],
+        }
+    }
+else:
+    CACHES = {
+        "default": {
+            "BACKEND": "django.core.cache.backends.db.DatabaseCache",
+            "LOCATION": "django_cache",
+        }
+    }
+
+# Seconds a computed report response stays cached (see core/report_cache.py)
+REPORT_CACHE_TIMEOUT = int(os.environ.get("REPORT_CACHE_TIMEOUT", 300))
+
+# Requests running more queries than this are logged (see core/middleware.py)
+QUERY_BUDGET = int(os.environ.get("QUERY_BUDGET", 50))
+# Return X-Query-Count and timing headers on every response
+QUERY_BUDGET_HEADERS = os.environ.get("QUERY_BUDGET_HEADERS", str(DEBUG)) == "True"
+
 REST_FRAMEWORK = {
     "DEFAULT_AUTHENTICATION_CLASSES": (
         "rest_framework_simplejwt.authentication.JWTAuthentication",
@@ -202,7 +231,7 @@ REST_FRAMEWORK = {
         "rest_framework.permissions.IsAuthenticated",
     ),
     "DEFAULT_PAGINATION_CLASS": (
-        "rest_framework.pagination.PageNumberPagination"
+        "core.pagination.ListPagination"
     ),
     "PAGE_SIZE": 10,
 }
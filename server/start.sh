@@ -3,5 +3,8 @@
 # Collect static files
 python manage.py collectstatic --noinput
 
+# Create the shared cache table (see CACHES in settings.py); a no-op once it exists
+python manage.py createcachetable
+
 # Start Gunicorn to serve the Django app
 exec gunicorn server.wsgi --log-file -